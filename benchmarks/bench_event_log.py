@@ -0,0 +1,92 @@
+"""Run event log: one INSERT + COMMIT per event vs the batched buffer.
+
+    PYTHONPATH=src python benchmarks/bench_event_log.py --events 40 --states 6
+
+Replays the log traffic of a run (``--events`` events, ``--states`` of them
+state transitions, which force a flush) against a temporary SQLite database
+and counts the statements the driver executes, i.e. database round-trips.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import tempfile
+import time
+from uuid import uuid4
+
+from sqlalchemy import event
+
+from config import settings
+from db.base import create_engine, create_sessionmaker, init_models
+from db.models import EventLog
+from db.repositories import add_log
+from services.event_log import EventLogBuffer
+
+
+def schedule(events: int, states: int) -> list[bool]:
+    """Per event, whether it is a state transition."""
+    step = max(1, events // max(1, states))
+    return [number % step == 0 for number in range(events)]
+
+
+async def per_event(sessionmaker, run_id: str, plan: list[bool]) -> None:
+    async with sessionmaker() as session:
+        for number, _ in enumerate(plan):
+            log = EventLog(
+                id=str(uuid4()),
+                run_id=run_id,
+                message=f"event {number}",
+                kind="event",
+                payload={"n": number},
+            )
+            await add_log(session, log)
+
+
+async def buffered(sessionmaker, run_id: str, plan: list[bool]) -> None:
+    async with EventLogBuffer(sessionmaker, run_id) as events:
+        for number, state in enumerate(plan):
+            await events.add(f"event {number}", "event", {"n": number})
+            if state:
+                await events.flush()
+
+
+async def measure(name: str, write, engine, plan: list[bool], runs: int) -> None:
+    statements = []
+    event.listen(
+        engine.sync_engine,
+        "before_cursor_execute",
+        lambda *args: statements.append(args[2]),
+    )
+    commits = []
+    event.listen(engine.sync_engine, "commit", lambda *args: commits.append(1))
+    sessionmaker = create_sessionmaker(engine)
+    started = time.perf_counter()
+    for _ in range(runs):
+        await write(sessionmaker, str(uuid4()), plan)
+    elapsed = (time.perf_counter() - started) * 1000 / runs
+    print(
+        f"{name:<10} {len(statements) / runs:6.1f} statements "
+        f"{len(commits) / runs:5.1f} commits   {elapsed:7.2f} ms per run"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--events", type=int, default=40)
+    parser.add_argument("--states", type=int, default=6)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    plan = schedule(args.events, args.states)
+    for name, write in (("per-event", per_event), ("buffered", buffered)):
+        with tempfile.TemporaryDirectory() as tmp:
+            settings.database_url = f"sqlite+aiosqlite:///{tmp}/bench.db"
+            engine = create_engine()
+            await init_models(engine)
+            await measure(name, write, engine, plan, args.runs)
+            await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,102 @@
+"""Candidate validation: text scans + git apply --check vs the parsed patch model.
+
+    PYTHONPATH=src python benchmarks/bench_patch_apply.py --files 3 --lines 2000
+
+The "subprocess" path is what check_candidate used to do: several scans of
+the diff text, a hash and ``git apply --3way --check``.  The "in-process"
+path parses once and applies the hunks to the worktree files in memory.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import statistics
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+
+from tools.diff_ops import diff_stats, hash_diff
+from tools.git_ops import git_apply_check
+from tools.patch_model import Patch, apply_patch
+
+
+def build_repo(root: Path, files: int, lines: int) -> list[list[str]]:
+    contents = []
+    for number in range(files):
+        body = [f"value_{number}_{line} = {line}" for line in range(lines)]
+        (root / f"mod{number}.py").write_text("\n".join(body) + "\n")
+        contents.append(body)
+    git = ["git", "-c", "user.email=bench@example.com", "-c", "user.name=bench"]
+    subprocess.run([*git, "init", "-q"], cwd=root, check=True)
+    subprocess.run([*git, "add", "."], cwd=root, check=True)
+    subprocess.run([*git, "commit", "-qm", "synthetic"], cwd=root, check=True)
+    return contents
+
+
+def make_diff(contents: list[list[str]], hunks: int, rng: random.Random) -> str:
+    parts = []
+    for number, body in enumerate(contents):
+        parts.append(f"diff --git a/mod{number}.py b/mod{number}.py")
+        parts.append(f"--- a/mod{number}.py\n+++ b/mod{number}.py")
+        starts = sorted(rng.sample(range(3, len(body) - 4, 7), hunks))
+        for start in starts:
+            # Shifted line numbers, as in most model-written diffs.
+            parts.append(f"@@ -{start + 5},7 +{start + 5},7 @@")
+            parts.extend(f" {line}" for line in body[start - 3 : start])
+            parts.append(f"-{body[start]}")
+            parts.append(f"+{body[start]}  # changed")
+            parts.extend(f" {line}" for line in body[start + 1 : start + 4])
+    return "\n".join(parts) + "\n"
+
+
+def subprocess_check(root: Path, diff: str) -> bool:
+    assert "diff --git" in diff and "@@" in diff
+    diff_stats(diff)
+    hash_diff(diff)
+    return asyncio.run(git_apply_check(root, diff, three_way=True)).ok
+
+
+def in_process_check(root: Path, diff: str) -> bool:
+    patch = Patch.parse(diff)
+    assert patch.files and patch.hunk_count
+    patch.stats()
+    patch.hash()
+    apply_patch(patch, root)
+    return True
+
+
+def measure(name: str, check, root: Path, diffs: list[str]) -> None:
+    latencies = []
+    for diff in diffs:
+        started = time.perf_counter()
+        assert check(root, diff)
+        latencies.append((time.perf_counter() - started) * 1000)
+    print(
+        f"{name:<11} p50 {statistics.median(latencies):8.2f} ms   "
+        f"max {max(latencies):8.2f} ms"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--files", type=int, default=3)
+    parser.add_argument("--lines", type=int, default=2000)
+    parser.add_argument("--hunks", type=int, default=4)
+    parser.add_argument("--runs", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        contents = build_repo(root, args.files, args.lines)
+        diffs = [make_diff(contents, args.hunks, rng) for _ in range(args.runs)]
+        measure("subprocess", subprocess_check, root, diffs)
+        measure("in-process", in_process_check, root, diffs)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""Ranking latency and recall of git grep vs BM25 vs TF-IDF on a synthetic repo.
+
+    PYTHONPATH=src python benchmarks/bench_retrieval.py --files 50000
+
+Every query plants a few rare identifiers into a handful of files; recall@k
+is the share of those files found in the top ``k`` results.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import statistics
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+
+from services.jobs import find_relevant_files, top_terms
+from tools import tfidf
+from tools.bm25 import BM25Index, tokenize
+
+COMMON = (
+    "request response handler config value user service error status client "
+    "server session token cache result payload message event router model"
+).split()
+
+
+def build_repo(root: Path, files: int, queries: int, rng: random.Random):
+    vocabulary = [f"term{number}" for number in range(20_000)]
+    weights = [1 / (rank + 1) for rank in range(len(vocabulary))]
+    contents = [
+        rng.choices(vocabulary, weights, k=80) + rng.sample(COMMON, 5)
+        for _ in range(files)
+    ]
+    cases = []
+    for number in range(queries):
+        topic = [f"topicName{number}x{part}" for part in range(3)]
+        relevant = rng.sample(range(files), 5)
+        for row in relevant:
+            contents[row].extend(topic)
+        text = f"Fix {' '.join(topic)} when the {' '.join(rng.sample(COMMON, 4))} fails"
+        cases.append((text, {f"src/mod{row // 500}/file{row}.py" for row in relevant}))
+    for row, words in enumerate(contents):
+        path = root / f"src/mod{row // 500}/file{row}.py"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(
+            "\n".join(" ".join(words[i : i + 10]) for i in range(0, len(words), 10))
+        )
+    git = ["git", "-c", "user.email=bench@example.com", "-c", "user.name=bench"]
+    subprocess.run([*git, "init", "-q"], cwd=root, check=True)
+    subprocess.run([*git, "add", "."], cwd=root, check=True)
+    subprocess.run([*git, "commit", "-qm", "synthetic"], cwd=root, check=True)
+    return cases
+
+
+def measure(name, search, cases, k):
+    latencies, recalls = [], []
+    for text, relevant in cases:
+        started = time.perf_counter()
+        found = search(text)[:k]
+        latencies.append((time.perf_counter() - started) * 1000)
+        recalls.append(len(relevant & set(found)) / len(relevant))
+    print(
+        f"{name:<10} p50 {statistics.median(latencies):9.2f} ms   "
+        f"max {max(latencies):9.2f} ms   recall@{k} {statistics.mean(recalls):.3f}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--files", type=int, default=50_000)
+    parser.add_argument("--queries", type=int, default=30)
+    parser.add_argument("--k", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp) / "repo"
+        root.mkdir()
+        started = time.perf_counter()
+        cases = build_repo(root, args.files, args.queries, random.Random(args.seed))
+        print(f"repo: {args.files} files in {time.perf_counter() - started:.1f}s")
+
+        started = time.perf_counter()
+        index = BM25Index(commit="synthetic")
+        for path in root.rglob("*.py"):
+            index.add(str(path.relative_to(root)), tokenize(path.read_text()))
+        print(f"bm25 build: {time.perf_counter() - started:.1f}s")
+
+        def grep(text: str) -> list[str]:
+            return asyncio.run(find_relevant_files(root, top_terms(text), args.k))
+
+        measure("git grep", grep, cases, args.k)
+        measure(
+            "bm25",
+            lambda text: [p for p, _ in index.search(text, args.k)],
+            cases,
+            args.k,
+        )
+        if not tfidf.available():
+            print("tfidf      skipped: install the 'retrieval' extra")
+            return
+        started = time.perf_counter()
+        tfidf.load_or_build(Path(tmp) / "index", "bench", index)
+        print(f"tfidf build: {time.perf_counter() - started:.1f}s")
+        started = time.perf_counter()
+        matrix = tfidf.load_or_build(Path(tmp) / "index", "bench", index)
+        print(f"tfidf mmap load: {(time.perf_counter() - started) * 1000:.1f} ms")
+        measure(
+            "tfidf",
+            lambda text: [p for p, _ in matrix.search(text, args.k)],
+            cases,
+            args.k,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -36,6 +36,51 @@ class Settings(BaseSettings):
             "AGENT_HUB_OPENROUTER_MODEL", "google/gemini-3-flash-preview"
         )
     )
+    llm_max_connections: int = Field(
+        default_factory=lambda: int(env("AGENT_HUB_LLM_MAX_CONNECTIONS", "20"))
+    )
+    llm_first_token_timeout: float = Field(
+        default_factory=lambda: float(env("AGENT_HUB_LLM_FIRST_TOKEN_TIMEOUT", "30"))
+    )
+    llm_total_timeout: float = Field(
+        default_factory=lambda: float(env("AGENT_HUB_LLM_TOTAL_TIMEOUT", "180"))
+    )
+    llm_stream: bool = Field(
+        default_factory=lambda: env("AGENT_HUB_LLM_STREAM", "1") == "1"
+    )
+    llm_initial_concurrency: float = Field(
+        default_factory=lambda: float(env("AGENT_HUB_LLM_INITIAL_CONCURRENCY", "4"))
+    )
+    llm_max_concurrency: float = Field(
+        default_factory=lambda: float(env("AGENT_HUB_LLM_MAX_CONCURRENCY", "32"))
+    )
+    llm_hedging: bool = Field(
+        default_factory=lambda: env("AGENT_HUB_LLM_HEDGING", "0") == "1"
+    )
+    llm_hedge_percentile: float = Field(
+        default_factory=lambda: float(env("AGENT_HUB_LLM_HEDGE_PERCENTILE", "0.9"))
+    )
+    llm_hedge_default_delay: float = Field(
+        default_factory=lambda: float(env("AGENT_HUB_LLM_HEDGE_DEFAULT_DELAY", "20"))
+    )
+    llm_breaker_threshold: int = Field(
+        default_factory=lambda: int(env("AGENT_HUB_LLM_BREAKER_THRESHOLD", "3"))
+    )
+    llm_breaker_cooldown: float = Field(
+        default_factory=lambda: float(env("AGENT_HUB_LLM_BREAKER_COOLDOWN", "60"))
+    )
+    llm_cache_path: str = Field(
+        default_factory=lambda: env("AGENT_HUB_LLM_CACHE_PATH", "")
+    )
+    llm_cache_ttl: float = Field(
+        default_factory=lambda: float(env("AGENT_HUB_LLM_CACHE_TTL", "86400"))
+    )
+    llm_cache_max_rows: int = Field(
+        default_factory=lambda: int(env("AGENT_HUB_LLM_CACHE_MAX_ROWS", "5000"))
+    )
+    prompt_token_cap: int = Field(
+        default_factory=lambda: int(env("AGENT_HUB_PROMPT_TOKEN_CAP", "24000"))
+    )
     available_models: list[str] = Field(
         default_factory=lambda: env_list(
             "AGENT_HUB_AVAILABLE_MODELS",
@@ -52,6 +97,62 @@ class Settings(BaseSettings):
     github_token: str = Field(
         default_factory=lambda: env("AGENT_HUB_GITHUB_TOKEN", "")
     )
+    github_app_id: str = Field(
+        default_factory=lambda: env("AGENT_HUB_GITHUB_APP_ID", "")
+    )
+    github_app_private_key: str = Field(
+        default_factory=lambda: env("AGENT_HUB_GITHUB_APP_PRIVATE_KEY", "")
+    )
+    github_app_private_key_path: str = Field(
+        default_factory=lambda: env("AGENT_HUB_GITHUB_APP_PRIVATE_KEY_PATH", "")
+    )
+    github_app_token_refresh_margin: float = Field(
+        default_factory=lambda: float(
+            env("AGENT_HUB_GITHUB_APP_TOKEN_REFRESH_MARGIN", "300")
+        )
+    )
+    github_api_url: str = Field(
+        default_factory=lambda: env("AGENT_HUB_GITHUB_API_URL", "https://api.github.com")
+    )
+    github_http2: bool = Field(
+        default_factory=lambda: env("AGENT_HUB_GITHUB_HTTP2", "1") == "1"
+    )
+    github_max_connections: int = Field(
+        default_factory=lambda: int(env("AGENT_HUB_GITHUB_MAX_CONNECTIONS", "20"))
+    )
+    github_max_keepalive: int = Field(
+        default_factory=lambda: int(env("AGENT_HUB_GITHUB_MAX_KEEPALIVE", "10"))
+    )
+    github_keepalive_expiry: float = Field(
+        default_factory=lambda: float(env("AGENT_HUB_GITHUB_KEEPALIVE_EXPIRY", "30"))
+    )
+    github_timeout: float = Field(
+        default_factory=lambda: float(env("AGENT_HUB_GITHUB_TIMEOUT", "20"))
+    )
+    github_cache_size: int = Field(
+        default_factory=lambda: int(env("AGENT_HUB_GITHUB_CACHE_SIZE", "512"))
+    )
+    github_cache_ttl: int = Field(
+        default_factory=lambda: int(env("AGENT_HUB_GITHUB_CACHE_TTL", "3600"))
+    )
+    github_rate_reserve: int = Field(
+        default_factory=lambda: int(env("AGENT_HUB_GITHUB_RATE_RESERVE", "50"))
+    )
+    github_mutation_interval: float = Field(
+        default_factory=lambda: float(env("AGENT_HUB_GITHUB_MUTATION_INTERVAL", "1"))
+    )
+    github_rate_max_wait: float = Field(
+        default_factory=lambda: float(env("AGENT_HUB_GITHUB_RATE_MAX_WAIT", "120"))
+    )
+    review_max_files: int = Field(
+        default_factory=lambda: int(env("AGENT_HUB_REVIEW_MAX_FILES", "100"))
+    )
+    review_max_patch_chars: int = Field(
+        default_factory=lambda: int(env("AGENT_HUB_REVIEW_MAX_PATCH_CHARS", "120000"))
+    )
+    review_max_file_chars: int = Field(
+        default_factory=lambda: int(env("AGENT_HUB_REVIEW_MAX_FILE_CHARS", "20000"))
+    )
     app_base_url: str = Field(
         default_factory=lambda: env("AGENT_HUB_APP_BASE_URL", "http://localhost:8000")
     )
@@ -67,6 +168,66 @@ class Settings(BaseSettings):
     max_patch_lines: int = Field(
         default_factory=lambda: int(env("AGENT_HUB_MAX_PATCH_LINES", "400"))
     )
+    git_timeout: float = Field(
+        default_factory=lambda: float(env("AGENT_HUB_GIT_TIMEOUT", "60"))
+    )
+    git_network_timeout: float = Field(
+        default_factory=lambda: float(env("AGENT_HUB_GIT_NETWORK_TIMEOUT", "600"))
+    )
+    git_max_processes: int = Field(
+        default_factory=lambda: int(env("AGENT_HUB_GIT_MAX_PROCESSES", "8"))
+    )
+    worker_max_jobs: int = Field(
+        default_factory=lambda: int(env("AGENT_HUB_WORKER_MAX_JOBS", "4"))
+    )
+    snippet_max_file_bytes: int = Field(
+        default_factory=lambda: int(env("AGENT_HUB_SNIPPET_MAX_FILE_BYTES", "262144"))
+    )
+    snippet_token_budget: int = Field(
+        default_factory=lambda: int(env("AGENT_HUB_SNIPPET_TOKEN_BUDGET", "6000"))
+    )
+    blob_cache_mb: int = Field(
+        default_factory=lambda: int(env("AGENT_HUB_BLOB_CACHE_MB", "64"))
+    )
+    retrieval: str = Field(
+        default_factory=lambda: env("AGENT_HUB_RETRIEVAL", "bm25")
+    )
+    index_cache_dir: str = Field(
+        default_factory=lambda: env("AGENT_HUB_INDEX_CACHE_DIR", "./agent_hub_index")
+    )
+    symbol_workers: int = Field(
+        default_factory=lambda: int(env("AGENT_HUB_SYMBOL_WORKERS", "2"))
+    )
+    repo_cache_dir: str = Field(
+        default_factory=lambda: env("AGENT_HUB_REPO_CACHE_DIR", "./agent_hub_repos")
+    )
+    repo_cache_max_mb: int = Field(
+        default_factory=lambda: int(env("AGENT_HUB_REPO_CACHE_MAX_MB", "5120"))
+    )
+    patch_candidates: int = Field(
+        default_factory=lambda: int(env("AGENT_HUB_PATCH_CANDIDATES", "1"))
+    )
+    hunk_retry_rounds: int = Field(
+        default_factory=lambda: int(env("AGENT_HUB_HUNK_RETRY_ROUNDS", "2"))
+    )
+    edit_format: str = Field(
+        default_factory=lambda: env("AGENT_HUB_EDIT_FORMAT", "diff")
+    )
+    edit_formats: list[str] = Field(
+        default_factory=lambda: env_list("AGENT_HUB_EDIT_FORMATS", [])
+    )
+    event_log_batch: int = Field(
+        default_factory=lambda: int(env("AGENT_HUB_EVENT_LOG_BATCH", "50"))
+    )
+    event_log_flush_interval: float = Field(
+        default_factory=lambda: float(env("AGENT_HUB_EVENT_LOG_FLUSH_INTERVAL", "1.0"))
+    )
+    patch_temperatures: list[float] = Field(
+        default_factory=lambda: [
+            float(value)
+            for value in env_list("AGENT_HUB_PATCH_TEMPERATURES", ["0.2", "0.6", "1.0"])
+        ]
+    )
 
 
 settings = Settings()
@@ -54,3 +54,11 @@ class EventLog(Base):
     created_at: Mapped[datetime] = mapped_column(default=datetime.utcnow)
 
     run: Mapped["Run"] = relationship(back_populates="logs", lazy="selectin")
+
+
+class InstallationRepo(Base):
+    __tablename__ = "installation_repos"
+
+    full_name: Mapped[str] = mapped_column(String(256), primary_key=True)
+    installation_id: Mapped[int] = mapped_column()
+    created_at: Mapped[datetime] = mapped_column(default=datetime.utcnow)
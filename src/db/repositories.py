@@ -1,11 +1,12 @@
 from __future__ import annotations
 
+import json
 from typing import Optional
 
-from sqlalchemy import select
+from sqlalchemy import insert, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from db.models import EventLog, Iteration, Run
+from db.models import EventLog, InstallationRepo, Iteration, Run
 
 
 async def create_run(session: AsyncSession, run: Run) -> Run:
@@ -43,6 +44,38 @@ async def add_log(session: AsyncSession, log: EventLog) -> EventLog:
     return log
 
 
+async def add_logs(session: AsyncSession, logs: list[EventLog]) -> None:
+    """Insert ``logs`` in one round-trip, without committing.
+
+    asyncpg gets a ``COPY``; other drivers an ``executemany`` that SQLAlchemy
+    sends as a single multi-row ``INSERT``.
+    """
+    if not logs:
+        return
+    columns = ("id", "run_id", "message", "kind", "payload", "created_at")
+    connection = await session.connection()
+    if connection.dialect.driver == "asyncpg":
+        # COPY sends json columns as text.
+        records = [
+            (
+                log.id,
+                log.run_id,
+                log.message,
+                log.kind,
+                json.dumps(log.payload),
+                log.created_at,
+            )
+            for log in logs
+        ]
+        raw = await connection.get_raw_connection()
+        await raw.driver_connection.copy_records_to_table(
+            EventLog.__tablename__, columns=columns, records=records
+        )
+        return
+    rows = [{column: getattr(log, column) for column in columns} for log in logs]
+    await session.execute(insert(EventLog), rows)
+
+
 async def add_iteration(session: AsyncSession, iteration: Iteration) -> Iteration:
     session.add(iteration)
     await session.commit()
@@ -55,3 +88,33 @@ async def list_iterations(session: AsyncSession, run_id: str) -> list[Iteration]
         select(Iteration).where(Iteration.run_id == run_id).order_by(Iteration.index)
     )
     return list(result.scalars().all())
+
+
+async def upsert_installation_repo(
+    session: AsyncSession, installation_id: int, owner: str, repo: str
+) -> InstallationRepo:
+    full_name = f"{owner}/{repo}".lower()
+    record = await session.get(InstallationRepo, full_name)
+    if record is None:
+        record = InstallationRepo(full_name=full_name, installation_id=installation_id)
+        session.add(record)
+    else:
+        record.installation_id = installation_id
+    await session.commit()
+    return record
+
+
+async def remove_installation_repo(
+    session: AsyncSession, owner: str, repo: str
+) -> None:
+    record = await session.get(InstallationRepo, f"{owner}/{repo}".lower())
+    if record is not None:
+        await session.delete(record)
+        await session.commit()
+
+
+async def get_installation_id(
+    session: AsyncSession, owner: str, repo: str
+) -> Optional[int]:
+    record = await session.get(InstallationRepo, f"{owner}/{repo}".lower())
+    return record.installation_id if record else None
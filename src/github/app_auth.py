@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+
+import httpx
+import jwt
+
+from config import settings
+from github.http import create_http_client
+
+
+@dataclass(slots=True)
+class InstallationToken:
+    token: str
+    expires_at: float
+
+
+def build_app_jwt(app_id: str, private_key: str, now: float | None = None) -> str:
+    issued = int(now if now is not None else time.time())
+    payload = {"iat": issued - 60, "exp": issued + 540, "iss": app_id}
+    return jwt.encode(payload, private_key, algorithm="RS256")
+
+
+def parse_expiry(value: str) -> float:
+    return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+
+
+@dataclass(slots=True)
+class InstallationTokenProvider:
+    """Mints GitHub App installation tokens and refreshes them before expiry."""
+
+    app_id: str
+    private_key: str
+    http: httpx.AsyncClient | None = None
+    refresh_margin: float = 300.0
+    _tokens: dict[int, InstallationToken] = field(default_factory=dict)
+    _locks: dict[int, asyncio.Lock] = field(default_factory=dict)
+
+    def _app_headers(self) -> dict[str, str]:
+        return {
+            "Authorization": f"Bearer {build_app_jwt(self.app_id, self.private_key)}",
+            "Accept": "application/vnd.github+json",
+        }
+
+    async def _send(self, method: str, url: str) -> httpx.Response:
+        if self.http is not None:
+            response = await self.http.request(method, url, headers=self._app_headers())
+        else:
+            async with create_http_client() as client:
+                response = await client.request(
+                    method, url, headers=self._app_headers()
+                )
+        response.raise_for_status()
+        return response
+
+    async def token_for_installation(self, installation_id: int) -> str:
+        cached = self._tokens.get(installation_id)
+        if cached and cached.expires_at - self.refresh_margin > time.time():
+            return cached.token
+        lock = self._locks.setdefault(installation_id, asyncio.Lock())
+        async with lock:
+            cached = self._tokens.get(installation_id)
+            if cached and cached.expires_at - self.refresh_margin > time.time():
+                return cached.token
+            response = await self._send(
+                "POST", f"/app/installations/{installation_id}/access_tokens"
+            )
+            data = response.json()
+            token = InstallationToken(data["token"], parse_expiry(data["expires_at"]))
+            self._tokens[installation_id] = token
+            return token.token
+
+    async def installation_for_repo(self, owner: str, repo: str) -> int:
+        response = await self._send("GET", f"/repos/{owner}/{repo}/installation")
+        return int(response.json()["id"])
+
+
+def app_private_key() -> str:
+    if settings.github_app_private_key_path:
+        return Path(settings.github_app_private_key_path).read_text(encoding="utf-8")
+    return settings.github_app_private_key.replace("\\n", "\n")
+
+
+def app_token_provider(
+    http: httpx.AsyncClient | None = None,
+) -> InstallationTokenProvider | None:
+    if not settings.github_app_id:
+        return None
+    private_key = app_private_key()
+    if not private_key:
+        return None
+    return InstallationTokenProvider(
+        app_id=settings.github_app_id,
+        private_key=private_key,
+        http=http,
+        refresh_margin=settings.github_app_token_refresh_margin,
+    )
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import hashlib
+import json
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from typing import Any
+
+from setup_logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+@dataclass(slots=True)
+class CachedResponse:
+    etag: str
+    last_modified: str
+    body: Any
+
+
+@dataclass(slots=True)
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    redis_hits: int = 0
+    evictions: int = 0
+
+    def as_dict(self) -> dict[str, int]:
+        return asdict(self)
+
+
+def cache_key(token: str, url: str, params: dict | None = None) -> str:
+    scope = hashlib.sha256(token.encode("utf-8")).hexdigest()[:16]
+    query = json.dumps(params or {}, sort_keys=True)
+    return f"{scope}:{url}:{query}"
+
+
+@dataclass(slots=True)
+class ResponseCache:
+    """Conditional-request cache: bounded LRU in memory, optional Redis tier."""
+
+    max_entries: int = 512
+    redis: Any | None = None
+    redis_ttl: int = 3600
+    prefix: str = "agent_hub:github:etag:"
+    stats: CacheStats = field(default_factory=CacheStats)
+    _entries: OrderedDict[str, CachedResponse] = field(default_factory=OrderedDict)
+
+    async def get(self, key: str) -> CachedResponse | None:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            return entry
+        if self.redis is None:
+            return None
+        try:
+            raw = await self.redis.get(self.prefix + key)
+        except Exception:
+            logger.warning("GitHub cache: redis read failed", exc_info=True)
+            return None
+        if not raw:
+            return None
+        data = json.loads(raw)
+        entry = CachedResponse(data["etag"], data["last_modified"], data["body"])
+        self.stats.redis_hits += 1
+        self._remember(key, entry)
+        return entry
+
+    async def put(self, key: str, entry: CachedResponse) -> None:
+        self._remember(key, entry)
+        if self.redis is None:
+            return
+        try:
+            await self.redis.set(
+                self.prefix + key, json.dumps(asdict(entry)), ex=self.redis_ttl
+            )
+        except Exception:
+            logger.warning("GitHub cache: redis write failed", exc_info=True)
+
+    def _remember(self, key: str, entry: CachedResponse) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats.evictions += 1
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -1,16 +1,50 @@
 from __future__ import annotations
 
+import asyncio
+import contextlib
+from collections.abc import AsyncGenerator
 from dataclasses import dataclass
+from typing import Any
 
 import httpx
 
+from config import settings
+from github.cache import CachedResponse, ResponseCache, cache_key
+from github.graphql import (
+    ISSUE_CONTEXT_QUERY,
+    REVIEW_CONTEXT_QUERY,
+    REVIEW_FILES_QUERY,
+    GraphQLError,
+    graphql_url,
+    parse_issue_context,
+    parse_review_context,
+    review_files,
+    split_diff_by_file,
+    unwrap,
+)
+from github.http import create_http_client
+from github.models import IssueContext, ReviewContext
 from github.permissions_policy import PermissionsPolicy, assert_can_push
+from github.rate_limit import (
+    MUTATING_METHODS,
+    RateLimitRegistry,
+    RateLimitScheduler,
+    is_rate_limited,
+)
+from setup_logger import setup_logger
+
+logger = setup_logger(__name__)
 
 
 @dataclass(slots=True)
 class GitHubClient:
     token: str
     policy: PermissionsPolicy
+    http: httpx.AsyncClient | None = None
+    cache: ResponseCache | None = None
+    limits: RateLimitRegistry | None = None
+    max_rate_limit_retries: int = 2
+    max_diff_bytes: int = 5 * 1024 * 1024
 
     def _headers(self) -> dict[str, str]:
         return {
@@ -18,61 +52,238 @@ class GitHubClient:
             "Accept": "application/vnd.github+json",
         }
 
-    async def get_repo(self, owner: str, repo: str) -> dict:
-        url = f"https://api.github.com/repos/{owner}/{repo}"
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, headers=self._headers())
+    async def _request(
+        self, method: str, url: str, mutating: bool | None = None, **kwargs: Any
+    ) -> httpx.Response:
+        if self.limits is None:
+            return await self._send(method, url, **kwargs)
+        scheduler = self.limits.for_token(self.token)
+        if mutating is None:
+            mutating = method.upper() in MUTATING_METHODS
+        for attempt in range(self.max_rate_limit_retries + 1):
+            response = await self._scheduled(scheduler, mutating, method, url, **kwargs)
+            if not is_rate_limited(response) or attempt == self.max_rate_limit_retries:
+                return response
+        return response
+
+    async def _scheduled(
+        self,
+        scheduler: RateLimitScheduler,
+        mutating: bool,
+        method: str,
+        url: str,
+        **kwargs: Any,
+    ) -> httpx.Response:
+        await scheduler.acquire(mutating=mutating)
+        if mutating:
+            async with scheduler.mutation():
+                response = await self._send(method, url, **kwargs)
+        else:
+            response = await self._send(method, url, **kwargs)
+        await scheduler.update(response)
+        return response
+
+    async def _send(self, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        headers = {**self._headers(), **kwargs.pop("headers", {})}
+        if self.http is not None:
+            return await self.http.request(method, url, headers=headers, **kwargs)
+        async with create_http_client() as client:
+            return await client.request(method, url, headers=headers, **kwargs)
+
+    async def _get_json(self, url: str, params: dict | None = None) -> Any:
+        if self.cache is None:
+            response = await self._request("GET", url, params=params)
             response.raise_for_status()
             return response.json()
+        key = cache_key(self.token, url, params)
+        entry = await self.cache.get(key)
+        headers = {}
+        if entry and entry.etag:
+            headers["If-None-Match"] = entry.etag
+        elif entry and entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+        response = await self._request("GET", url, params=params, headers=headers)
+        if response.status_code == 304 and entry is not None:
+            self.cache.stats.hits += 1
+            return entry.body
+        self.cache.stats.misses += 1
+        response.raise_for_status()
+        body = response.json()
+        etag = response.headers.get("ETag", "")
+        last_modified = response.headers.get("Last-Modified", "")
+        if etag or last_modified:
+            await self.cache.put(key, CachedResponse(etag, last_modified, body))
+        return body
 
-    async def get_issue(self, owner: str, repo: str, number: int) -> dict:
-        url = f"https://api.github.com/repos/{owner}/{repo}/issues/{number}"
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, headers=self._headers())
+    async def graphql(self, query: str, variables: dict[str, Any]) -> dict:
+        api_url = str(self.http.base_url) if self.http else settings.github_api_url
+        response = await self._request(
+            "POST",
+            graphql_url(api_url),
+            mutating=False,
+            json={"query": query, "variables": variables},
+        )
+        response.raise_for_status()
+        return unwrap(response.json())
+
+    async def fetch_issue_context(
+        self, owner: str, repo: str, number: int
+    ) -> IssueContext:
+        variables = {"owner": owner, "repo": repo, "number": number}
+        try:
+            data = await self.graphql(ISSUE_CONTEXT_QUERY, variables)
+            return parse_issue_context(data)
+        except (httpx.HTTPError, GraphQLError, KeyError) as exc:
+            logger.warning("GraphQL issue context failed, using REST: %s", exc)
+        issue = await self.get_issue(owner, repo, number)
+        repo_info = await self.get_repo(owner, repo)
+        default_branch = repo_info.get("default_branch", "main")
+        branch_url = f"/repos/{owner}/{repo}/branches/{default_branch}"
+        branch = await self._get_json(branch_url)
+        return IssueContext(
+            number=number,
+            title=issue.get("title") or "",
+            body=issue.get("body") or "",
+            labels=[label.get("name", "") for label in issue.get("labels", [])],
+            comments=[],
+            default_branch=default_branch,
+            head_sha=branch.get("commit", {}).get("sha", ""),
+        )
+
+    async def fetch_review_context(
+        self, owner: str, repo: str, number: int, with_patches: bool = True
+    ) -> ReviewContext:
+        """PR, linked issue and, ``with_patches``, every changed file and its patch."""
+        variables = {"owner": owner, "repo": repo, "number": number}
+        try:
+            data = await self.graphql(
+                REVIEW_CONTEXT_QUERY, {**variables, "files": with_patches}
+            )
+            files = review_files(data)
+            while with_patches and (files.get("pageInfo") or {}).get("hasNextPage"):
+                cursor = {"after": files["pageInfo"]["endCursor"]}
+                page = review_files(
+                    await self.graphql(REVIEW_FILES_QUERY, {**variables, **cursor})
+                )
+                files["nodes"] += page["nodes"]
+                files["pageInfo"] = page.get("pageInfo")
+            patches = (
+                await self.get_pull_diff(owner, repo, number) if with_patches else {}
+            )
+            return parse_review_context(data, owner, repo, patches)
+        except (httpx.HTTPError, GraphQLError, KeyError) as exc:
+            logger.warning("GraphQL review context failed, using REST: %s", exc)
+        pr = await self.get_pull_request(owner, repo, number)
+        files = await self.list_pull_files(owner, repo, number) if with_patches else []
+        return ReviewContext(
+            number=number,
+            title=pr.get("title") or "",
+            body=pr.get("body") or "",
+            url=pr.get("url", ""),
+            comments_url=pr.get("comments_url", ""),
+            base_repo_url=pr.get("base", {}).get("repo", {}).get("html_url", ""),
+            head_sha=pr.get("head", {}).get("sha", ""),
+            files=files,
+        )
+
+    async def get_pull_diff(self, owner: str, repo: str, number: int) -> dict[str, str]:
+        """Per-file patches of the PR diff, streaming at most ``max_diff_bytes``.
+
+        A file cut off by the limit is left out rather than half included.
+        """
+        url = f"/repos/{owner}/{repo}/pulls/{number}"
+        headers = {**self._headers(), "Accept": "application/vnd.github.diff"}
+        chunks: list[bytes] = []
+        size = 0
+        truncated = False
+        async with contextlib.AsyncExitStack() as stack:
+            client = self.http or await stack.enter_async_context(create_http_client())
+            scheduler = self.limits.for_token(self.token) if self.limits else None
+            if scheduler is not None:
+                await scheduler.acquire(mutating=False)
+            response = await stack.enter_async_context(
+                client.stream("GET", url, headers=headers)
+            )
+            if scheduler is not None:
+                await scheduler.update(response)
             response.raise_for_status()
-            return response.json()
+            async for chunk in response.aiter_bytes():
+                chunks.append(chunk)
+                size += len(chunk)
+                if size > self.max_diff_bytes:
+                    truncated = True
+                    break
+        text = b"".join(chunks)[: self.max_diff_bytes].decode("utf-8", "replace")
+        patches = split_diff_by_file(text)
+        if truncated and patches:
+            patches.popitem()
+        return patches
+
+    async def get_repo(self, owner: str, repo: str) -> dict:
+        return await self._get_json(f"/repos/{owner}/{repo}")
+
+    async def get_issue(self, owner: str, repo: str, number: int) -> dict:
+        return await self._get_json(f"/repos/{owner}/{repo}/issues/{number}")
 
     async def create_pull_request(
         self, owner: str, repo: str, title: str, head: str, base: str, body: str
     ) -> dict:
-        url = f"https://api.github.com/repos/{owner}/{repo}/pulls"
+        url = f"/repos/{owner}/{repo}/pulls"
         payload = {"title": title, "head": head, "base": base, "body": body}
-        async with httpx.AsyncClient() as client:
-            response = await client.post(url, headers=self._headers(), json=payload)
-            response.raise_for_status()
-            return response.json()
+        response = await self._request("POST", url, json=payload)
+        response.raise_for_status()
+        return response.json()
 
     async def get_pull_request(self, owner: str, repo: str, number: int) -> dict:
-        url = f"https://api.github.com/repos/{owner}/{repo}/pulls/{number}"
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, headers=self._headers())
-            response.raise_for_status()
-            return response.json()
+        return await self._get_json(f"/repos/{owner}/{repo}/pulls/{number}")
 
     async def list_pull_files(self, owner: str, repo: str, number: int) -> list[dict]:
-        url = f"https://api.github.com/repos/{owner}/{repo}/pulls/{number}/files"
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, headers=self._headers(), params={"per_page": 100})
-            response.raise_for_status()
-            return response.json()
+        return [file async for file in self.iter_pull_files(owner, repo, number)]
+
+    async def iter_pull_files(
+        self, owner: str, repo: str, number: int, per_page: int = 100
+    ) -> AsyncGenerator[dict, None]:
+        """Yield PR files page by page, fetching the next page in the background.
+
+        At most one page is buffered ahead; closing the iterator early cancels
+        the pending fetch, so consumers can stop once their budget is spent.
+        """
+        url = f"/repos/{owner}/{repo}/pulls/{number}/files"
+        pending: asyncio.Task | None = asyncio.create_task(
+            self._get_page(url, {"per_page": per_page})
+        )
+        try:
+            while pending is not None:
+                files, next_url = await pending
+                pending = (
+                    asyncio.create_task(self._get_page(next_url, None))
+                    if next_url
+                    else None
+                )
+                for file in files:
+                    yield file
+        finally:
+            if pending is not None:
+                pending.cancel()
+                with contextlib.suppress(asyncio.CancelledError, httpx.HTTPError):
+                    await pending
+
+    async def _get_page(
+        self, url: str, params: dict | None
+    ) -> tuple[list[dict], str | None]:
+        response = await self._request("GET", url, params=params)
+        response.raise_for_status()
+        return response.json(), response.links.get("next", {}).get("url")
 
     async def create_comment(self, url: str, body: str) -> None:
-        async with httpx.AsyncClient() as client:
-            await client.post(url, headers=self._headers(), json={"body": body})
+        await self._request("POST", url, json={"body": body})
 
     async def create_review(self, url: str, body: str, event: str) -> None:
-        async with httpx.AsyncClient() as client:
-            await client.post(
-                url,
-                headers=self._headers(),
-                json={"body": body, "event": event},
-            )
+        await self._request("POST", url, json={"body": body, "event": event})
 
     async def push_branch(self, url: str, payload: dict[str, str]) -> None:
         assert_can_push(self.policy)
-        async with httpx.AsyncClient() as client:
-            await client.post(url, headers=self._headers(), json=payload)
+        await self._request("POST", url, json=payload)
 
     async def set_status_label(self, url: str, label: str) -> None:
-        async with httpx.AsyncClient() as client:
-            await client.post(url, headers=self._headers(), json={"labels": [label]})
+        await self._request("POST", url, json={"labels": [label]})
@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+from github.models import IssueContext, ReviewContext
+
+
+class GraphQLError(RuntimeError):
+    pass
+
+
+ISSUE_CONTEXT_QUERY = """
+query($owner: String!, $repo: String!, $number: Int!) {
+  repository(owner: $owner, name: $repo) {
+    defaultBranchRef { name target { oid } }
+    issue(number: $number) {
+      number
+      title
+      body
+      labels(first: 20) { nodes { name } }
+      comments(last: 20) { nodes { body } }
+    }
+  }
+}
+"""
+
+REVIEW_CONTEXT_QUERY = """
+query(
+  $owner: String!, $repo: String!, $number: Int!, $after: String, $files: Boolean!
+) {
+  repository(owner: $owner, name: $repo) {
+    pullRequest(number: $number) {
+      number
+      title
+      body
+      headRefOid
+      baseRepository { url }
+      files(first: 100, after: $after) @include(if: $files) {
+        pageInfo { hasNextPage endCursor }
+        nodes { path additions deletions changeType }
+      }
+      closingIssuesReferences(first: 1) { nodes { number title body } }
+    }
+  }
+}
+"""
+
+REVIEW_FILES_QUERY = """
+query($owner: String!, $repo: String!, $number: Int!, $after: String) {
+  repository(owner: $owner, name: $repo) {
+    pullRequest(number: $number) {
+      files(first: 100, after: $after) {
+        pageInfo { hasNextPage endCursor }
+        nodes { path additions deletions changeType }
+      }
+    }
+  }
+}
+"""
+
+
+def graphql_url(api_url: str) -> str:
+    """GraphQL endpoint for a REST API base URL (``/api/graphql`` on GHES)."""
+    base = api_url.rstrip("/")
+    if base.endswith("/api/v3"):
+        return base.removesuffix("/v3") + "/graphql"
+    return base + "/graphql"
+
+
+def review_files(data: dict) -> dict:
+    """The ``files`` connection of a review context or files page."""
+    pull = (data.get("repository") or {}).get("pullRequest") or {}
+    return pull.get("files") or {"nodes": []}
+
+
+def unwrap(payload: dict) -> dict:
+    if payload.get("errors"):
+        messages = "; ".join(err.get("message", "") for err in payload["errors"])
+        raise GraphQLError(messages or "GraphQL query failed")
+    return payload.get("data") or {}
+
+
+def parse_issue_context(data: dict) -> IssueContext:
+    repository = data.get("repository") or {}
+    issue = repository.get("issue")
+    if not issue:
+        raise GraphQLError("issue not found")
+    branch = repository.get("defaultBranchRef") or {}
+    return IssueContext(
+        number=issue["number"],
+        title=issue.get("title") or "",
+        body=issue.get("body") or "",
+        labels=[node["name"] for node in issue["labels"]["nodes"]],
+        comments=[node.get("body") or "" for node in issue["comments"]["nodes"]],
+        default_branch=branch.get("name") or "main",
+        head_sha=(branch.get("target") or {}).get("oid") or "",
+    )
+
+
+def parse_review_context(
+    data: dict, owner: str, repo: str, patches: dict[str, str]
+) -> ReviewContext:
+    pull = (data.get("repository") or {}).get("pullRequest")
+    if not pull:
+        raise GraphQLError("pull request not found")
+    number = pull["number"]
+    files = [
+        {
+            "filename": node["path"],
+            "status": node.get("changeType", "").lower(),
+            "additions": node.get("additions", 0),
+            "deletions": node.get("deletions", 0),
+            "patch": patches.get(node["path"], ""),
+        }
+        for node in review_files(data)["nodes"]
+    ]
+    linked = pull["closingIssuesReferences"]["nodes"]
+    return ReviewContext(
+        number=number,
+        title=pull.get("title") or "",
+        body=pull.get("body") or "",
+        url=f"/repos/{owner}/{repo}/pulls/{number}",
+        comments_url=f"/repos/{owner}/{repo}/issues/{number}/comments",
+        base_repo_url=(pull.get("baseRepository") or {}).get("url", ""),
+        head_sha=pull.get("headRefOid") or "",
+        files=files,
+        linked_issue=linked[0] if linked else None,
+    )
+
+
+def split_diff_by_file(diff: str) -> dict[str, str]:
+    patches: dict[str, str] = {}
+    path = ""
+    body: list[str] = []
+    for line in diff.splitlines():
+        if line.startswith("diff --git "):
+            if path:
+                patches[path] = "\n".join(body)
+            path = line.rsplit(" b/", 1)[-1]
+            body = []
+            continue
+        if body or line.startswith("@@"):
+            body.append(line)
+    if path:
+        patches[path] = "\n".join(body)
+    return patches
@@ -0,0 +1,23 @@
+from __future__ import annotations
+
+import httpx
+
+from config import settings
+
+
+def create_http_client(
+    transport: httpx.AsyncBaseTransport | None = None,
+) -> httpx.AsyncClient:
+    limits = httpx.Limits(
+        max_connections=settings.github_max_connections,
+        max_keepalive_connections=settings.github_max_keepalive,
+        keepalive_expiry=settings.github_keepalive_expiry,
+    )
+    timeout = httpx.Timeout(settings.github_timeout, connect=5.0)
+    return httpx.AsyncClient(
+        base_url=settings.github_api_url,
+        http2=transport is None and settings.github_http2,
+        limits=limits,
+        timeout=timeout,
+        transport=transport,
+    )
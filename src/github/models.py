@@ -15,3 +15,47 @@ class PullRequestEvent:
     action: str
     pr_number: int
     repo_full_name: str
+
+
+@dataclass(slots=True)
+class IssueContext:
+    number: int
+    title: str
+    body: str
+    labels: list[str]
+    comments: list[str]
+    default_branch: str
+    head_sha: str
+
+    def as_issue(self) -> dict:
+        return {
+            "number": self.number,
+            "title": self.title,
+            "body": self.body,
+            "labels": [{"name": label} for label in self.labels],
+            "comments": self.comments,
+        }
+
+
+@dataclass(slots=True)
+class ReviewContext:
+    number: int
+    title: str
+    body: str
+    url: str
+    comments_url: str
+    base_repo_url: str
+    head_sha: str
+    files: list[dict]
+    linked_issue: dict | None = None
+
+    def as_pull(self) -> dict:
+        return {
+            "number": self.number,
+            "title": self.title,
+            "body": self.body,
+            "url": self.url,
+            "comments_url": self.comments_url,
+            "head": {"sha": self.head_sha},
+            "base": {"repo": {"html_url": self.base_repo_url}},
+        }
@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import time
+from collections.abc import AsyncIterator, Callable
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any
+
+import httpx
+
+from setup_logger import setup_logger
+
+logger = setup_logger(__name__)
+
+MUTATING_METHODS = {"POST", "PATCH", "PUT", "DELETE"}
+
+
+class RateLimitExceeded(RuntimeError):
+    pass
+
+
+@dataclass(slots=True)
+class TokenBucket:
+    limit: int = 5000
+    remaining: int = 5000
+    reset_at: float = 0.0
+    blocked_until: float = 0.0
+
+    def refill(self, now: float) -> None:
+        if self.reset_at and now >= self.reset_at:
+            self.remaining = self.limit
+            self.reset_at = 0.0
+
+
+@dataclass(slots=True)
+class RateLimitScheduler:
+    """Per-token view of GitHub's primary and secondary rate limits."""
+
+    scope: str
+    reserve: int = 50
+    mutation_interval: float = 1.0
+    max_wait: float = 60.0
+    redis: Any | None = None
+    clock: Callable[[], float] = time.time
+    bucket: TokenBucket = field(default_factory=TokenBucket)
+    _mutation_lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    _last_mutation: float = 0.0
+
+    @property
+    def redis_key(self) -> str:
+        return f"agent_hub:github:ratelimit:{self.scope}"
+
+    def wait_time(self, mutating: bool, now: float) -> float:
+        self.bucket.refill(now)
+        if now < self.bucket.blocked_until:
+            return self.bucket.blocked_until - now
+        floor = 0 if mutating else self.reserve
+        if self.bucket.remaining <= floor and self.bucket.reset_at > now:
+            return self.bucket.reset_at - now
+        return 0.0
+
+    async def acquire(
+        self, mutating: bool = False, deadline: float | None = None
+    ) -> None:
+        if deadline is None:
+            deadline = self.clock() + self.max_wait
+        while True:
+            await self._pull_shared()
+            now = self.clock()
+            wait = self.wait_time(mutating, now)
+            if wait <= 0:
+                break
+            if now + wait > deadline:
+                raise RateLimitExceeded(
+                    f"GitHub quota exhausted for {wait:.0f}s, past the request deadline"
+                )
+            logger.info("GitHub rate limit: waiting %.1fs", wait)
+            await asyncio.sleep(wait)
+        self.bucket.remaining -= 1
+        await self._spend_shared()
+
+    @asynccontextmanager
+    async def mutation(self) -> AsyncIterator[None]:
+        async with self._mutation_lock:
+            gap = self._last_mutation + self.mutation_interval - self.clock()
+            if gap > 0:
+                await asyncio.sleep(gap)
+            try:
+                yield
+            finally:
+                self._last_mutation = self.clock()
+
+    async def update(self, response: httpx.Response) -> None:
+        headers = response.headers
+        now = self.clock()
+        if "X-RateLimit-Limit" in headers:
+            self.bucket.limit = int(headers["X-RateLimit-Limit"])
+        if "X-RateLimit-Remaining" in headers:
+            self.bucket.remaining = int(headers["X-RateLimit-Remaining"])
+        if "X-RateLimit-Reset" in headers:
+            self.bucket.reset_at = float(headers["X-RateLimit-Reset"])
+        if is_rate_limited(response):
+            retry_after = headers.get("Retry-After")
+            if retry_after is not None:
+                until = now + float(retry_after)
+            elif self.bucket.remaining == 0 and self.bucket.reset_at:
+                until = self.bucket.reset_at
+            else:
+                until = now + 60.0
+            self.bucket.blocked_until = max(self.bucket.blocked_until, until)
+        await self._push_shared()
+
+    async def _pull_shared(self) -> None:
+        if self.redis is None:
+            return
+        try:
+            data = await self.redis.hgetall(self.redis_key)
+        except Exception:
+            logger.warning("GitHub rate limit: redis read failed", exc_info=True)
+            return
+        if not data:
+            return
+        values = {_text(key): float(value) for key, value in data.items()}
+        self.bucket.remaining = int(values.get("remaining", self.bucket.remaining))
+        self.bucket.reset_at = max(self.bucket.reset_at, values.get("reset_at", 0.0))
+        self.bucket.blocked_until = max(
+            self.bucket.blocked_until, values.get("blocked_until", 0.0)
+        )
+
+    async def _spend_shared(self) -> None:
+        if self.redis is None:
+            return
+        try:
+            await self.redis.hincrby(self.redis_key, "remaining", -1)
+        except Exception:
+            logger.warning("GitHub rate limit: redis write failed", exc_info=True)
+
+    async def _push_shared(self) -> None:
+        if self.redis is None:
+            return
+        mapping = {
+            "remaining": self.bucket.remaining,
+            "reset_at": self.bucket.reset_at,
+            "blocked_until": self.bucket.blocked_until,
+        }
+        expire_at = int(max(self.bucket.reset_at, self.bucket.blocked_until)) + 60
+        try:
+            await self.redis.hset(self.redis_key, mapping=mapping)
+            await self.redis.expireat(self.redis_key, expire_at)
+        except Exception:
+            logger.warning("GitHub rate limit: redis write failed", exc_info=True)
+
+
+@dataclass(slots=True)
+class RateLimitRegistry:
+    reserve: int = 50
+    mutation_interval: float = 1.0
+    max_wait: float = 60.0
+    redis: Any | None = None
+    _schedulers: dict[str, RateLimitScheduler] = field(default_factory=dict)
+
+    def for_token(self, token: str) -> RateLimitScheduler:
+        scope = hashlib.sha256(token.encode("utf-8")).hexdigest()[:16]
+        scheduler = self._schedulers.get(scope)
+        if scheduler is None:
+            scheduler = RateLimitScheduler(
+                scope=scope,
+                reserve=self.reserve,
+                mutation_interval=self.mutation_interval,
+                max_wait=self.max_wait,
+                redis=self.redis,
+            )
+            self._schedulers[scope] = scheduler
+        return scheduler
+
+
+def is_rate_limited(response: httpx.Response) -> bool:
+    if response.status_code == 429:
+        return True
+    if response.status_code != 403:
+        return False
+    return (
+        "Retry-After" in response.headers
+        or response.headers.get("X-RateLimit-Remaining") == "0"
+    )
+
+
+def _text(value: bytes | str) -> str:
+    return value.decode("utf-8") if isinstance(value, bytes) else value
@@ -5,6 +5,8 @@ from collections.abc import AsyncIterator
 from fastapi import Request
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from config import settings
+from services.installations_service import InstallationsService
 from services.orchestrator import Orchestrator
 from services.runs_service import RunsService
 from services.webhook_service import WebhookService
@@ -16,6 +18,13 @@ async def get_session(request: Request) -> AsyncIterator[AsyncSession]:
         yield session
 
 
+def get_installations_service(request: Request) -> InstallationsService:
+    return InstallationsService(
+        provider=getattr(request.app.state, "github_tokens", None),
+        fallback_token=settings.github_token,
+    )
+
+
 def get_orchestrator() -> Orchestrator:
     return Orchestrator()
 
@@ -3,15 +3,20 @@ from __future__ import annotations
 import asyncio
 import json
 import os
+from collections.abc import AsyncGenerator
 from pathlib import Path
 import re
 
 import httpx
 
 from config import settings
+from github.app_auth import app_token_provider
 from github.client import GitHubClient
+from github.http import create_http_client
+from github.rate_limit import RateLimitRegistry
 from github.permissions_policy import REVIEW_POLICY
 from llm.openrouter import OpenRouterClient
+from llm.packing import Section, pack, prompt_budget
 
 
 def parse_repo(repo_full: str) -> tuple[str, str]:
@@ -39,36 +44,96 @@ def extract_issue_number(text: str) -> int:
     return 0
 
 
-def build_prompt(pr: dict, files: list[dict], ci_summary: str) -> str:
-    patches = []
-    for file in files:
+async def collect_files(
+    files: AsyncGenerator[dict, None],
+    max_files: int,
+    max_chars: int,
+    max_file_chars: int,
+) -> list[dict]:
+    collected: list[dict] = []
+    used = 0
+    try:
+        async for file in files:
+            patch = (file.get("patch") or "")[: min(max_file_chars, max_chars - used)]
+            collected.append({**file, "patch": patch})
+            used += len(patch)
+            if len(collected) >= max_files or used >= max_chars:
+                break
+    finally:
+        await files.aclose()
+    return collected
+
+
+def build_prompt(
+    pr: dict,
+    files: list[dict],
+    ci_summary: str,
+    issue: dict | None = None,
+    budget: int | None = None,
+) -> str:
+    issue_block = ""
+    if issue:
+        issue_block = (
+            f"Linked issue #{issue.get('number', '')}: {issue.get('title', '')}\n"
+            f"{issue.get('body', '')}\n\n"
+        )
+    sections = [
+        Section(
+            "instructions",
+            "You are a senior reviewer. "
+            "Analyze the PR against the issue requirements.\n"
+            "Return a JSON object with keys: "
+            "verdict (approve/comment/request_changes), "
+            "summary, issues (list), risks (list), required_changes (list).\n"
+            "Be concise.\n\n",
+            trim="keep",
+        ),
+        Section("issue", issue_block, priority=90, min_tokens=150),
+        Section(
+            "pr",
+            f"PR title: {pr.get('title','')}\nPR body:\n{pr.get('body','')}\n\n",
+            priority=80,
+            min_tokens=150,
+        ),
+        Section("ci", f"CI summary:\n{ci_summary}\n\n", priority=70, min_tokens=100),
+        Section("diffs_header", "Diffs:\n", trim="keep"),
+    ]
+    # Later files are trimmed first, but every file keeps the head of its patch.
+    for index, file in enumerate(files):
         filename = file.get("filename", "")
-        patch = file.get("patch", "")
-        if patch:
-            patch = patch[:1500]
-        patches.append(f"File: {filename}\n{patch}")
-    diff_block = "\n\n".join(patches[:20])
-    return (
-        "You are a senior reviewer. Analyze the PR against the issue requirements.\n"
-        "Return a JSON object with keys: verdict (approve/comment/request_changes), "
-        "summary, issues (list), risks (list), required_changes (list).\n"
-        "Be concise.\n\n"
-        f"PR title: {pr.get('title','')}\n"
-        f"PR body:\n{pr.get('body','')}\n\n"
-        f"CI summary:\n{ci_summary}\n\n"
-        f"Diffs:\n{diff_block}\n"
-    )
+        sections.append(
+            Section(
+                f"file:{filename}",
+                f"File: {filename}\n{file.get('patch') or ''}\n\n",
+                priority=-index,
+                min_tokens=60,
+            )
+        )
+    return pack(sections, budget or settings.prompt_token_cap).text
 
 
 async def main() -> None:
+    async with create_http_client() as http:
+        await review(http)
+
+
+async def review(http: httpx.AsyncClient) -> None:
     token = os.getenv("GITHUB_TOKEN", "")
     repo_full = os.getenv("GITHUB_REPOSITORY", "")
     pr_number = int(os.getenv("PR_NUMBER", "0") or "0")
+    owner, repo = parse_repo(repo_full)
+    provider = app_token_provider(http)
+    if provider is not None and owner and repo:
+        try:
+            installation_id = await provider.installation_for_repo(owner, repo)
+        except httpx.HTTPStatusError:
+            print(f"No GitHub App installation for {repo_full}, using GITHUB_TOKEN.")
+        else:
+            token = await provider.token_for_installation(installation_id)
     if not token or not repo_full or pr_number <= 0:
         print("Missing GITHUB_TOKEN, GITHUB_REPOSITORY or PR_NUMBER.")
         return
 
-    owner, repo = parse_repo(repo_full)
     if not owner or not repo:
         print("Invalid GITHUB_REPOSITORY format.")
         return
@@ -77,9 +142,26 @@ async def main() -> None:
         print("Missing AGENT_HUB_OPENROUTER_API_KEY.")
         return
 
-    github = GitHubClient(token=token, policy=REVIEW_POLICY)
-    pr = await github.get_pull_request(owner, repo, pr_number)
-    files = await github.list_pull_files(owner, repo, pr_number)
+    github = GitHubClient(
+        token=token,
+        policy=REVIEW_POLICY,
+        http=http,
+        limits=RateLimitRegistry(
+            reserve=settings.github_rate_reserve,
+            mutation_interval=settings.github_mutation_interval,
+            max_wait=settings.github_rate_max_wait,
+        ),
+    )
+    context = await github.fetch_review_context(
+        owner, repo, pr_number, with_patches=False
+    )
+    pr = context.as_pull()
+    files = await collect_files(
+        github.iter_pull_files(owner, repo, pr_number),
+        max_files=settings.review_max_files,
+        max_chars=settings.review_max_patch_chars,
+        max_file_chars=settings.review_max_file_chars,
+    )
 
     report_path = Path("report.md")
     ci_summary = (
@@ -88,11 +170,16 @@ async def main() -> None:
         else "CI summary not available in workspace."
     )
 
+    model = os.getenv("AGENT_HUB_REVIEW_MODEL", settings.openrouter_model)
     llm = OpenRouterClient(
         api_key=settings.openrouter_api_key,
-        model=os.getenv("AGENT_HUB_REVIEW_MODEL", settings.openrouter_model),
+        model=model,
+        first_token_timeout=settings.llm_first_token_timeout,
+        total_timeout=settings.llm_total_timeout,
+    )
+    prompt = build_prompt(
+        pr, files, ci_summary, context.linked_issue, prompt_budget(model)
     )
-    prompt = build_prompt(pr, files, ci_summary)
     response = await llm.complete(prompt, correlation_id=str(pr_number))
     verdict = extract_json(response.content) or {
         "verdict": "comment",
@@ -138,7 +225,10 @@ async def main() -> None:
 
     if verdict_label == "request_changes":
         agent_hub_url = os.getenv("AGENT_HUB_URL", "").rstrip("/")
-        issue_number = extract_issue_number(pr.get("body", "")) or pr_number
+        linked_number = (context.linked_issue or {}).get("number", 0)
+        issue_number = (
+            linked_number or extract_issue_number(pr.get("body", "")) or pr_number
+        )
         repo_url = pr.get("base", {}).get("repo", {}).get("html_url", "")
         if agent_hub_url and repo_url and issue_number > 0:
             async with httpx.AsyncClient(timeout=10) as client:
@@ -1,12 +1,23 @@
 from __future__ import annotations
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from internal.dependencies import get_installations_service, get_session
+from services.installations_service import InstallationsService
 
 router = APIRouter(prefix="/v1/installations", tags=["installations"])
 
 
 @router.post("/{installation_id}/repos/{owner}/{repo}/connect")
-async def connect_repo(installation_id: int, owner: str, repo: str) -> dict[str, str]:
+async def connect_repo(
+    installation_id: int,
+    owner: str,
+    repo: str,
+    session: AsyncSession = Depends(get_session),
+    service: InstallationsService = Depends(get_installations_service),
+) -> dict[str, str]:
+    await service.connect(session, installation_id, owner, repo)
     return {
         "installation_id": str(installation_id),
         "repo": f"{owner}/{repo}",
@@ -1,6 +1,8 @@
 from __future__ import annotations
 
-from fastapi import APIRouter
+from typing import Any
+
+from fastapi import APIRouter, Request
 
 from config import settings
 from internal.schemas.settings import LimitsSettingsRequest, ModelSettingsRequest
@@ -18,3 +20,13 @@ async def set_model(request: ModelSettingsRequest) -> dict[str, str]:
 async def set_limits(request: LimitsSettingsRequest) -> dict[str, int]:
     settings.default_max_iters = request.max_iters
     return {"max_iters": settings.default_max_iters}
+
+
+@router.get("/llm/limits")
+async def get_llm_limits(request: Request) -> list[dict[str, Any]]:
+    registry = getattr(request.app.state, "llm_limits", None)
+    if registry is None:
+        return []
+    for model in settings.available_models:
+        registry.for_model(model)
+    return await registry.snapshot()
@@ -6,11 +6,12 @@ from uuid import uuid4
 from fastapi import APIRouter, Depends, Header, HTTPException, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from internal.dependencies import get_session
+from internal.dependencies import get_installations_service, get_session
 from internal.schemas.runs import RunCreateRequest
 from db.models import EventLog
 from db.repositories import add_log
 from services.jobs import enqueue_run
+from services.installations_service import InstallationsService
 from services.runs_service import RunsService
 from services.webhook_service import WebhookService
 from config import settings
@@ -23,6 +24,7 @@ async def github_webhook(
     request: Request,
     x_hub_signature_256: str | None = Header(default=None),
     session: AsyncSession = Depends(get_session),
+    installations: InstallationsService = Depends(get_installations_service),
 ) -> dict[str, str]:
     payload = await request.body()
     service = WebhookService()
@@ -61,5 +63,7 @@ async def github_webhook(
         redis = request.app.state.redis
         if redis:
             await enqueue_run(redis, run.id)
+    if event in {"installation", "installation_repositories"}:
+        await installations.sync_from_webhook(session, data)
     await service.handle_event(event=event, payload=payload)
     return {"status": "ok"}
@@ -1,14 +1,21 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 
 @dataclass(slots=True)
 class LLMResponse:
     content: str
     model: str
+    usage: dict = field(default_factory=dict)
+    latency_ms: float = 0.0
+    ttft_ms: float | None = None
+    cached: bool = False
+    metadata: dict = field(default_factory=dict)
 
 
 class LLMClient:
-    async def complete(self, prompt: str) -> LLMResponse:
+    async def complete(
+        self, prompt: str, correlation_id: str | None = None
+    ) -> LLMResponse:
         raise NotImplementedError
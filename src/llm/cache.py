@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import sqlite3
+import time
+from collections import OrderedDict
+from contextlib import closing
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+from llm.base import LLMClient, LLMResponse
+
+
+def normalize_prompt(prompt: str) -> str:
+    lines = prompt.replace("\r\n", "\n").split("\n")
+    return "\n".join(line.rstrip() for line in lines).strip()
+
+
+def llm_cache_key(model: str, prompt: str, params: dict | None = None) -> str:
+    material = json.dumps(
+        {"model": model, "prompt": normalize_prompt(prompt), "params": params or {}},
+        sort_keys=True,
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+@dataclass(slots=True)
+class LLMCacheStats:
+    hits: int = 0
+    misses: int = 0
+    saved_tokens: int = 0
+
+    def as_dict(self) -> dict[str, int]:
+        return asdict(self)
+
+
+@dataclass(slots=True)
+class LLMResponseCache:
+    """In-process LRU in front of an optional SQLite tier, with TTL and size caps."""
+
+    path: str = ""
+    ttl: float = 86400.0
+    max_memory: int = 256
+    max_rows: int = 5000
+    stats: LLMCacheStats = field(default_factory=LLMCacheStats)
+    _memory: OrderedDict[str, tuple[float, LLMResponse]] = field(
+        default_factory=OrderedDict
+    )
+    _ready: bool = False
+
+    async def get(self, key: str) -> LLMResponse | None:
+        now = time.time()
+        item = self._memory.get(key)
+        if item is not None:
+            expires_at, response = item
+            if expires_at > now:
+                self._memory.move_to_end(key)
+                return response
+            del self._memory[key]
+        if not self.path:
+            return None
+        row = await asyncio.to_thread(self._db_get, key, now)
+        if row is None:
+            return None
+        expires_at, response = row
+        self._remember(key, expires_at, response)
+        return response
+
+    async def put(self, key: str, response: LLMResponse) -> None:
+        expires_at = time.time() + self.ttl
+        self._remember(key, expires_at, response)
+        if self.path:
+            await asyncio.to_thread(self._db_put, key, expires_at, response)
+
+    def _remember(self, key: str, expires_at: float, response: LLMResponse) -> None:
+        self._memory[key] = (expires_at, response)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory:
+            self._memory.popitem(last=False)
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self._ready:
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.path)
+        if not self._ready:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                "key TEXT PRIMARY KEY, model TEXT, content TEXT, usage TEXT, "
+                "expires_at REAL, last_used REAL)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS llm_cache_last_used "
+                "ON llm_cache (last_used)"
+            )
+            self._ready = True
+        return conn
+
+    def _db_get(self, key: str, now: float) -> tuple[float, LLMResponse] | None:
+        with closing(self._connect()) as conn, conn:
+            row = conn.execute(
+                "SELECT model, content, usage, expires_at FROM llm_cache "
+                "WHERE key = ? AND expires_at > ?",
+                (key, now),
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE llm_cache SET last_used = ? WHERE key = ?", (now, key))
+        model, content, usage, expires_at = row
+        response = LLMResponse(content=content, model=model, usage=json.loads(usage))
+        return expires_at, response
+
+    def _db_put(self, key: str, expires_at: float, response: LLMResponse) -> None:
+        now = time.time()
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_cache VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    key,
+                    response.model,
+                    response.content,
+                    json.dumps(response.usage),
+                    expires_at,
+                    now,
+                ),
+            )
+            conn.execute("DELETE FROM llm_cache WHERE expires_at <= ?", (now,))
+            conn.execute(
+                "DELETE FROM llm_cache WHERE key IN ("
+                "SELECT key FROM llm_cache ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_rows,),
+            )
+
+
+@dataclass(slots=True)
+class CachedLLMClient(LLMClient):
+    """Wraps an LLM client; ``cache=False`` opts a call out of the cache.
+
+    ``stats`` counts this wrapper's calls only; ``cache.stats`` is shared by
+    everything that uses the cache. Responses from another model than the
+    one the key names (a hedged backup that won) are not cached.
+    """
+
+    inner: LLMClient
+    cache: LLMResponseCache
+    stats: LLMCacheStats = field(default_factory=LLMCacheStats)
+
+    def key(self, prompt: str) -> str:
+        model = getattr(self.inner, "model", "")
+        params = getattr(self.inner, "params", {})
+        return llm_cache_key(model, prompt, params)
+
+    async def complete(
+        self, prompt: str, correlation_id: str | None = None, cache: bool = True
+    ) -> LLMResponse:
+        if not cache:
+            return await self.inner.complete(prompt, correlation_id=correlation_id)
+        key = self.key(prompt)
+        cached = await self.cache.get(key)
+        if cached is not None:
+            saved = int(cached.usage.get("total_tokens", 0))
+            for stats in (self.stats, self.cache.stats):
+                stats.hits += 1
+                stats.saved_tokens += saved
+            return LLMResponse(
+                content=cached.content,
+                model=cached.model,
+                usage=cached.usage,
+                cached=True,
+            )
+        self.stats.misses += 1
+        self.cache.stats.misses += 1
+        response = await self.inner.complete(prompt, correlation_id=correlation_id)
+        model = getattr(self.inner, "model", "")
+        if response.content.strip() and response.model == model:
+            await self.cache.put(key, response)
+        return response
@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from typing import Any
+
+from llm.base import LLMClient, LLMResponse
+from setup_logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+@dataclass(slots=True)
+class ModelHealth:
+    latencies_ms: deque[float] = field(default_factory=lambda: deque(maxlen=100))
+    consecutive_failures: int = 0
+    open_until: float = 0.0
+
+    def available(self, now: float) -> bool:
+        return now >= self.open_until
+
+    def percentile(self, fraction: float) -> float | None:
+        if len(self.latencies_ms) < 5:
+            return None
+        ordered = sorted(self.latencies_ms)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    def expected_remaining(self, elapsed_ms: float) -> float:
+        slower = [value for value in self.latencies_ms if value > elapsed_ms]
+        if not slower:
+            return 0.0
+        return sum(slower) / len(slower) - elapsed_ms
+
+
+@dataclass(slots=True)
+class ModelHealthRegistry:
+    """Latency history and circuit breakers per model, kept for the process."""
+
+    failure_threshold: int = 3
+    cooldown: float = 60.0
+    _models: dict[str, ModelHealth] = field(default_factory=dict)
+
+    def get(self, model: str) -> ModelHealth:
+        return self._models.setdefault(model, ModelHealth())
+
+    def record_success(self, model: str, latency_ms: float) -> None:
+        health = self.get(model)
+        health.latencies_ms.append(latency_ms)
+        health.consecutive_failures = 0
+
+    def record_failure(self, model: str) -> None:
+        health = self.get(model)
+        health.consecutive_failures += 1
+        if health.consecutive_failures >= self.failure_threshold:
+            health.open_until = time.monotonic() + self.cooldown
+            logger.warning("LLM model %s failing, routing around it", model)
+
+
+@dataclass(slots=True)
+class HedgedLLMClient(LLMClient):
+    """Races a primary model against backups.
+
+    A backup is launched once the primary runs past its latency percentile (or
+    fails); the first non-empty response wins and the other requests are
+    cancelled. Models whose breaker is open are skipped.
+    """
+
+    clients: list[Any]
+    health: ModelHealthRegistry = field(default_factory=ModelHealthRegistry)
+    percentile: float = 0.9
+    default_delay: float = 10.0
+
+    @property
+    def model(self) -> str:
+        return self.clients[0].model
+
+    @property
+    def params(self) -> dict:
+        return getattr(self.clients[0], "params", {})
+
+    async def complete(
+        self, prompt: str, correlation_id: str | None = None
+    ) -> LLMResponse:
+        return await self._race(
+            lambda client: client.complete(prompt, correlation_id=correlation_id)
+        )
+
+    async def complete_stream(
+        self, prompt: str, correlation_id: str | None = None
+    ) -> LLMResponse:
+        return await self._race(
+            lambda client: client.complete_stream(prompt, correlation_id=correlation_id)
+        )
+
+    def hedge_delay(self, model: str) -> float:
+        threshold = self.health.get(model).percentile(self.percentile)
+        return threshold / 1000 if threshold is not None else self.default_delay
+
+    async def _race(self, call: Callable[[Any], Awaitable[LLMResponse]]) -> LLMResponse:
+        now = time.monotonic()
+        candidates = [
+            client
+            for client in self.clients
+            if self.health.get(client.model).available(now)
+        ] or self.clients[:1]
+        queue = list(candidates)
+        running: dict[asyncio.Task[LLMResponse], tuple[Any, float]] = {}
+        attempted: list[str] = []
+        errors: list[BaseException] = []
+
+        def launch() -> None:
+            client = queue.pop(0)
+            attempted.append(client.model)
+            running[asyncio.create_task(call(client))] = (client, time.monotonic())
+
+        launch()
+        primary = candidates[0].model
+        primary_started = time.monotonic()
+        try:
+            while running:
+                timeout = self.hedge_delay(primary) if queue else None
+                done, _ = await asyncio.wait(
+                    running, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    launch()
+                    continue
+                for task in done:
+                    client, started = running.pop(task)
+                    elapsed_ms = (time.monotonic() - started) * 1000
+                    error = task.exception()
+                    if error is not None:
+                        errors.append(error)
+                        self.health.record_failure(client.model)
+                        continue
+                    response = task.result()
+                    if not response.content.strip():
+                        self.health.record_failure(client.model)
+                        continue
+                    self.health.record_success(client.model, elapsed_ms)
+                    primary_elapsed = (time.monotonic() - primary_started) * 1000
+                    saved = 0.0
+                    if client.model != primary:
+                        saved = self.health.get(primary).expected_remaining(
+                            primary_elapsed
+                        )
+                    response.metadata.update(
+                        {
+                            "winner": client.model,
+                            "attempted": attempted,
+                            "hedged": len(attempted) > 1,
+                            "latency_ms": round(elapsed_ms),
+                            "latency_saved_ms": round(saved),
+                        }
+                    )
+                    return response
+                if not running and queue:
+                    launch()
+        finally:
+            for task in running:
+                task.cancel()
+            await asyncio.gather(*running, return_exceptions=True)
+        if errors:
+            raise errors[-1]
+        raise RuntimeError("all models returned empty responses")
@@ -0,0 +1,243 @@
+from __future__ import annotations
+
+import asyncio
+import math
+import time
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import asdict, dataclass, field
+from typing import Any
+from uuid import uuid4
+
+from setup_logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+@dataclass(slots=True)
+class LimiterSnapshot:
+    model: str
+    limit: float
+    in_flight: int
+    queued: int
+    avg_wait_ms: float
+    paused_for: float
+
+    def as_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+@dataclass(slots=True)
+class AdaptiveLimiter:
+    """AIMD concurrency limit for one model, shared across workers through Redis.
+
+    Every success grows the limit by ``increase / limit`` (about +1 per window
+    of successful calls); a throttle multiplies it by ``decrease`` and pauses
+    new calls until ``Retry-After`` has passed. Throttles of calls that started
+    before the last decrease are one overload, so they do not shrink the limit
+    again. Each shared slot is a member of
+    a Redis sorted set scored by its deadline, so slots held by crashed
+    workers drop out after ``slot_ttl`` seconds.
+    """
+
+    model: str
+    limit: float = 4.0
+    min_limit: float = 1.0
+    max_limit: float = 32.0
+    increase: float = 1.0
+    decrease: float = 0.5
+    redis: Any | None = None
+    poll_interval: float = 0.5
+    slot_ttl: float = 300.0
+    in_flight: int = 0
+    queued: int = 0
+    paused_until: float = 0.0
+    decreased_at: float = 0.0
+    _waited_ms: float = 0.0
+    _acquired: int = 0
+    _cond: asyncio.Condition = field(default_factory=asyncio.Condition)
+
+    @property
+    def redis_key(self) -> str:
+        return f"agent_hub:llm:limiter:{self.model}"
+
+    @property
+    def holders_key(self) -> str:
+        return self.redis_key + ":holders"
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[float]:
+        """Hold a slot; yields the wall-clock start to pass to ``on_throttle``."""
+        holder = await self.acquire()
+        try:
+            yield time.time()
+        finally:
+            await self.release(holder)
+
+    async def acquire(self) -> str | None:
+        """Wait for a slot; returns the shared holder id to pass to ``release``."""
+        started = time.monotonic()
+        self.queued += 1
+        try:
+            async with self._cond:
+                while True:
+                    entered, holder = await self._try_enter()
+                    if entered:
+                        break
+                    timeout = self.poll_interval
+                    pause = self.paused_until - time.time()
+                    if pause > 0:
+                        timeout = min(pause, self.poll_interval)
+                    try:
+                        await asyncio.wait_for(self._cond.wait(), timeout)
+                    except TimeoutError:
+                        pass
+        finally:
+            self.queued -= 1
+        self._acquired += 1
+        self._waited_ms += (time.monotonic() - started) * 1000
+        return holder
+
+    async def _try_enter(self) -> tuple[bool, str | None]:
+        await self._pull_shared()
+        if self.paused_until > time.time():
+            return False, None
+        if self.in_flight >= int(self.limit):
+            return False, None
+        holder = None
+        if self.redis is not None:
+            entered, holder = await self._enter_shared()
+            if not entered:
+                return False, None
+        self.in_flight += 1
+        return True, holder
+
+    async def release(self, holder: str | None = None) -> None:
+        self.in_flight -= 1
+        if self.redis is not None and holder is not None:
+            try:
+                await self.redis.zrem(self.holders_key, holder)
+            except Exception:
+                logger.warning("LLM limiter: redis write failed", exc_info=True)
+        async with self._cond:
+            self._cond.notify_all()
+
+    async def on_success(self) -> None:
+        self.limit = min(self.max_limit, self.limit + self.increase / self.limit)
+        await self._push_shared()
+
+    async def on_throttle(
+        self, retry_after: float | None = None, started: float | None = None
+    ) -> None:
+        if started is None or started >= self.decreased_at:
+            self.limit = max(self.min_limit, self.limit * self.decrease)
+            self.decreased_at = time.time()
+        if retry_after:
+            self.paused_until = max(self.paused_until, time.time() + retry_after)
+        logger.info(
+            "LLM limiter %s throttled: limit %.2f, retry after %s",
+            self.model,
+            self.limit,
+            retry_after,
+        )
+        await self._push_shared()
+
+    def snapshot(self) -> LimiterSnapshot:
+        return LimiterSnapshot(
+            model=self.model,
+            limit=round(self.limit, 2),
+            in_flight=self.in_flight,
+            queued=self.queued,
+            avg_wait_ms=(
+                round(self._waited_ms / self._acquired, 1) if self._acquired else 0.0
+            ),
+            paused_for=round(max(0.0, self.paused_until - time.time()), 2),
+        )
+
+    async def _enter_shared(self) -> tuple[bool, str | None]:
+        """Take a shared slot; without Redis the local limit alone applies."""
+        key = self.holders_key
+        holder = uuid4().hex
+        added = False
+        now = time.time()
+        try:
+            await self.redis.zremrangebyscore(key, "-inf", now)
+            await self.redis.zadd(key, {holder: now + self.slot_ttl})
+            added = True
+            await self.redis.pexpire(key, max(1, math.ceil(self.slot_ttl * 1000)))
+            if await self.redis.zcard(key) > int(self.limit):
+                await self.redis.zrem(key, holder)
+                return False, None
+        except Exception:
+            logger.warning("LLM limiter: redis write failed", exc_info=True)
+            return True, holder if added else None
+        return True, holder
+
+    async def _pull_shared(self) -> None:
+        if self.redis is None:
+            return
+        try:
+            data = await self.redis.hgetall(self.redis_key)
+        except Exception:
+            logger.warning("LLM limiter: redis read failed", exc_info=True)
+            return
+        if not data:
+            return
+        values = {_text(key): float(value) for key, value in data.items()}
+        self.limit = values.get("limit", self.limit)
+        self.paused_until = max(self.paused_until, values.get("paused_until", 0.0))
+        self.decreased_at = max(self.decreased_at, values.get("decreased_at", 0.0))
+
+    async def _push_shared(self) -> None:
+        if self.redis is None:
+            return
+        mapping = {
+            "limit": self.limit,
+            "paused_until": self.paused_until,
+            "decreased_at": self.decreased_at,
+        }
+        try:
+            await self.redis.hset(self.redis_key, mapping=mapping)
+            await self.redis.expire(self.redis_key, 3600)
+        except Exception:
+            logger.warning("LLM limiter: redis write failed", exc_info=True)
+
+
+@dataclass(slots=True)
+class LimiterRegistry:
+    initial_limit: float = 4.0
+    max_limit: float = 32.0
+    redis: Any | None = None
+    _limiters: dict[str, AdaptiveLimiter] = field(default_factory=dict)
+
+    def for_model(self, model: str) -> AdaptiveLimiter:
+        limiter = self._limiters.get(model)
+        if limiter is None:
+            limiter = AdaptiveLimiter(
+                model=model,
+                limit=self.initial_limit,
+                max_limit=self.max_limit,
+                redis=self.redis,
+            )
+            self._limiters[model] = limiter
+        return limiter
+
+    async def snapshot(self) -> list[dict[str, Any]]:
+        snapshots = []
+        for limiter in self._limiters.values():
+            await limiter._pull_shared()
+            snapshots.append(limiter.snapshot().as_dict())
+        return snapshots
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return None
+
+
+def _text(value: bytes | str) -> str:
+    return value.decode("utf-8") if isinstance(value, bytes) else value
@@ -1,13 +1,53 @@
 from __future__ import annotations
 
 import asyncio
+import json
 import random
-from dataclasses import dataclass
+import time
+from collections.abc import AsyncGenerator, AsyncIterator, Awaitable, Callable
+from contextlib import AsyncExitStack, asynccontextmanager
+from dataclasses import dataclass, field
 
 import httpx
 
 from config import settings
 from llm.base import LLMClient, LLMResponse
+from llm.limiter import AdaptiveLimiter, parse_retry_after
+
+OPENROUTER_URL = "https://openrouter.ai/api/v1/chat/completions"
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+class RetryableError(httpx.HTTPError):
+    def __init__(
+        self, message: str, status_code: int = 0, retry_after: float | None = None
+    ) -> None:
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+def create_llm_http_client(
+    transport: httpx.AsyncBaseTransport | None = None,
+) -> httpx.AsyncClient:
+    limits = httpx.Limits(
+        max_connections=settings.llm_max_connections,
+        max_keepalive_connections=settings.llm_max_connections,
+        keepalive_expiry=60.0,
+    )
+    return httpx.AsyncClient(
+        limits=limits,
+        timeout=httpx.Timeout(settings.llm_total_timeout, connect=5.0),
+        transport=transport,
+    )
+
+
+@dataclass(slots=True)
+class StreamMetrics:
+    ttft_ms: float | None = None
+    total_ms: float = 0.0
+    chunks: int = 0
+    usage: dict = field(default_factory=dict)
 
 
 @dataclass(slots=True)
@@ -15,37 +55,218 @@ class OpenRouterClient(LLMClient):
     api_key: str
     model: str
     transport: httpx.AsyncBaseTransport | None = None
+    http: httpx.AsyncClient | None = None
+    connect_timeout: float = 5.0
+    first_token_timeout: float = 30.0
+    total_timeout: float = 180.0
+    params: dict = field(default_factory=dict)
+    limiter: AdaptiveLimiter | None = None
 
-    async def complete(self, prompt: str, correlation_id: str | None = None) -> LLMResponse:
-        retries = 3
-        backoff = 0.5
-        url = "https://openrouter.ai/api/v1/chat/completions"
+    def _headers(self, correlation_id: str | None) -> dict[str, str]:
+        headers = {"Authorization": f"Bearer {self.api_key}"}
+        if correlation_id:
+            headers["X-Request-Id"] = correlation_id
+        return headers
+
+    @asynccontextmanager
+    async def _session(self) -> AsyncIterator[httpx.AsyncClient]:
+        if self.http is not None:
+            yield self.http
+            return
+        async with httpx.AsyncClient(
+            timeout=self.total_timeout, transport=self.transport
+        ) as client:
+            yield client
+
+    @asynccontextmanager
+    async def _slot(self) -> AsyncIterator[float | None]:
+        if self.limiter is None:
+            yield None
+            return
+        async with self.limiter.slot() as started:
+            yield started
+
+    async def _check_status(
+        self, response: httpx.Response, started: float | None = None
+    ) -> None:
+        if response.status_code not in RETRYABLE_STATUS:
+            return
+        retry_after = parse_retry_after(response.headers.get("Retry-After"))
+        if response.status_code == 429 and self.limiter is not None:
+            await self.limiter.on_throttle(retry_after, started)
+        raise RetryableError(
+            f"retryable status {response.status_code}",
+            response.status_code,
+            retry_after,
+        )
+
+    async def _succeeded(self) -> None:
+        if self.limiter is not None:
+            await self.limiter.on_success()
+
+    async def complete(
+        self, prompt: str, correlation_id: str | None = None
+    ) -> LLMResponse:
         payload = {
+            **self.params,
             "model": self.model,
             "messages": [{"role": "user", "content": prompt}],
         }
-        headers = {"Authorization": f"Bearer {self.api_key}"}
-        if correlation_id:
-            headers["X-Request-Id"] = correlation_id
-        for attempt in range(retries):
+        headers = self._headers(correlation_id)
+
+        async def attempt() -> LLMResponse:
+            started = time.monotonic()
+            async with self._slot() as sent, self._session() as client:
+                response = await client.post(
+                    OPENROUTER_URL,
+                    json=payload,
+                    headers=headers,
+                    timeout=httpx.Timeout(
+                        self.total_timeout, connect=self.connect_timeout
+                    ),
+                )
+                await self._check_status(response, sent)
+            await self._succeeded()
+            data = response.json()
+            content = data["choices"][0]["message"]["content"]
+            return LLMResponse(
+                content=content,
+                model=self.model,
+                usage=data.get("usage") or {},
+                latency_ms=(time.monotonic() - started) * 1000,
+            )
+
+        return await self._with_retries(attempt)
+
+    async def stream(
+        self,
+        prompt: str,
+        correlation_id: str | None = None,
+        metrics: StreamMetrics | None = None,
+    ) -> AsyncGenerator[str, None]:
+        """Yield content chunks from an SSE completion.
+
+        The first chunk must arrive within ``first_token_timeout`` and the whole
+        completion within ``total_timeout``; a stalled stream raises
+        ``TimeoutError`` early instead of burning the whole budget. The wait for
+        the response headers counts against the first-token budget.
+        """
+        metrics = metrics if metrics is not None else StreamMetrics()
+        payload = {
+            **self.params,
+            "model": self.model,
+            "messages": [{"role": "user", "content": prompt}],
+            "stream": True,
+        }
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        deadline = started + min(self.first_token_timeout, self.total_timeout)
+        timeout = httpx.Timeout(self.total_timeout, connect=self.connect_timeout)
+        async with AsyncExitStack() as stack:
+            sent = await stack.enter_async_context(self._slot())
+            client = await stack.enter_async_context(self._session())
+            request = client.stream(
+                "POST",
+                OPENROUTER_URL,
+                json=payload,
+                headers=self._headers(correlation_id),
+                timeout=timeout,
+            )
+            # Waiting for the response headers counts against the first token.
+            async with asyncio.timeout_at(deadline):
+                response = await stack.enter_async_context(request)
+            await self._check_status(response, sent)
+            response.raise_for_status()
+            lines = response.aiter_lines()
+            while True:
+                try:
+                    async with asyncio.timeout_at(deadline):
+                        line = await anext(lines)
+                except StopAsyncIteration:
+                    break
+                chunk, done = parse_sse_line(line, metrics)
+                if done:
+                    break
+                if not chunk:
+                    continue
+                if metrics.ttft_ms is None:
+                    metrics.ttft_ms = (loop.time() - started) * 1000
+                    deadline = started + self.total_timeout
+                metrics.chunks += 1
+                yield chunk
+        await self._succeeded()
+        metrics.total_ms = (loop.time() - started) * 1000
+
+    async def complete_stream(
+        self,
+        prompt: str,
+        correlation_id: str | None = None,
+        on_chunk: Callable[[str], None] | None = None,
+    ) -> LLMResponse:
+        async def attempt() -> LLMResponse:
+            metrics = StreamMetrics()
+            parts: list[str] = []
+            async for chunk in self.stream(prompt, correlation_id, metrics):
+                parts.append(chunk)
+                if on_chunk is not None:
+                    on_chunk(chunk)
+            return LLMResponse(
+                content="".join(parts),
+                model=self.model,
+                usage=metrics.usage,
+                latency_ms=metrics.total_ms,
+                ttft_ms=metrics.ttft_ms,
+            )
+
+        return await self._with_retries(attempt)
+
+    async def _with_retries(
+        self, attempt: Callable[[], Awaitable[LLMResponse]]
+    ) -> LLMResponse:
+        retries = 3
+        backoff = 0.5
+        for index in range(retries):
             try:
-                async with httpx.AsyncClient(timeout=20, transport=self.transport) as client:
-                    response = await client.post(url, json=payload, headers=headers)
-                if response.status_code in {429, 500, 502, 503, 504}:
-                    raise httpx.HTTPError("retryable")
-                data = response.json()
-                content = data["choices"][0]["message"]["content"]
-                return LLMResponse(content=content, model=self.model)
-            except Exception:
-                if attempt == retries - 1:
+                return await attempt()
+            except Exception as exc:
+                # A blown stream deadline already spent the budget; retrying
+                # from scratch would only spend it again.
+                if isinstance(exc, TimeoutError) or index == retries - 1:
                     raise
                 jitter = random.random() * 0.2
-                await asyncio.sleep(backoff + jitter)
+                retry_after = getattr(exc, "retry_after", None)
+                delay = retry_after if retry_after is not None else backoff
+                await asyncio.sleep(delay + jitter)
                 backoff *= 2
+        raise RuntimeError("unreachable")
+
+
+def parse_sse_line(line: str, metrics: StreamMetrics) -> tuple[str, bool]:
+    if not line.startswith("data:"):
+        return "", False
+    data = line[len("data:") :].strip()
+    if data == "[DONE]":
+        return "", True
+    try:
+        event = json.loads(data)
+    except json.JSONDecodeError:
+        return "", False
+    if event.get("usage"):
+        metrics.usage = event["usage"]
+    choices = event.get("choices") or [{}]
+    delta = choices[0].get("delta") or {}
+    return delta.get("content") or "", False
 
 
-def default_client() -> OpenRouterClient:
+def default_client(
+    http: httpx.AsyncClient | None = None,
+    limiter: AdaptiveLimiter | None = None,
+) -> OpenRouterClient:
     return OpenRouterClient(
         api_key=settings.openrouter_api_key,
         model=settings.openrouter_model,
+        http=http,
+        limiter=limiter,
+        first_token_timeout=settings.llm_first_token_timeout,
+        total_timeout=settings.llm_total_timeout,
     )
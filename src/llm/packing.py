@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+
+from config import settings
+
+_PIECE_RE = re.compile(r"\w+|[^\w\s]")
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap BPE-like estimate: one token per punctuation mark, ~6 chars per word."""
+    return sum(1 + len(piece) // 6 for piece in _PIECE_RE.findall(text))
+
+
+@dataclass(slots=True)
+class ModelBudget:
+    context_tokens: int
+    output_tokens: int
+
+    @property
+    def prompt_tokens(self) -> int:
+        return self.context_tokens - self.output_tokens
+
+
+MODEL_BUDGETS = {
+    "google/gemini-2.5-flash": ModelBudget(1_048_576, 65_536),
+    "google/gemini-3-flash-preview": ModelBudget(1_048_576, 65_536),
+    "qwen/qwen-3-coder-480b": ModelBudget(262_144, 32_768),
+}
+DEFAULT_BUDGET = ModelBudget(32_768, 4_096)
+
+
+def prompt_budget(model: str) -> int:
+    budget = MODEL_BUDGETS.get(model, DEFAULT_BUDGET)
+    return min(budget.prompt_tokens, settings.prompt_token_cap)
+
+
+@dataclass(slots=True)
+class Section:
+    """A prompt part. Lower ``priority`` is trimmed first; ``trim`` picks how.
+
+    ``tail`` cuts the end, ``lines`` drops trailing lines, ``blocks`` drops
+    trailing blank-line separated blocks, ``keep`` is never trimmed.
+    """
+
+    name: str
+    text: str
+    priority: int = 0
+    trim: str = "tail"
+    min_tokens: int = 0
+
+
+@dataclass(slots=True)
+class PackedPrompt:
+    text: str
+    tokens: int
+    trimmed: dict[str, tuple[int, int]] = field(default_factory=dict)
+
+
+def pack(sections: list[Section], budget: int) -> PackedPrompt:
+    sizes = {id(section): estimate_tokens(section.text) for section in sections}
+    over = sum(sizes.values()) - budget
+    texts = {id(section): section.text for section in sections}
+    trimmed: dict[str, tuple[int, int]] = {}
+    for section in sorted(sections, key=lambda item: item.priority):
+        if over <= 0:
+            break
+        if section.trim == "keep":
+            continue
+        before = sizes[id(section)]
+        allowed = max(section.min_tokens, before - over)
+        if allowed >= before:
+            continue
+        text = shrink(section.text, section.trim, allowed)
+        after = estimate_tokens(text)
+        texts[id(section)] = text
+        sizes[id(section)] = after
+        trimmed[section.name] = (before, after)
+        over -= before - after
+    text = "".join(texts[id(section)] for section in sections)
+    return PackedPrompt(text=text, tokens=sum(sizes.values()), trimmed=trimmed)
+
+
+def shrink(text: str, mode: str, allowed: int) -> str:
+    if allowed <= 0:
+        return ""
+    if mode == "blocks":
+        return _keep_units(text.split("\n\n"), "\n\n", allowed, "block")
+    if mode == "lines":
+        return _keep_units(text.split("\n"), "\n", allowed, "line")
+    return _cut_tail(text, allowed)
+
+
+def _keep_units(units: list[str], joiner: str, allowed: int, noun: str) -> str:
+    kept: list[str] = []
+    used = estimate_tokens(f"[... {len(units)} more {noun}(s) omitted]\n")
+    for index, unit in enumerate(units):
+        cost = estimate_tokens(unit + joiner)
+        if used + cost > allowed:
+            if not kept:
+                return _cut_tail(unit, allowed)
+            omitted = len(units) - index
+            kept.append(f"[... {omitted} more {noun}(s) omitted]\n")
+            break
+        kept.append(unit)
+        used += cost
+    return joiner.join(kept)
+
+
+def _cut_tail(text: str, allowed: int) -> str:
+    marker = "\n[... truncated]\n"
+    allowed = max(allowed - estimate_tokens(marker), 1)
+    low, high = 0, len(text)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if estimate_tokens(text[:middle]) <= allowed:
+            low = middle
+        else:
+            high = middle - 1
+    if low >= len(text):
+        return text
+    return text[:low] + marker
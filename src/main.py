@@ -1,6 +1,8 @@
 from __future__ import annotations
 
+from concurrent.futures import ProcessPoolExecutor
 from contextlib import asynccontextmanager
+from pathlib import Path
 
 from fastapi import FastAPI
 from arq import create_pool
@@ -8,14 +10,24 @@ from arq.connections import RedisSettings
 
 from config import settings
 from db.base import create_engine, create_sessionmaker, init_models
+from github.app_auth import app_token_provider
+from github.cache import ResponseCache
+from github.http import create_http_client
+from github.rate_limit import RateLimitRegistry
 from internal.routers.runs import router as runs_router
 from internal.routers.settings import router as settings_router
 from internal.routers.ui import router as ui_router
 from internal.routers.webhooks import router as webhooks_router
 from internal.routers.installations import router as installations_router
-from llm.openrouter import default_client
+from llm.cache import LLMResponseCache
+from llm.hedging import ModelHealthRegistry
+from llm.limiter import LimiterRegistry
+from llm.openrouter import create_llm_http_client, default_client
 from setup_logger import setup_logger
-from services.jobs import run_issue_job
+from services.jobs import default_repo_cache, run_issue_job
+from tools.bm25 import IndexStore
+from tools.git_ops import BlobCache
+from tools.symbols import SymbolCache
 
 logger = setup_logger(__name__)
 
@@ -26,16 +38,26 @@ async def lifespan(app: FastAPI):
     sessionmaker = create_sessionmaker(engine)
     app.state.db_engine = engine
     app.state.db_sessionmaker = sessionmaker
-    app.state.llm_client = default_client()
+    app.state.llm_http = create_llm_http_client()
+    app.state.github_http = create_http_client()
+    app.state.github_tokens = app_token_provider(app.state.github_http)
     try:
         app.state.redis = await create_pool(RedisSettings.from_dsn(settings.redis_url))
     except Exception:
         app.state.redis = None
+    app.state.github_cache = github_cache(app.state.redis)
+    app.state.github_limits = github_limits(app.state.redis)
+    app.state.llm_limits = llm_limits(app.state.redis)
+    app.state.llm_client = default_client(
+        app.state.llm_http, app.state.llm_limits.for_model(settings.openrouter_model)
+    )
     await init_models(engine)
     logger.info("App started with model %s", settings.openrouter_model)
     yield
     if app.state.redis:
         await app.state.redis.close()
+    await app.state.github_http.aclose()
+    await app.state.llm_http.aclose()
     await engine.dispose()
 
 
@@ -47,9 +69,74 @@ app.include_router(settings_router)
 app.include_router(installations_router)
 
 
+def github_cache(redis: object | None) -> ResponseCache:
+    return ResponseCache(
+        max_entries=settings.github_cache_size,
+        redis=redis,
+        redis_ttl=settings.github_cache_ttl,
+    )
+
+
+def github_limits(redis: object | None) -> RateLimitRegistry:
+    return RateLimitRegistry(
+        reserve=settings.github_rate_reserve,
+        mutation_interval=settings.github_mutation_interval,
+        max_wait=settings.github_rate_max_wait,
+        redis=redis,
+    )
+
+
+def llm_limits(redis: object | None) -> LimiterRegistry:
+    return LimiterRegistry(
+        initial_limit=settings.llm_initial_concurrency,
+        max_limit=settings.llm_max_concurrency,
+        redis=redis,
+    )
+
+
+async def startup(ctx: dict) -> None:
+    ctx["llm_http"] = create_llm_http_client()
+    ctx["llm_limits"] = llm_limits(ctx.get("redis"))
+    ctx["llm_client"] = default_client(
+        ctx["llm_http"], ctx["llm_limits"].for_model(settings.openrouter_model)
+    )
+    ctx["llm_cache"] = LLMResponseCache(
+        path=settings.llm_cache_path,
+        ttl=settings.llm_cache_ttl,
+        max_rows=settings.llm_cache_max_rows,
+    )
+    ctx["llm_health"] = ModelHealthRegistry(
+        failure_threshold=settings.llm_breaker_threshold,
+        cooldown=settings.llm_breaker_cooldown,
+    )
+    ctx["repo_cache"] = default_repo_cache()
+    ctx["blob_cache"] = BlobCache(max_bytes=settings.blob_cache_mb * 1024 * 1024)
+    ctx["index_store"] = IndexStore(Path(settings.index_cache_dir))
+    ctx["symbol_cache"] = SymbolCache()
+    if settings.symbol_workers > 0:
+        ctx["symbol_pool"] = ProcessPoolExecutor(max_workers=settings.symbol_workers)
+    ctx["github_http"] = create_http_client()
+    ctx["github_tokens"] = app_token_provider(ctx["github_http"])
+    ctx["github_cache"] = github_cache(ctx.get("redis"))
+    ctx["github_limits"] = github_limits(ctx.get("redis"))
+
+
+async def shutdown(ctx: dict) -> None:
+    cache = ctx.get("github_cache")
+    if cache is not None:
+        logger.info("GitHub cache stats: %s", cache.stats.as_dict())
+    pool = ctx.pop("symbol_pool", None)
+    if pool is not None:
+        pool.shutdown(cancel_futures=True)
+    for key in ("github_http", "llm_http"):
+        http = ctx.pop(key, None)
+        if http is not None:
+            await http.aclose()
+
+
 class WorkerSettings:
     redis_settings = RedisSettings.from_dsn(settings.redis_url)
     functions = [run_issue_job]
-
-    async def startup(self, ctx) -> None:
-        ctx["llm_client"] = default_client()
+    on_startup = startup
+    on_shutdown = shutdown
+    max_jobs = settings.worker_max_jobs
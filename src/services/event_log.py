@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import asyncio
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import datetime
+from uuid import uuid4
+
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from db.models import EventLog
+from db.repositories import add_logs
+from setup_logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+@dataclass(slots=True)
+class EventLogBuffer:
+    """Per-run event log that writes events in batches.
+
+    Pending events are inserted together when ``max_events`` are queued,
+    ``interval`` seconds after the first of them, on ``flush()`` and on
+    ``close()``. Each flush uses its own short session, so a timer flush
+    never runs into the run's session.
+    """
+
+    sessionmaker: async_sessionmaker
+    run_id: str
+    max_events: int = 50
+    interval: float = 1.0
+    pending: list[EventLog] = field(default_factory=list)
+    flushes: int = 0
+    _lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    _timer: asyncio.Task | None = None
+
+    async def __aenter__(self) -> EventLogBuffer:
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        await self.close()
+
+    async def add(self, message: str, kind: str, payload: dict) -> None:
+        self.pending.append(
+            EventLog(
+                id=str(uuid4()),
+                run_id=self.run_id,
+                message=message,
+                kind=kind,
+                payload=payload,
+                # Set here, not at insert time, so batched events keep their order.
+                created_at=datetime.utcnow(),
+            )
+        )
+        if len(self.pending) >= self.max_events:
+            await self.flush()
+        elif self._timer is None and self.interval > 0:
+            self._timer = asyncio.create_task(self._flush_later())
+
+    async def flush(self) -> None:
+        async with self._lock:
+            if self._timer is not None and self._timer is not asyncio.current_task():
+                self._timer.cancel()
+            self._timer = None
+            if not self.pending:
+                return
+            batch, self.pending = self.pending, []
+            try:
+                async with self.sessionmaker() as session:
+                    await add_logs(session, batch)
+                    await session.commit()
+            except Exception:
+                self.pending[:0] = batch
+                raise
+            self.flushes += 1
+
+    async def close(self) -> None:
+        await self.flush()
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.interval)
+        try:
+            await self.flush()
+        except Exception as exc:
+            logger.warning("Event log flush failed for run %s: %s", self.run_id, exc)
+
+
+current_events: ContextVar[EventLogBuffer | None] = ContextVar(
+    "current_events", default=None
+)
+
+
+async def flush_events() -> None:
+    """Flush the current run's buffered events, if any."""
+    events = current_events.get()
+    if events is not None:
+        await events.flush()
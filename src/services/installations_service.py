@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import httpx
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from db.repositories import (
+    get_installation_id,
+    remove_installation_repo,
+    upsert_installation_repo,
+)
+from github.app_auth import InstallationTokenProvider
+from setup_logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+@dataclass(slots=True)
+class InstallationsService:
+    provider: InstallationTokenProvider | None = None
+    fallback_token: str = ""
+
+    async def connect(
+        self, session: AsyncSession, installation_id: int, owner: str, repo: str
+    ) -> None:
+        await upsert_installation_repo(session, installation_id, owner, repo)
+
+    async def sync_from_webhook(self, session: AsyncSession, data: dict) -> None:
+        installation_id = data.get("installation", {}).get("id")
+        if not installation_id:
+            return
+        added = data.get("repositories_added") or data.get("repositories") or []
+        if data.get("action") in {"deleted", "suspend"}:
+            added, removed = [], data.get("repositories") or []
+        else:
+            removed = data.get("repositories_removed") or []
+        for item in added:
+            owner, _, repo = item.get("full_name", "").partition("/")
+            if owner and repo:
+                await upsert_installation_repo(session, installation_id, owner, repo)
+        for item in removed:
+            owner, _, repo = item.get("full_name", "").partition("/")
+            if owner and repo:
+                await remove_installation_repo(session, owner, repo)
+
+    async def token_for_repo(self, session: AsyncSession, owner: str, repo: str) -> str:
+        if self.provider is None:
+            return self.fallback_token
+        installation_id = await get_installation_id(session, owner, repo)
+        if installation_id is not None:
+            try:
+                return await self.provider.token_for_installation(installation_id)
+            except httpx.HTTPStatusError as exc:
+                if exc.response.status_code not in {401, 404}:
+                    raise
+            # The app was reinstalled or removed without a webhook reaching us.
+            logger.warning(
+                "Stale GitHub App installation %s for %s/%s",
+                installation_id,
+                owner,
+                repo,
+            )
+            await remove_installation_repo(session, owner, repo)
+        try:
+            installation_id = await self.provider.installation_for_repo(owner, repo)
+        except httpx.HTTPStatusError:
+            logger.warning("No GitHub App installation for %s/%s", owner, repo)
+            return self.fallback_token
+        await upsert_installation_repo(session, installation_id, owner, repo)
+        return await self.provider.token_for_installation(installation_id)
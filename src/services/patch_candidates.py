@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from typing import Any
+
+from llm.base import LLMResponse
+
+Validator = Callable[[str], Awaitable[tuple[str, str, dict]]]
+
+
+@dataclass(slots=True)
+class PatchCandidate:
+    index: int
+    model: str
+    params: dict = field(default_factory=dict)
+    diff: str = ""
+    error: str = ""
+    response: LLMResponse | None = None
+    elapsed_ms: float = 0.0
+    details: dict = field(default_factory=dict)
+
+    @property
+    def partial(self) -> bool:
+        """Valid, but with hunks that did not apply."""
+        return bool(self.details.get("failed_hunks"))
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "candidate": self.index,
+            "model": self.model,
+            "params": self.params,
+            "elapsed_ms": round(self.elapsed_ms),
+            **self.details,
+        }
+
+
+@dataclass(slots=True)
+class CandidateOutcome:
+    winner: PatchCandidate | None
+    rejected: list[PatchCandidate]
+    cancelled: int = 0
+
+
+async def first_valid_patch(
+    clients: list[Any],
+    prompt: str,
+    validate: Validator,
+    correlation_id: str | None = None,
+    stream: bool = False,
+) -> CandidateOutcome:
+    """Request a patch from every client at once; the first valid one wins.
+
+    ``validate`` turns a completion into ``(diff, error, details)`` and runs as
+    soon as each completion arrives. Pending candidates are cancelled once a
+    winner is found. A partial candidate only wins if no candidate applies
+    in full.
+    """
+
+    async def generate(index: int, client: Any) -> PatchCandidate:
+        candidate = PatchCandidate(
+            index=index,
+            model=client.model,
+            params=dict(getattr(client, "params", {})),
+        )
+        started = time.monotonic()
+        try:
+            if stream:
+                response = await client.complete_stream(
+                    prompt, correlation_id=correlation_id
+                )
+            else:
+                response = await client.complete(prompt, correlation_id=correlation_id)
+        except Exception as exc:
+            candidate.error = f"llm error: {exc}"
+        else:
+            candidate.response = response
+            candidate.diff, candidate.error, candidate.details = await validate(
+                response.content
+            )
+        candidate.elapsed_ms = (time.monotonic() - started) * 1000
+        return candidate
+
+    pending = {
+        asyncio.create_task(generate(index, client))
+        for index, client in enumerate(clients, start=1)
+    }
+    rejected: list[PatchCandidate] = []
+    fallback: PatchCandidate | None = None
+    try:
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in sorted(done, key=lambda item: item.result().index):
+                candidate = task.result()
+                if candidate.error:
+                    rejected.append(candidate)
+                    continue
+                if candidate.partial:
+                    fallback = fallback or candidate
+                    continue
+                return CandidateOutcome(candidate, rejected, cancelled=len(pending))
+    finally:
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+    return CandidateOutcome(fallback, rejected)
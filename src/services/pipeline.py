@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from typing import Any
+
+StageFn = Callable[[dict[str, Any]], Awaitable[Any]]
+
+
+class StageError(RuntimeError):
+    """Raised by a stage to stop the pipeline with a run failure reason."""
+
+
+@dataclass(slots=True)
+class Stage:
+    name: str
+    run: StageFn
+    deps: tuple[str, ...] = ()
+
+
+@dataclass(slots=True)
+class StageTiming:
+    name: str
+    start_ms: float
+    duration_ms: float = 0.0
+    status: str = "running"
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "stage": self.name,
+            "start_ms": round(self.start_ms),
+            "duration_ms": round(self.duration_ms),
+            "status": self.status,
+        }
+
+
+@dataclass(slots=True)
+class Pipeline:
+    """Runs stages as soon as their dependencies are done.
+
+    Each stage receives the results of the stages finished so far, keyed by
+    stage name. The first failing stage cancels everything still running and
+    its exception is re-raised from ``run``.
+    """
+
+    stages: list[Stage]
+    results: dict[str, Any] = field(default_factory=dict)
+    timings: dict[str, StageTiming] = field(default_factory=dict)
+    started: float = 0.0
+
+    async def run(self) -> dict[str, Any]:
+        self.started = time.monotonic()
+        tasks: dict[str, asyncio.Task[Any]] = {}
+        for stage in self.stages:
+            missing = [name for name in stage.deps if name not in tasks]
+            if missing:
+                raise ValueError(f"stage {stage.name} depends on unknown {missing}")
+            deps = [tasks[name] for name in stage.deps]
+            tasks[stage.name] = asyncio.create_task(self._run_stage(stage, deps))
+        try:
+            done, pending = await asyncio.wait(
+                tasks.values(), return_when=asyncio.FIRST_EXCEPTION
+            )
+            for task in done:
+                if task.exception() is not None:
+                    raise task.exception()
+        finally:
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+        return self.results
+
+    async def _run_stage(self, stage: Stage, deps: list[asyncio.Task[Any]]) -> None:
+        if deps:
+            await asyncio.wait(deps)
+            if any(task.cancelled() or task.exception() for task in deps):
+                raise asyncio.CancelledError
+        began = time.monotonic()
+        timing = StageTiming(stage.name, (began - self.started) * 1000)
+        self.timings[stage.name] = timing
+        try:
+            self.results[stage.name] = await stage.run(self.results)
+        except asyncio.CancelledError:
+            timing.status = "cancelled"
+            raise
+        except Exception:
+            timing.status = "failed"
+            raise
+        else:
+            timing.status = "ok"
+        finally:
+            timing.duration_ms = (time.monotonic() - began) * 1000
+
+    def timing_report(self) -> dict[str, Any]:
+        return {
+            "stages": [timing.as_dict() for timing in self.timings.values()],
+            "total_ms": round((time.monotonic() - self.started) * 1000),
+        }
@@ -2,6 +2,8 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 
+import httpx
+
 from github.client import GitHubClient
 from github.permissions_policy import REVIEW_POLICY
 
@@ -9,6 +11,7 @@ from github.permissions_policy import REVIEW_POLICY
 @dataclass(slots=True)
 class ReviewerService:
     token: str
+    http: httpx.AsyncClient | None = None
 
     def client(self) -> GitHubClient:
-        return GitHubClient(token=self.token, policy=REVIEW_POLICY)
+        return GitHubClient(token=self.token, policy=REVIEW_POLICY, http=self.http)
@@ -0,0 +1,244 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import math
+import os
+import re
+import tempfile
+import zlib
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from setup_logger import setup_logger
+from tools.git_ops import BlobReader, git
+
+logger = setup_logger(__name__)
+
+_WORD_RE = re.compile(r"[A-Za-z][A-Za-z0-9_]*")
+_CAMEL_RE = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|[0-9]+")
+STOPWORDS = frozenset(
+    "a an and are as at be but by do does for from has have if in into is it its "
+    "not of on or so that the their then there these this to was we when which "
+    "will with you self none true false return def class import".split()
+)
+# Longer "words" are blobs (base64, minified code), not identifiers; they
+# would also widen every entry of the fixed-width TF-IDF vocab array.
+MAX_TOKEN_LENGTH = 48
+SKIPPED_PARTS = ("node_modules/", "vendor/", "dist/", ".git/")
+SKIPPED_SUFFIXES = (".lock", ".min.js", ".map", ".svg", "-lock.json")
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercased identifiers plus their camelCase / snake_case parts."""
+    tokens: list[str] = []
+    for word in _WORD_RE.findall(text):
+        lower = word.lower()
+        parts = [
+            part.lower()
+            for chunk in word.split("_")
+            for part in _CAMEL_RE.findall(chunk)
+        ]
+        if len(parts) > 1:
+            tokens.extend(part for part in parts if len(part) > 1)
+        if len(lower) > 1 and lower not in STOPWORDS:
+            tokens.append(lower)
+    return [
+        token
+        for token in tokens
+        if token not in STOPWORDS and len(token) <= MAX_TOKEN_LENGTH
+    ]
+
+
+def indexable(path: str) -> bool:
+    return not any(part in path for part in SKIPPED_PARTS) and not path.endswith(
+        SKIPPED_SUFFIXES
+    )
+
+
+@dataclass(slots=True)
+class BM25Index:
+    """Inverted index over a repository snapshot with Okapi BM25 ranking."""
+
+    commit: str = ""
+    k1: float = 1.2
+    b: float = 0.75
+    lengths: dict[str, int] = field(default_factory=dict)
+    postings: dict[str, dict[str, int]] = field(default_factory=dict)
+    total_length: int = 0
+
+    def add(self, path: str, tokens: list[str]) -> None:
+        self.remove(path)
+        tokens = tokens + tokenize(path.replace("/", " ").replace(".", " ")) * 2
+        self.lengths[path] = len(tokens)
+        self.total_length += len(tokens)
+        for term, count in Counter(tokens).items():
+            self.postings.setdefault(term, {})[path] = count
+
+    def remove(self, path: str) -> None:
+        length = self.lengths.pop(path, None)
+        if length is None:
+            return
+        self.total_length -= length
+        for term in list(self.postings):
+            docs = self.postings[term]
+            if docs.pop(path, None) is not None and not docs:
+                del self.postings[term]
+
+    def remove_many(self, paths: set[str]) -> None:
+        paths = {path for path in paths if path in self.lengths}
+        if not paths:
+            return
+        for path in paths:
+            self.total_length -= self.lengths.pop(path)
+        for term in list(self.postings):
+            docs = self.postings[term]
+            for path in paths & docs.keys():
+                del docs[path]
+            if not docs:
+                del self.postings[term]
+
+    def search(self, query: str, limit: int = 8) -> list[tuple[str, float]]:
+        if not self.lengths:
+            return []
+        count = len(self.lengths)
+        average = self.total_length / count
+        scores: Counter[str] = Counter()
+        for term, weight in Counter(tokenize(query)).items():
+            docs = self.postings.get(term)
+            if not docs:
+                continue
+            idf = math.log(1 + (count - len(docs) + 0.5) / (len(docs) + 0.5))
+            for path, tf in docs.items():
+                norm = self.k1 * (1 - self.b + self.b * self.lengths[path] / average)
+                scores[path] += weight * idf * tf * (self.k1 + 1) / (tf + norm)
+        return scores.most_common(limit)
+
+    def rare_terms(self, query: str, limit: int = 8) -> list[str]:
+        """Query terms present in the index, most selective first."""
+        terms = [
+            term for term in dict.fromkeys(tokenize(query)) if term in self.postings
+        ]
+        terms.sort(key=lambda term: len(self.postings[term]))
+        return terms[:limit]
+
+    def to_bytes(self) -> bytes:
+        data = {
+            "commit": self.commit,
+            "lengths": self.lengths,
+            "postings": self.postings,
+        }
+        return zlib.compress(json.dumps(data, separators=(",", ":")).encode(), 6)
+
+    @classmethod
+    def from_bytes(cls, raw: bytes) -> BM25Index:
+        data = json.loads(zlib.decompress(raw))
+        return cls(
+            commit=data["commit"],
+            lengths=data["lengths"],
+            postings=data["postings"],
+            total_length=sum(data["lengths"].values()),
+        )
+
+
+@dataclass(slots=True)
+class IndexStore:
+    """Indexes on disk, one file per repository and commit SHA."""
+
+    root: Path
+    keep: int = 3
+
+    def path(self, repo_key: str, commit: str) -> Path:
+        return self.root / repo_key / f"{commit}.bm25.z"
+
+    def load(self, repo_key: str, commit: str) -> BM25Index | None:
+        path = self.path(repo_key, commit)
+        if not path.exists():
+            return None
+        return BM25Index.from_bytes(path.read_bytes())
+
+    def latest(self, repo_key: str) -> BM25Index | None:
+        for path in reversed(_by_mtime(self.root / repo_key)):
+            try:
+                return BM25Index.from_bytes(path.read_bytes())
+            except FileNotFoundError:
+                continue
+        return None
+
+    def save(self, repo_key: str, index: BM25Index) -> None:
+        """Write ``index`` atomically; concurrent saves of the same commit are fine."""
+        path = self.path(repo_key, index.commit)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile(
+            dir=path.parent, suffix=".tmp", delete=False
+        ) as handle:
+            handle.write(index.to_bytes())
+        os.replace(handle.name, path)
+        for old in _by_mtime(path.parent)[: -self.keep]:
+            old.unlink(missing_ok=True)
+
+
+def _by_mtime(folder: Path) -> list[Path]:
+    """Stored indexes, oldest first, skipping any removed while listing."""
+    stored: list[tuple[float, Path]] = []
+    for path in folder.glob("*.bm25.z"):
+        try:
+            stored.append((path.stat().st_mtime, path))
+        except FileNotFoundError:
+            continue
+    return [path for _, path in sorted(stored)]
+
+
+async def changed_paths(repo_path: Path, old: str, new: str) -> set[str] | None:
+    result = await git(repo_path, ["diff", "--name-only", "-z", old, new])
+    if not result.ok:
+        return None
+    return {path for path in result.stdout.decode("utf-8").split("\0") if path}
+
+
+async def index_paths(
+    index: BM25Index, reader: BlobReader, paths: list[str], batch: int = 256
+) -> None:
+    """Read ``paths`` through ``reader`` and (re)index them.
+
+    Tokenizing runs in a thread, one batch at a time, so a full build on a
+    large repository does not stall the event loop.
+    """
+
+    def tokenize_batch(texts: list[tuple[str, str]]) -> list[tuple[str, list[str]]]:
+        return [(path, tokenize(text)) for path, text in texts]
+
+    for start in range(0, len(paths), batch):
+        texts = []
+        for path in paths[start : start + batch]:
+            text = await reader.read_text(path)
+            if text is not None:
+                texts.append((path, text))
+        for path, tokens in await asyncio.to_thread(tokenize_batch, texts):
+            index.add(path, tokens)
+
+
+async def load_index(
+    store: IndexStore, repo_key: str, repo_path: Path, reader: BlobReader
+) -> BM25Index:
+    """Index for the checked-out commit: cached, incrementally updated or new."""
+    head = await git(repo_path, ["rev-parse", "HEAD"])
+    commit = head.stdout.decode().strip()
+    index = await asyncio.to_thread(store.load, repo_key, commit)
+    if index is not None:
+        return index
+    index = await asyncio.to_thread(store.latest, repo_key)
+    changed = await changed_paths(repo_path, index.commit, commit) if index else None
+    if index is None or changed is None:
+        index = BM25Index()
+        paths = [path for path in reader.paths if indexable(path)]
+        logger.info("Building BM25 index for %s (%d files)", repo_key, len(paths))
+    else:
+        index.remove_many(changed)
+        paths = [path for path in changed if path in reader.paths and indexable(path)]
+        logger.info("Updating BM25 index for %s (%d files)", repo_key, len(paths))
+    await index_paths(index, reader, paths)
+    index.commit = commit
+    await asyncio.to_thread(store.save, repo_key, index)
+    return index
@@ -0,0 +1,196 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from tools.patch_model import (
+    FilePatch,
+    HunkFailure,
+    Patch,
+    PatchApplyError,
+    apply_file,
+    read_source,
+)
+
+# Fix kinds that git apply copes with on its own; anything else would have
+# sent the model back for another attempt.
+GIT_TOLERATED = frozenset({"offset"})
+KEPT_HEADERS = (
+    "old mode ",
+    "new mode ",
+    "new file mode ",
+    "deleted file mode ",
+    "similarity index ",
+)
+
+
+@dataclass(slots=True)
+class RepairResult:
+    diff: str
+    patch: Patch | None = None
+    fixes: list[str] = field(default_factory=list)
+    kinds: set[str] = field(default_factory=set)
+    failed: list[HunkFailure] = field(default_factory=list)
+    error: str = ""
+
+    @property
+    def ok(self) -> bool:
+        return not self.error
+
+    @property
+    def saved_retry(self) -> bool:
+        """Whether the diff as written would have been rejected by git."""
+        return self.ok and bool(self.kinds - GIT_TOLERATED)
+
+    def note(self, kind: str, message: str) -> None:
+        self.kinds.add(kind)
+        self.fixes.append(message)
+
+    def as_dict(self) -> dict[str, Any]:
+        data: dict[str, Any] = {
+            "repair_fixes": self.fixes,
+            "repair_kinds": sorted(self.kinds),
+            "repair_saved_retry": self.saved_retry,
+        }
+        if self.failed:
+            data["failed_hunks"] = [failure.as_dict() for failure in self.failed]
+        return data
+
+
+def fix_path(path: str, root: Path, known: set[str] | None = None) -> str | None:
+    """The repository path ``path`` most likely means, if it does not exist.
+
+    Models add extra leading directories (``a/a/src/x.py``, the repository
+    name) or leave some out (``x.py`` for ``src/x.py``); a unique match wins.
+    """
+
+    def exists(item: str) -> bool:
+        return item in known if known is not None else (root / item).is_file()
+
+    if exists(path):
+        return path
+    parts = path.split("/")
+    for start in range(1, len(parts)):
+        candidate = "/".join(parts[start:])
+        if exists(candidate):
+            return candidate
+    if known is not None:
+        matches = [item for item in known if item.endswith(f"/{path}")]
+        if len(matches) == 1:
+            return matches[0]
+    return None
+
+
+def _fix_paths(
+    file: FilePatch, root: Path, known: set[str] | None, result: RepairResult
+) -> None:
+    if file.old_path is None:
+        return
+    fixed = fix_path(file.old_path, root, known)
+    if fixed is None or fixed == file.old_path:
+        return
+    result.note("path", f"{file.old_path}: path -> {fixed}")
+    if file.new_path == file.old_path:
+        file.new_path = fixed
+    file.old_path = fixed
+
+
+def _emit(file: FilePatch, hunks: list[str]) -> list[str]:
+    old = file.old_path or file.new_path
+    new = file.new_path or file.old_path
+    lines = [f"diff --git a/{old} b/{new}"]
+    headers = [line for line in file.headers if line.startswith(KEPT_HEADERS)]
+    if file.is_new and not any(line.startswith("new file mode") for line in headers):
+        headers.insert(0, "new file mode 100644")
+    if file.is_deleted and not any(line.startswith("deleted file") for line in headers):
+        headers.insert(0, "deleted file mode 100644")
+    if file.old_path and file.new_path and file.old_path != file.new_path:
+        headers += [f"rename from {file.old_path}", f"rename to {file.new_path}"]
+    lines += headers
+    if hunks:
+        lines.append(f"--- a/{file.old_path}" if file.old_path else "--- /dev/null")
+        lines.append(f"+++ b/{file.new_path}" if file.new_path else "+++ /dev/null")
+    return lines + hunks
+
+
+def repair_patch(
+    patch: Patch,
+    root: Path,
+    files: list[str] | None = None,
+    max_fuzz: int = 2,
+    partial: bool = False,
+) -> RepairResult:
+    """Re-emit ``patch`` as a canonical diff that ``git apply`` accepts.
+
+    Each hunk is located in the real file (see ``apply_hunks``), its
+    ``@@`` ranges are recomputed and its context lines replaced by the
+    file's own; paths are fixed and given ``a/`` / ``b/`` prefixes.
+
+    With ``partial``, hunks that cannot be located are left out of the diff
+    and listed in ``failed``; it is an error only if nothing applies.
+    """
+    result = RepairResult(patch.text)
+    known = set(files) if files is not None else None
+    pending: dict[str, str | None] = {}
+    output: list[str] = []
+    for file in patch.files:
+        if file.binary:
+            result.error = f"{file.path}: binary patch"
+            return result
+        _fix_paths(file, root, known, result)
+        source = file.old_path if file.old_path is not None else file.path
+        try:
+            text = pending[source] if source in pending else read_source(root, source)
+            updated, applied = apply_file(
+                file, text, max_fuzz, result.failed if partial else None
+            )
+        except PatchApplyError as exc:
+            result.error = str(exc)
+            return result
+        crlf = "\r\n" in (text or "")
+        hunks: list[str] = []
+        for number, (hunk, outcome) in enumerate(
+            zip(file.hunks, applied, strict=True), start=1
+        ):
+            if outcome is None:
+                continue
+            canonical = outcome.hunk
+            label = f"{file.path}: hunk #{number}"
+            if hunk.old_start is None:
+                result.note("header", f"{label}: bare @@ -> {canonical.header()}")
+            elif (hunk.old_count, hunk.new_count) != (
+                canonical.old_count,
+                canonical.new_count,
+            ):
+                result.note(
+                    "header", f"{label}: {hunk.header()} -> {canonical.header()}"
+                )
+            elif (hunk.old_start, hunk.new_start) != (
+                canonical.old_start,
+                canonical.new_start,
+            ):
+                result.note("offset", f"{label}: offset {outcome.offset:+d}")
+            if outcome.fuzz:
+                result.note("fuzz", f"{label}: dropped context (fuzz {outcome.fuzz})")
+            if outcome.loose:
+                result.note("whitespace", f"{label}: context whitespace differs")
+            hunks.append(canonical.header())
+            body = canonical.lines
+            if crlf:
+                body = [line if line[:1] == "\\" else line + "\r" for line in body]
+            hunks.extend(body)
+        if file.hunks and not hunks:
+            continue
+        output.extend(_emit(file, hunks))
+        if file.old_path is not None and file.old_path != file.new_path:
+            pending[file.old_path] = None
+        if file.new_path is not None:
+            pending[file.new_path] = updated
+    if not output and result.failed:
+        first = result.failed[0]
+        result.error = f"{first.path}: hunk #{first.number} does not match"
+        return result
+    result.diff = "\n".join(output) + "\n"
+    result.patch = Patch.parse(result.diff)
+    return result
@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from pathlib import Path
+
+from config import settings
+from tools.diff_repair import fix_path
+from tools.patch_model import PatchApplyError, read_source
+
+DIFF = "diff"
+SEARCH_REPLACE = "search_replace"
+FORMATS = (DIFF, SEARCH_REPLACE)
+
+_SEARCH_RE = re.compile(r"^<{5,9} ?SEARCH\s*$")
+_DIVIDER_RE = re.compile(r"^={5,9}\s*$")
+_REPLACE_RE = re.compile(r"^>{5,9} ?REPLACE\s*$")
+
+
+class EditError(RuntimeError):
+    pass
+
+
+@dataclass(slots=True)
+class EditBlock:
+    path: str
+    search: str
+    replace: str
+
+
+def edit_format_for(model: str) -> str:
+    """Output format for ``model``: ``AGENT_HUB_EDIT_FORMATS`` or the default."""
+    for item in settings.edit_formats:
+        name, _, value = item.rpartition("=")
+        if name.strip() == model and value.strip() in FORMATS:
+            return value.strip()
+    return settings.edit_format if settings.edit_format in FORMATS else DIFF
+
+
+def _path_before(lines: list[str], index: int) -> str:
+    for line in reversed(lines[:index]):
+        line = line.strip()
+        if not line or line.startswith("```"):
+            continue
+        if _REPLACE_RE.match(line):
+            return ""
+        path = line.strip("`*#: ")
+        return "" if " " in path else path
+    return ""
+
+
+def parse_edit_blocks(text: str) -> list[EditBlock]:
+    """SEARCH/REPLACE blocks, each preceded by its file path on its own line.
+
+    A block without a path line of its own edits the previous block's file.
+    """
+    lines = [line.removesuffix("\r") for line in text.split("\n")]
+    blocks: list[EditBlock] = []
+    path = ""
+    index = 0
+    while index < len(lines):
+        if not _SEARCH_RE.match(lines[index].strip()):
+            index += 1
+            continue
+        path = _path_before(lines, index) or path
+        if not path:
+            raise EditError(f"SEARCH block #{len(blocks) + 1} has no file path")
+        parts: list[list[str]] = [[], []]
+        part = 0
+        index += 1
+        while index < len(lines):
+            marker = lines[index].strip()
+            if part == 0 and _DIVIDER_RE.match(marker):
+                part = 1
+            elif part == 1 and _REPLACE_RE.match(marker):
+                break
+            else:
+                parts[part].append(lines[index])
+            index += 1
+        else:
+            raise EditError(f"{path}: unterminated SEARCH/REPLACE block")
+        search, replace = ("".join(f"{line}\n" for line in part) for part in parts)
+        blocks.append(EditBlock(path, search, replace))
+        index += 1
+    return blocks
+
+
+def _replace_once(text: str, search: str, replace: str) -> str | None:
+    crlf = "\r\n" in text
+    if crlf:
+        text = text.replace("\r\n", "\n")
+    start = text.find(search)
+    if start >= 0:
+        updated = text[:start] + replace + text[start + len(search) :]
+    else:
+        # Models often drop trailing whitespace from the lines they copy.
+        lines = text.split("\n")
+        stripped = [line.rstrip() for line in lines]
+        wanted = [line.rstrip() for line in search.removesuffix("\n").split("\n")]
+        new = replace.removesuffix("\n").split("\n") if replace else []
+        for position in range(len(lines) - len(wanted) + 1):
+            if stripped[position : position + len(wanted)] == wanted:
+                lines[position : position + len(wanted)] = new
+                break
+        else:
+            return None
+        updated = "\n".join(lines)
+    return updated.replace("\n", "\r\n") if crlf else updated
+
+
+def apply_edit_blocks(
+    blocks: list[EditBlock], root: Path, files: list[str] | None = None
+) -> dict[str, str | None]:
+    """New contents per path after applying ``blocks`` in memory, in order.
+
+    An empty SEARCH creates a file that does not exist yet.
+    """
+    known = set(files) if files is not None else None
+    changes: dict[str, str | None] = {}
+    for number, block in enumerate(blocks, start=1):
+        path = block.path
+        creates = not block.search.strip()
+        # Like diff_repair, never redirect a new file onto an existing one.
+        if path not in changes and not creates:
+            path = fix_path(path, root, known) or path
+        try:
+            text = changes[path] if path in changes else read_source(root, path)
+        except PatchApplyError as exc:
+            raise EditError(str(exc)) from None
+        if creates:
+            if text is not None:
+                raise EditError(f"{path}: exists, SEARCH block #{number} is empty")
+            changes[path] = block.replace
+            continue
+        if text is None:
+            raise EditError(f"{block.path}: does not exist")
+        updated = _replace_once(text, block.search, block.replace)
+        if updated is None:
+            raise EditError(f"{path}: SEARCH block #{number} does not match")
+        changes[path] = updated
+    return changes
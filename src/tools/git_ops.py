@@ -1,7 +1,21 @@
 from __future__ import annotations
 
+import asyncio
+import os
+import re
 import subprocess
+import tempfile
+import time
+import weakref
+from collections import OrderedDict
+from dataclasses import dataclass, field
 from pathlib import Path
+from typing import Any
+
+from config import settings
+from setup_logger import setup_logger
+
+logger = setup_logger(__name__)
 
 
 def run_git(repo_path: Path, args: list[str]) -> subprocess.CompletedProcess[bytes]:
@@ -59,3 +73,355 @@ def list_files(repo_path: Path) -> list[str]:
 
 def push_branch(repo_path: Path, branch: str, remote: str = "origin") -> None:
     run_git(repo_path, ["push", remote, branch])
+
+
+@dataclass(slots=True)
+class GitResult:
+    args: list[str]
+    returncode: int
+    stdout: bytes = b""
+    stderr: bytes = b""
+    duration_ms: float = 0.0
+    timed_out: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.returncode == 0 and not self.timed_out
+
+    @property
+    def error(self) -> str:
+        if self.timed_out:
+            return f"git {self.args[0]} timed out after {self.duration_ms / 1000:.0f}s"
+        return redact(self.stderr.decode("utf-8", "replace").strip())
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "command": redact(" ".join(["git", *self.args])),
+            "returncode": self.returncode,
+            "stderr": self.error,
+            "duration_ms": round(self.duration_ms),
+            "timed_out": self.timed_out,
+        }
+
+
+_slots: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore] = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _git_slots() -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    slots = _slots.get(loop)
+    if slots is None:
+        slots = _slots[loop] = asyncio.Semaphore(settings.git_max_processes)
+    return slots
+
+
+async def git(
+    repo_path: Path,
+    args: list[str],
+    input: bytes | None = None,
+    timeout: float | None = None,
+    env: dict[str, str] | None = None,
+) -> GitResult:
+    """Run git without blocking the event loop.
+
+    At most ``git_max_processes`` git processes run at once per worker. On
+    timeout or cancellation the process is killed.
+    """
+    timeout = timeout if timeout is not None else settings.git_timeout
+    async with _git_slots():
+        started = time.monotonic()
+        process = await asyncio.create_subprocess_exec(
+            "git",
+            *args,
+            cwd=str(repo_path),
+            stdin=(
+                asyncio.subprocess.PIPE
+                if input is not None
+                else asyncio.subprocess.DEVNULL
+            ),
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            env={**os.environ, **env} if env else None,
+        )
+        try:
+            stdout, stderr = await asyncio.wait_for(process.communicate(input), timeout)
+        except TimeoutError:
+            await _kill(process)
+            result = GitResult(
+                args,
+                -1,
+                duration_ms=(time.monotonic() - started) * 1000,
+                timed_out=True,
+            )
+        except asyncio.CancelledError:
+            await _kill(process)
+            raise
+        else:
+            result = GitResult(
+                args,
+                process.returncode or 0,
+                stdout,
+                stderr,
+                (time.monotonic() - started) * 1000,
+            )
+    if not result.ok:
+        logger.warning("git %s failed: %s", args[0], result.error)
+    return result
+
+
+async def _kill(process: asyncio.subprocess.Process) -> None:
+    if process.returncode is None:
+        process.kill()
+    await process.wait()
+
+
+async def git_clone(repo_url: str, dest: Path) -> GitResult:
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    return await git(
+        dest.parent,
+        ["clone", "--depth", "1", repo_url, str(dest)],
+        timeout=settings.git_network_timeout,
+    )
+
+
+async def git_create_branch(repo_path: Path, name: str) -> GitResult:
+    return await git(repo_path, ["checkout", "-b", name])
+
+
+async def git_apply(repo_path: Path, diff: str) -> GitResult:
+    return await git(
+        repo_path,
+        ["apply", "--3way", "--whitespace=fix", "-"],
+        input=diff.encode("utf-8"),
+    )
+
+
+async def git_apply_check(
+    repo_path: Path, diff: str, three_way: bool = False
+) -> GitResult:
+    args = (
+        ["apply", "--3way", "--check", "-"] if three_way else ["apply", "--check", "-"]
+    )
+    return await git(repo_path, args, input=diff.encode("utf-8"))
+
+
+async def git_diff_contents(
+    repo_path: Path, changes: dict[str, str | None]
+) -> GitResult:
+    """``git diff`` from HEAD to ``changes`` (``None`` deletes a path).
+
+    The new contents are staged in a throwaway index file, so the worktree
+    and its real index are left alone.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {"GIT_INDEX_FILE": str(Path(tmp) / "index")}
+        result = await git(repo_path, ["read-tree", "HEAD"], env=env)
+        if not result.ok:
+            return result
+        listed = await git(repo_path, ["ls-tree", "-z", "HEAD", "--", *changes])
+        modes = {}
+        for entry in listed.stdout.decode("utf-8").split("\0"):
+            meta, _, path = entry.partition("\t")
+            if path:
+                modes[path] = meta.split()[0]
+        entries = []
+        for path, text in changes.items():
+            if text is None:
+                entries.append(f"0 {'0' * 40}\t{path}")
+                continue
+            blob = await git(
+                repo_path, ["hash-object", "-w", "--stdin"], input=text.encode("utf-8")
+            )
+            if not blob.ok:
+                return blob
+            sha = blob.stdout.decode().strip()
+            entries.append(f"{modes.get(path, '100644')} {sha}\t{path}")
+        result = await git(
+            repo_path,
+            ["update-index", "--index-info"],
+            input="".join(f"{entry}\n" for entry in entries).encode("utf-8"),
+            env=env,
+        )
+        if not result.ok:
+            return result
+        return await git(
+            repo_path,
+            [
+                "diff",
+                "--cached",
+                "--no-color",
+                "--no-ext-diff",
+                "--src-prefix=a/",
+                "--dst-prefix=b/",
+                "HEAD",
+            ],
+            env=env,
+        )
+
+
+async def git_commit_all(repo_path: Path, message: str) -> GitResult:
+    added = await git(repo_path, ["add", "."])
+    if not added.ok:
+        return added
+    return await git(repo_path, ["commit", "-m", message])
+
+
+async def git_list_files(repo_path: Path) -> list[str]:
+    result = await git(repo_path, ["ls-files"])
+    if not result.ok:
+        return []
+    return result.stdout.decode("utf-8").splitlines()
+
+
+async def git_push(repo_path: Path, branch: str, remote: str = "origin") -> GitResult:
+    return await git(
+        repo_path, ["push", remote, branch], timeout=settings.git_network_timeout
+    )
+
+
+def redact(text: str) -> str:
+    return re.sub(r"://[^/@\s]+@", "://***@", text)
+
+
+@dataclass(slots=True)
+class BlobCache:
+    """LRU of whole blob contents keyed by object SHA, bounded by total bytes.
+
+    Blob SHAs are content addresses, so one cache can be shared by every
+    repository and run on a worker as long as only complete blobs are put.
+    """
+
+    max_bytes: int = 64 * 1024 * 1024
+    size: int = 0
+    hits: int = 0
+    misses: int = 0
+    _items: OrderedDict[str, bytes] = field(default_factory=OrderedDict)
+
+    def get(self, sha: str) -> bytes | None:
+        data = self._items.get(sha)
+        if data is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._items.move_to_end(sha)
+        return data
+
+    def put(self, sha: str, data: bytes) -> None:
+        if len(data) > self.max_bytes:
+            return
+        previous = self._items.pop(sha, None)
+        if previous is not None:
+            self.size -= len(previous)
+        self._items[sha] = data
+        self.size += len(data)
+        while self.size > self.max_bytes:
+            _, evicted = self._items.popitem(last=False)
+            self.size -= len(evicted)
+
+
+@dataclass(slots=True)
+class BlobReader:
+    """Reads blobs through one long-lived ``git cat-file --batch`` process.
+
+    Paths are resolved to blob SHAs with a single ``ls-tree`` of ``rev``.
+    Reads are capped at ``max_bytes``; the rest of a large blob is drained
+    from the pipe without being kept, and truncated blobs are not cached.
+    """
+
+    repo_path: Path
+    rev: str = "HEAD"
+    max_bytes: int = 256 * 1024
+    cache: BlobCache = field(default_factory=BlobCache)
+    paths: dict[str, str] = field(default_factory=dict)
+    _process: asyncio.subprocess.Process | None = None
+    _lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+    async def __aenter__(self) -> BlobReader:
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        await self.close()
+
+    async def start(self) -> None:
+        listing = await git(self.repo_path, ["ls-tree", "-r", "-z", self.rev])
+        self.paths = {}
+        for entry in listing.stdout.decode("utf-8", "replace").split("\0"):
+            meta, _, path = entry.partition("\t")
+            parts = meta.split()
+            if len(parts) == 3 and parts[1] == "blob":
+                self.paths[path] = parts[2]
+        self._process = await asyncio.create_subprocess_exec(
+            "git",
+            "cat-file",
+            "--batch",
+            cwd=str(self.repo_path),
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+        )
+
+    async def close(self) -> None:
+        process, self._process = self._process, None
+        if process is None:
+            return
+        if process.stdin is not None:
+            process.stdin.close()
+        try:
+            await asyncio.wait_for(process.wait(), 5)
+        except TimeoutError:
+            await _kill(process)
+
+    async def read(self, path: str) -> bytes | None:
+        sha = self.paths.get(path)
+        return await self.read_sha(sha) if sha else None
+
+    async def read_sha(self, sha: str) -> bytes | None:
+        data = self.cache.get(sha)
+        if data is not None:
+            return data[: self.max_bytes]
+        if self._process is None:
+            await self.start()
+        async with self._lock:
+            try:
+                reply = await self._request(sha)
+            except BaseException:
+                # A half-read reply would desync the pipe; restart on next read.
+                process, self._process = self._process, None
+                if process is not None:
+                    await _kill(process)
+                raise
+        if reply is None:
+            return None
+        data, size = reply
+        if len(data) == size:
+            self.cache.put(sha, data)
+        return data
+
+    async def read_text(self, path: str) -> str | None:
+        data = await self.read(path)
+        if data is None or b"\0" in data[:8000]:
+            return None
+        return data.decode("utf-8", "replace")
+
+    async def _request(self, sha: str) -> tuple[bytes, int] | None:
+        process = self._process
+        if process is None or process.stdin is None or process.stdout is None:
+            return None
+        process.stdin.write(f"{sha}\n".encode())
+        await process.stdin.drain()
+        header = (await process.stdout.readline()).decode().split()
+        if len(header) != 3:
+            return None
+        size = int(header[2])
+        data = await process.stdout.readexactly(min(size, self.max_bytes))
+        remaining = size - len(data)
+        while remaining > 0:
+            chunk = await process.stdout.read(min(remaining, 65536))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+        await process.stdout.readexactly(1)
+        return data, size
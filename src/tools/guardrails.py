@@ -3,7 +3,8 @@ from __future__ import annotations
 from dataclasses import dataclass
 
 from config import settings
-from tools.diff_ops import diff_stats, hash_diff, is_noop, is_same_hash
+from tools.diff_ops import is_noop, is_same_hash
+from tools.patch_model import Patch
 
 
 @dataclass(slots=True)
@@ -12,17 +13,19 @@ class GuardrailResult:
     reason: str
 
 
-def check_noop(diff: str, previous_hash: str | None) -> GuardrailResult:
-    if is_noop(diff):
+def check_noop(diff: str | Patch, previous_hash: str | None) -> GuardrailResult:
+    patch = diff if isinstance(diff, Patch) else Patch.parse(diff)
+    if is_noop(patch.text):
         return GuardrailResult(False, "diff is empty")
-    current_hash = hash_diff(diff)
+    current_hash = patch.hash()
     if previous_hash and is_same_hash(previous_hash, current_hash):
         return GuardrailResult(False, "diff hash is identical")
     return GuardrailResult(True, "ok")
 
 
-def check_scope(diff: str) -> GuardrailResult:
-    files, lines = diff_stats(diff)
+def check_scope(diff: str | Patch) -> GuardrailResult:
+    patch = diff if isinstance(diff, Patch) else Patch.parse(diff)
+    files, lines = patch.stats()
     if files > settings.max_patch_files:
         return GuardrailResult(False, "too many files touched")
     if lines > settings.max_patch_lines:
@@ -0,0 +1,497 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from difflib import SequenceMatcher
+from pathlib import Path
+
+from tools.diff_ops import hash_diff
+
+_HUNK_RE = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@ ?(.*)$")
+_BODY = (" ", "+", "-", "\\")
+
+
+class PatchApplyError(RuntimeError):
+    pass
+
+
+def _range(start: int | None, count: int | None) -> str:
+    # git leaves out a count of one.
+    return str(start) if count == 1 else f"{start},{count}"
+
+
+@dataclass(slots=True)
+class Hunk:
+    """One ``@@`` block; the declared ranges are ``None`` for a bare ``@@``."""
+
+    old_start: int | None = None
+    old_count: int | None = None
+    new_start: int | None = None
+    new_count: int | None = None
+    section: str = ""
+    lines: list[str] = field(default_factory=list)
+
+    @property
+    def added(self) -> int:
+        return sum(1 for line in self.lines if line[:1] == "+")
+
+    @property
+    def removed(self) -> int:
+        return sum(1 for line in self.lines if line[:1] == "-")
+
+    def header(self) -> str:
+        if self.old_start is None:
+            return "@@"
+        old = _range(self.old_start, self.old_count)
+        new = _range(self.new_start, self.new_count)
+        return f"@@ -{old} +{new} @@" + (f" {self.section}" if self.section else "")
+
+    def old_lines(self) -> list[str]:
+        return [line[1:] for line in self.lines if line[:1] in " -"]
+
+    def new_lines(self) -> list[str]:
+        return [line[1:] for line in self.lines if line[:1] in " +"]
+
+    def edge_context(self) -> tuple[int, int]:
+        """Context lines before the first and after the last change."""
+        changes = [i for i, line in enumerate(self.lines) if line[:1] in "+-"]
+        if not changes:
+            return 0, 0
+        lead = sum(1 for line in self.lines[: changes[0]] if line[:1] == " ")
+        trail = sum(1 for line in self.lines[changes[-1] + 1 :] if line[:1] == " ")
+        return lead, trail
+
+    def missing_newline(self) -> tuple[bool, bool]:
+        """Whether the old / new side ends without a trailing newline."""
+        old = new = False
+        for previous, line in zip(self.lines, self.lines[1:], strict=False):
+            if line[:1] == "\\":
+                old = old or previous[:1] in " -"
+                new = new or previous[:1] in " +"
+        return old, new
+
+    def _close(self) -> None:
+        # Editors and models drop the space on blank context lines; a blank
+        # line at the very end is only context if the header says so.
+        while self.lines and self.lines[-1] == "":
+            declared = self.old_count
+            if declared is not None and len(self.old_lines()) <= declared:
+                break
+            self.lines.pop()
+        self.lines = [line or " " for line in self.lines]
+
+
+@dataclass(slots=True)
+class FilePatch:
+    """Changes to one file; a ``None`` path stands for ``/dev/null``."""
+
+    old_path: str | None = None
+    new_path: str | None = None
+    headers: list[str] = field(default_factory=list)
+    hunks: list[Hunk] = field(default_factory=list)
+    binary: bool = False
+
+    @property
+    def path(self) -> str:
+        return self.new_path or self.old_path or ""
+
+    @property
+    def is_new(self) -> bool:
+        return self.old_path is None
+
+    @property
+    def is_deleted(self) -> bool:
+        return self.new_path is None
+
+    @property
+    def added(self) -> int:
+        return sum(hunk.added for hunk in self.hunks)
+
+    @property
+    def removed(self) -> int:
+        return sum(hunk.removed for hunk in self.hunks)
+
+
+def _strip_prefix(path: str, prefix: str) -> str | None:
+    path = path.split("\t", 1)[0].strip()
+    if path == "/dev/null":
+        return None
+    return path[len(prefix) :] if path.startswith(prefix) else path
+
+
+@dataclass(slots=True)
+class Patch:
+    """A unified diff parsed in one pass over its lines."""
+
+    text: str
+    files: list[FilePatch] = field(default_factory=list)
+
+    @classmethod
+    def parse(cls, text: str) -> Patch:
+        patch = cls(text)
+        # CRLF files are restored by the applier, so diff lines are kept LF.
+        lines = [line.removesuffix("\r") for line in text.split("\n")]
+        if lines and lines[-1] == "":
+            lines.pop()
+        current: FilePatch | None = None
+        hunk: Hunk | None = None
+        for number, line in enumerate(lines):
+            following = lines[number + 1] if number + 1 < len(lines) else ""
+            file_header = line.startswith("--- ") and following.startswith("+++ ")
+            if hunk is not None:
+                if (line[:1] in _BODY or line == "") and not file_header:
+                    hunk.lines.append(line)
+                    continue
+                hunk._close()
+                hunk = None
+            if line.startswith("diff --git "):
+                current = FilePatch()
+                patch.files.append(current)
+                old, _, new = line[len("diff --git ") :].rpartition(" b/")
+                current.old_path = _strip_prefix(old, "a/")
+                current.new_path = new
+            elif file_header:
+                if current is None or current.hunks:
+                    current = FilePatch()
+                    patch.files.append(current)
+                current.old_path = _strip_prefix(line[4:], "a/")
+            elif line.startswith("+++ ") and current is not None:
+                current.new_path = _strip_prefix(line[4:], "b/")
+            elif line.startswith("@@") and current is not None:
+                match = _HUNK_RE.match(line)
+                if match:
+                    old_start, old_count, new_start, new_count, section = match.groups()
+                    hunk = Hunk(
+                        int(old_start),
+                        int(old_count) if old_count is not None else 1,
+                        int(new_start),
+                        int(new_count) if new_count is not None else 1,
+                        section,
+                    )
+                else:
+                    hunk = Hunk()
+                current.hunks.append(hunk)
+            elif current is not None:
+                current.headers.append(line)
+                if line.startswith(("Binary files ", "GIT binary patch")):
+                    current.binary = True
+                elif line.startswith("rename from "):
+                    current.old_path = line[len("rename from ") :]
+                elif line.startswith("rename to "):
+                    current.new_path = line[len("rename to ") :]
+                elif line.startswith("new file mode"):
+                    current.old_path = None
+                elif line.startswith("deleted file mode"):
+                    current.new_path = None
+        if hunk is not None:
+            hunk._close()
+        return patch
+
+    @property
+    def hunk_count(self) -> int:
+        return sum(len(item.hunks) for item in self.files)
+
+    @property
+    def binary(self) -> bool:
+        return any(item.binary for item in self.files)
+
+    def stats(self) -> tuple[int, int]:
+        """Files touched and lines added plus removed, like ``diff_stats``."""
+        lines = sum(item.added + item.removed for item in self.files)
+        return len(self.files), lines
+
+    def hash(self) -> str:
+        return hash_diff(self.text)
+
+
+@dataclass(slots=True)
+class HunkResult:
+    """Where a hunk landed; ``hunk`` is rewritten to match the file exactly."""
+
+    line: int
+    offset: int
+    fuzz: int
+    loose: bool
+    hunk: Hunk
+
+
+@dataclass(slots=True)
+class HunkFailure:
+    """A hunk that did not apply, with the file lines where it should have."""
+
+    path: str
+    number: int
+    hunk: Hunk
+    context: str
+
+    def as_dict(self) -> dict[str, object]:
+        return {
+            "path": self.path,
+            "number": self.number,
+            "hunk": "\n".join([self.hunk.header(), *self.hunk.lines]),
+            "context": self.context,
+        }
+
+
+def _closest(lines: list[str], old: list[str], default: int) -> int:
+    """Where ``old`` most likely belongs: its most distinctive line's best match."""
+    probe = max(old, key=lambda line: len(line.strip()), default="").strip()
+    if not probe:
+        return default
+    best, score = default, 0.6
+    for index, line in enumerate(lines):
+        matcher = SequenceMatcher(None, probe, line.strip())
+        if matcher.real_quick_ratio() <= score or matcher.quick_ratio() <= score:
+            continue
+        ratio = matcher.ratio()
+        if ratio > score:
+            best, score = index, ratio
+    if best == default:
+        return default
+    offset = next(i for i, line in enumerate(old) if line.strip() == probe)
+    return max(best - offset, 0)
+
+
+def _failure(
+    lines: list[str], hunk: Hunk, number: int, expected: int, radius: int = 8
+) -> HunkFailure:
+    old = hunk.old_lines()
+    at = _closest(lines, old, expected)
+    start = max(at - radius, 0)
+    end = min(at + len(old) + radius, len(lines))
+    width = len(str(end))
+    context = "\n".join(
+        f"{index + 1:>{width}}: {lines[index]}" for index in range(start, end)
+    )
+    return HunkFailure("", number, hunk, context)
+
+
+def _positions(expected: int, low: int, high: int):
+    """``low..high`` ordered by distance from ``expected``."""
+    expected = min(max(expected, low), high)
+    yield expected
+    for step in range(1, high - low + 1):
+        if expected - step >= low:
+            yield expected - step
+        if expected + step <= high:
+            yield expected + step
+        if expected - step < low and expected + step > high:
+            return
+
+
+def _locate(
+    source: list[str],
+    stripped: list[str],
+    old: list[str],
+    expected: int,
+    low: int,
+) -> tuple[int, bool] | None:
+    """Nearest position of ``old``, and whether whitespace had to be ignored."""
+    high = len(source) - len(old)
+    if high < low:
+        return None
+    size = len(old)
+    for position in _positions(expected, low, high):
+        if source[position : position + size] == old:
+            return position, False
+    loose = [line.rstrip() for line in old]
+    for position in _positions(expected, low, high):
+        if stripped[position : position + size] == loose:
+            return position, True
+    return None
+
+
+def _canonical(body: list[str], matched: list[str]) -> list[str]:
+    """Hunk body with context and removed lines exactly as the file has them."""
+    lines: list[str] = []
+    index = 0
+    for line in body:
+        if line[:1] == "+":
+            lines.append(line)
+        else:
+            lines.append(line[:1] + matched[index])
+            index += 1
+    return lines
+
+
+def _mark_missing_newline(lines: list[str], old: bool, new: bool) -> list[str]:
+    marker = "\\ No newline at end of file"
+    last_old = max((i for i, line in enumerate(lines) if line[:1] in " -"), default=-1)
+    last_new = max((i for i, line in enumerate(lines) if line[:1] in " +"), default=-1)
+    marks = {i for i, wanted in ((last_old, old), (last_new, new)) if wanted and i >= 0}
+    marked: list[str] = []
+    for index, line in enumerate(lines):
+        marked.append(line)
+        if index in marks:
+            marked.append(marker)
+    return marked
+
+
+def apply_hunks(
+    source: list[str],
+    hunks: list[Hunk],
+    max_fuzz: int = 2,
+    failures: list[HunkFailure] | None = None,
+) -> tuple[list[str], list[HunkResult | None]]:
+    """Apply ``hunks`` in order to ``source`` lines, ``patch(1)``-style.
+
+    Each hunk is looked up nearest to its declared position (anywhere after
+    the previous hunk for a bare ``@@``), first exactly and then ignoring
+    trailing whitespace; failing that, up to ``max_fuzz`` outer context lines
+    are dropped and the search repeated.
+
+    With a ``failures`` list, hunks that do not match are recorded there (and
+    as ``None`` results) instead of raising, and the others still apply.
+    """
+    result = list(source)
+    stripped = [line.rstrip() for line in result]
+    applied: list[HunkResult | None] = []
+    delta = offset = floor = 0
+    for number, hunk in enumerate(hunks, start=1):
+        body = [line for line in hunk.lines if line[:1] != "\\"]
+        old = hunk.old_lines()
+        base = None if hunk.old_start is None else hunk.old_start - 1 + delta
+        fuzz = 0
+        loose = False
+        if not old:
+            position = len(result) if base is None else base + (hunk.old_count == 0)
+            position = min(max(position, floor), len(result))
+        else:
+            expected = floor if base is None else base + offset
+            lead, trail = hunk.edge_context()
+            position = None
+            tried: set[tuple[int, int]] = set()
+            for fuzz in range(max_fuzz + 1):
+                cut = (min(fuzz, lead), min(fuzz, trail))
+                if cut in tried:
+                    continue
+                tried.add(cut)
+                part = old[cut[0] : len(old) - cut[1]]
+                found = _locate(result, stripped, part, expected + cut[0], floor)
+                if found is not None:
+                    position, loose = found
+                    body = body[cut[0] : len(body) - cut[1]]
+                    if base is not None:
+                        offset = position - cut[0] - base
+                    break
+            if position is None:
+                if failures is None:
+                    raise PatchApplyError(f"hunk #{number} does not match")
+                failures.append(_failure(result, hunk, number, expected))
+                applied.append(None)
+                continue
+        size = sum(1 for line in body if line[:1] != "+")
+        lines = _canonical(body, result[position : position + size])
+        new = [line[1:] for line in lines if line[:1] != "-"]
+        if position + size == len(result):
+            lines = _mark_missing_newline(lines, *hunk.missing_newline())
+        old_at = position - delta
+        canonical = Hunk(
+            old_at + 1 if size else old_at,
+            size,
+            position + 1 if new else position,
+            len(new),
+            hunk.section,
+            lines,
+        )
+        result[position : position + size] = new
+        stripped[position : position + size] = [line.rstrip() for line in new]
+        delta += len(new) - size
+        floor = position + len(new)
+        applied.append(HunkResult(position + 1, offset, fuzz, loose, canonical))
+    return result, applied
+
+
+def apply_file(
+    file: FilePatch,
+    text: str | None,
+    max_fuzz: int = 2,
+    failures: list[HunkFailure] | None = None,
+) -> tuple[str | None, list[HunkResult | None]]:
+    """New contents of ``file`` given its current ``text`` (``None``: absent)."""
+    if file.binary:
+        raise PatchApplyError(f"{file.path}: binary patch")
+    if file.is_new and text is not None and text:
+        raise PatchApplyError(f"{file.path}: already exists")
+    if not file.is_new and text is None:
+        raise PatchApplyError(f"{file.path}: does not exist")
+    text = text or ""
+    crlf = "\r\n" in text
+    if crlf:
+        text = text.replace("\r\n", "\n")
+    had_newline = text.endswith("\n") or not text
+    lines = text.split("\n")
+    if lines and lines[-1] == "":
+        lines.pop()
+    found: list[HunkFailure] | None = [] if failures is not None else None
+    try:
+        lines, results = apply_hunks(lines, file.hunks, max_fuzz, found)
+    except PatchApplyError as exc:
+        raise PatchApplyError(f"{file.path}: {exc}") from None
+    for failure in found or []:
+        failure.path = file.path
+        failures.append(failure)
+    if file.is_deleted:
+        if lines:
+            raise PatchApplyError(f"{file.path}: deletion leaves content behind")
+        return None, results
+    newline = had_newline
+    for hunk, result in zip(file.hunks, results, strict=True):
+        if result is None:
+            continue
+        old_missing, new_missing = hunk.missing_newline()
+        if new_missing:
+            newline = False
+        elif old_missing:
+            newline = True
+    output = "\n".join(lines) + ("\n" if newline and lines else "")
+    return (output.replace("\n", "\r\n") if crlf else output), results
+
+
+def _resolve(root: Path, path: str) -> Path:
+    target = (root / path).resolve()
+    if not target.is_relative_to(root.resolve()):
+        raise PatchApplyError(f"{path}: outside of the repository")
+    return target
+
+
+def read_source(root: Path, path: str) -> str | None:
+    target = _resolve(root, path)
+    if not target.is_file():
+        return None
+    try:
+        return target.read_bytes().decode("utf-8")
+    except UnicodeDecodeError:
+        raise PatchApplyError(f"{path}: not UTF-8 text") from None
+
+
+def apply_patch(patch: Patch, root: Path, max_fuzz: int = 2) -> dict[str, str | None]:
+    """Apply ``patch`` to the worktree at ``root`` in memory.
+
+    Returns the new contents per path (``None`` for deletions) without
+    touching the disk; raises ``PatchApplyError`` on the first failure.
+    """
+    changes: dict[str, str | None] = {}
+    for file in patch.files:
+        source_path = file.old_path if file.old_path is not None else file.path
+        if source_path in changes:
+            text = changes[source_path]
+        else:
+            text = read_source(root, source_path)
+        updated, _ = apply_file(file, text, max_fuzz)
+        if file.old_path is not None and file.old_path != file.new_path:
+            changes[file.old_path] = None
+        if file.new_path is not None:
+            _resolve(root, file.new_path)
+            changes[file.new_path] = updated
+    return changes
+
+
+def write_changes(root: Path, changes: dict[str, str | None]) -> None:
+    for path, text in changes.items():
+        target = _resolve(root, path)
+        if text is None:
+            target.unlink(missing_ok=True)
+            continue
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_bytes(text.encode("utf-8"))
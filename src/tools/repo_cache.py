@@ -0,0 +1,227 @@
+from __future__ import annotations
+
+import asyncio
+import fcntl
+import os
+import re
+import shutil
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from config import settings
+from setup_logger import setup_logger
+from tools.git_ops import GitResult, git
+
+logger = setup_logger(__name__)
+
+# Remote branches live under refs/remotes so fetch --prune never touches the
+# run branches that worktrees create under refs/heads.
+MIRROR_REFSPEC = "+refs/heads/*:refs/remotes/origin/*"
+DEFAULT_REF = "refs/remotes/origin/HEAD"
+
+
+class RepoCacheError(RuntimeError):
+    pass
+
+
+def mirror_name(repo_url: str) -> str:
+    """Filesystem-safe, credential-free name for a remote."""
+    url = re.sub(r"^[a-z+]+://", "", repo_url.strip())
+    url = url.split("@", 1)[-1]
+    url = url.removesuffix("/").removesuffix(".git")
+    return re.sub(r"[^A-Za-z0-9._-]+", "_", url)
+
+
+def dir_size(path: Path) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(root, name)).st_size
+            except OSError:
+                pass
+    return total
+
+
+@dataclass(slots=True)
+class RepoCache:
+    """Bare mirrors per remote plus a throwaway ``git worktree`` per run.
+
+    Mirrors keep a credential-less ``origin``; fetches pass the authenticated
+    URL explicitly so tokens never land on disk. Mirror changes are serialized
+    with a file lock, so workers sharing ``root`` do not race. Once the mirrors
+    grow past ``max_bytes`` the least recently used idle ones are evicted; a
+    worktree holds a shared lock on its mirror for its whole life, so no
+    worker evicts a mirror another one is using.
+    """
+
+    root: Path
+    max_bytes: int = 5 * 1024**3
+    _locks: dict[str, asyncio.Lock] = field(default_factory=dict)
+    _active: dict[str, int] = field(default_factory=dict)
+
+    @property
+    def mirrors_dir(self) -> Path:
+        return self.root / "mirrors"
+
+    @property
+    def worktrees_dir(self) -> Path:
+        return self.root / "worktrees"
+
+    def mirror_path(self, repo_url: str) -> Path:
+        return self.mirrors_dir / f"{mirror_name(repo_url)}.git"
+
+    @asynccontextmanager
+    async def _lock(self, name: str) -> AsyncIterator[None]:
+        async with self._locks.setdefault(name, asyncio.Lock()):
+            path = self.root / "locks" / f"{name}.lock"
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with path.open("a") as handle:
+                await asyncio.to_thread(fcntl.flock, handle, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(handle, fcntl.LOCK_UN)
+
+    def _use_path(self, name: str) -> Path:
+        path = self.root / "locks" / f"{name}.use"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        return path
+
+    @asynccontextmanager
+    async def _in_use(self, name: str) -> AsyncIterator[None]:
+        with self._use_path(name).open("a") as handle:
+            await asyncio.to_thread(fcntl.flock, handle, fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+    def _evict_unused(self, mirror: Path) -> bool:
+        """Remove ``mirror`` unless a worktree in any process still uses it."""
+        with self._use_path(mirror.name).open("a") as handle:
+            try:
+                fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return False
+            shutil.rmtree(mirror, True)
+            return True
+
+    async def sync(self, repo_url: str, fetch_url: str | None = None) -> Path:
+        """Create or incrementally refresh the mirror for ``repo_url``."""
+        fetch_url = fetch_url or repo_url
+        mirror = self.mirror_path(repo_url)
+        async with self._lock(mirror.name):
+            if not (mirror / "HEAD").exists():
+                await asyncio.to_thread(shutil.rmtree, mirror, True)
+                mirror.parent.mkdir(parents=True, exist_ok=True)
+                await self._git(mirror.parent, ["init", "--bare", "-q", str(mirror)])
+                await self._git(mirror, ["remote", "add", "origin", repo_url])
+                await self._git(
+                    mirror, ["config", "remote.origin.fetch", MIRROR_REFSPEC]
+                )
+            await self._git(
+                mirror,
+                ["fetch", "--prune", fetch_url, MIRROR_REFSPEC],
+                settings.git_network_timeout,
+            )
+            await self._refresh_head(mirror, fetch_url)
+            os.utime(mirror)
+        return mirror
+
+    async def _refresh_head(self, mirror: Path, fetch_url: str) -> None:
+        head = await git(mirror, ["ls-remote", "--symref", fetch_url, "HEAD"])
+        for line in head.stdout.decode("utf-8").splitlines():
+            if line.startswith("ref: "):
+                branch = line.split()[1].removeprefix("refs/heads/")
+                await git(
+                    mirror,
+                    ["symbolic-ref", DEFAULT_REF, f"refs/remotes/origin/{branch}"],
+                )
+                return
+
+    @asynccontextmanager
+    async def worktree(
+        self,
+        repo_url: str,
+        name: str,
+        fetch_url: str | None = None,
+        ref: str = DEFAULT_REF,
+    ) -> AsyncIterator[Path]:
+        """Check out ``ref`` into a fresh worktree that is removed on exit.
+
+        A branch created in the worktree is deleted from the mirror with it.
+        """
+        mirror = self.mirror_path(repo_url)
+        self._active[mirror.name] = self._active.get(mirror.name, 0) + 1
+        path = self.worktrees_dir / name
+        try:
+            async with self._in_use(mirror.name):
+                try:
+                    await self.sync(repo_url, fetch_url)
+                    async with self._lock(mirror.name):
+                        await asyncio.to_thread(shutil.rmtree, path, True)
+                        path.parent.mkdir(parents=True, exist_ok=True)
+                        await self._git(
+                            mirror, ["worktree", "add", "--detach", str(path), ref]
+                        )
+                    yield path
+                finally:
+                    await self._remove_worktree(mirror, path)
+        finally:
+            self._active[mirror.name] -= 1
+            await self.enforce_quota()
+
+    async def _remove_worktree(self, mirror: Path, path: Path) -> None:
+        async with self._lock(mirror.name):
+            branch = None
+            if path.exists():
+                branch = await git(path, ["symbolic-ref", "-q", "HEAD"])
+            await git(mirror, ["worktree", "remove", "--force", str(path)])
+            if branch is not None and branch.ok and branch.stdout.strip():
+                await git(
+                    mirror,
+                    ["update-ref", "-d", branch.stdout.decode("utf-8").strip()],
+                )
+            await asyncio.to_thread(shutil.rmtree, path, True)
+            await git(mirror, ["worktree", "prune"])
+
+    async def enforce_quota(self) -> list[str]:
+        """Evict idle mirrors, oldest use first, until under ``max_bytes``."""
+        sizes = await asyncio.to_thread(self._mirror_sizes)
+        total = sum(size for _, _, size in sizes)
+        evicted: list[str] = []
+        for _, mirror, size in sorted(sizes):
+            if total <= self.max_bytes:
+                break
+            if self._active.get(mirror.name):
+                continue
+            async with self._lock(mirror.name):
+                if self._active.get(mirror.name):
+                    continue
+                if not await asyncio.to_thread(self._evict_unused, mirror):
+                    continue
+            total -= size
+            evicted.append(mirror.name)
+            logger.info("Repo cache evicted %s (%d bytes)", mirror.name, size)
+        return evicted
+
+    def _mirror_sizes(self) -> list[tuple[float, Path, int]]:
+        if not self.mirrors_dir.exists():
+            return []
+        return [
+            (mirror.stat().st_mtime, mirror, dir_size(mirror))
+            for mirror in self.mirrors_dir.iterdir()
+            if mirror.is_dir()
+        ]
+
+    @staticmethod
+    async def _git(
+        cwd: Path, args: list[str], timeout: float | None = None
+    ) -> GitResult:
+        result = await git(cwd, args, timeout=timeout)
+        if not result.ok:
+            raise RepoCacheError(f"git {args[0]} failed: {result.error}")
+        return result
@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+import mmap
+import re
+from dataclasses import dataclass
+from pathlib import Path
+
+from llm.packing import estimate_tokens
+
+
+@dataclass(slots=True)
+class Window:
+    """Byte range ``[start, end)`` of a file covering whole lines."""
+
+    path: str
+    start: int
+    end: int
+    first_line: int
+    hits: int = 1
+
+    def render(self, data: bytes | mmap.mmap) -> str:
+        text = data[self.start : self.end].decode("utf-8", "replace")
+        lines = text.rstrip("\n").split("\n")
+        width = len(str(self.first_line + len(lines)))
+        body = "\n".join(
+            f"{self.first_line + offset:>{width}}: {line}"
+            for offset, line in enumerate(lines)
+        )
+        last = self.first_line + len(lines) - 1
+        return f"## {self.path}:{self.first_line}-{last}\n{body}"
+
+
+def _open(path: Path) -> mmap.mmap | None:
+    try:
+        with path.open("rb") as handle:
+            if handle.seek(0, 2) == 0:
+                return None
+            return mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+
+def _is_binary(data: mmap.mmap) -> bool:
+    return b"\0" in data[:8000]
+
+
+def _line_start(data: mmap.mmap, pos: int, back: int) -> int:
+    for _ in range(back + 1):
+        found = data.rfind(b"\n", 0, pos)
+        if found < 0:
+            return 0
+        pos = found
+    return pos + 1
+
+
+def _line_end(data: mmap.mmap, pos: int, forward: int, limit: int) -> int:
+    for _ in range(forward + 1):
+        found = data.find(b"\n", pos, limit)
+        if found < 0:
+            return limit
+        pos = found + 1
+    return pos
+
+
+def find_windows(
+    path: Path,
+    rel: str,
+    pattern: re.Pattern[bytes] | None,
+    lines: list[int] | None = None,
+    before: int = 6,
+    after: int = 10,
+    max_scan_bytes: int = 2 * 1024 * 1024,
+    max_hits: int = 20,
+    max_window_bytes: int = 16 * 1024,
+) -> list[Window]:
+    """Merged windows around regex matches and explicit 1-based ``lines``.
+
+    Only the first ``max_scan_bytes`` of the file are searched and a window
+    never spans more than ``max_window_bytes``; the file is memory-mapped, so
+    nothing outside the returned windows is decoded.
+    With neither matches nor lines the head of the file is returned.
+    """
+    data = _open(path)
+    if data is None:
+        return []
+    with data:
+        if _is_binary(data):
+            return []
+        limit = min(len(data), max_scan_bytes)
+        anchors: list[int] = []
+        if pattern is not None:
+            for match in pattern.finditer(data, 0, limit):
+                anchors.append(match.start())
+                if len(anchors) >= max_hits:
+                    break
+        if lines:
+            anchors.extend(_line_offsets(data, sorted(set(lines)), limit))
+        if not anchors:
+            anchors = [0]
+            before, after = 0, before + after
+        anchors.sort()
+        windows: list[Window] = []
+        line = 1
+        counted = 0
+        for anchor in anchors:
+            start = _line_start(data, anchor, before)
+            end = _line_end(data, anchor, after, len(data))
+            end = min(end, max(start, anchor) + max_window_bytes)
+            if windows and start <= windows[-1].end:
+                windows[-1].end = max(windows[-1].end, end)
+                windows[-1].hits += 1
+                continue
+            line += data[counted:start].count(b"\n")
+            counted = start
+            windows.append(Window(rel, start, end, line))
+        return windows
+
+
+def _line_offsets(data: mmap.mmap, lines: list[int], limit: int) -> list[int]:
+    offsets: list[int] = []
+    pos = 0
+    current = 1
+    for target in lines:
+        while current < target:
+            found = data.find(b"\n", pos, limit)
+            if found < 0:
+                return offsets
+            pos = found + 1
+            current += 1
+        offsets.append(pos)
+    return offsets
+
+
+def term_pattern(terms: list[str]) -> re.Pattern[bytes] | None:
+    terms = [term for term in terms if len(term) >= 3]
+    if not terms:
+        return None
+    alternatives = "|".join(re.escape(term) for term in terms)
+    return re.compile(alternatives.encode(), re.IGNORECASE)
+
+
+def build_snippets(
+    repo_path: Path,
+    paths: list[str],
+    terms: list[str],
+    budget_tokens: int,
+    positions: dict[str, list[int]] | None = None,
+) -> str:
+    """Windows from ``paths`` (best first) until ``budget_tokens`` is spent.
+
+    Each file's windows are ranked by match count; a window that does not
+    fit is skipped in favour of smaller ones further down.
+    """
+    pattern = term_pattern(terms)
+    positions = positions or {}
+    sections: list[str] = []
+    used = 0
+    for rel in paths:
+        full = repo_path / rel
+        windows = find_windows(full, rel, pattern, positions.get(rel))
+        if not windows:
+            continue
+        data = _open(full)
+        if data is None:
+            continue
+        chosen: list[tuple[int, str]] = []
+        with data:
+            for window in sorted(windows, key=lambda item: -item.hits):
+                text = window.render(data)
+                cost = estimate_tokens(text)
+                if used + cost > budget_tokens:
+                    continue
+                chosen.append((window.start, text))
+                used += cost
+        sections.extend(text for _, text in sorted(chosen))
+        if used >= budget_tokens:
+            break
+    return "\n\n".join(sections)
@@ -0,0 +1,287 @@
+from __future__ import annotations
+
+import ast
+import asyncio
+import re
+from collections import OrderedDict
+from concurrent.futures import Executor
+from dataclasses import dataclass, field
+
+from llm.packing import estimate_tokens
+from tools.git_ops import BlobReader
+
+_IDENT_RE = re.compile(r"[A-Za-z_][A-Za-z0-9_]{2,}")
+
+
+@dataclass(slots=True)
+class Symbol:
+    name: str
+    kind: str
+    start: int
+    end: int
+
+    @property
+    def short_name(self) -> str:
+        return self.name.rsplit(".", 1)[-1]
+
+
+@dataclass(slots=True)
+class FileSymbols:
+    """What one Python blob defines, references and imports.
+
+    Paths are deliberately absent so results can be shared between every
+    file (and repository) with the same blob SHA.
+    """
+
+    definitions: list[Symbol] = field(default_factory=list)
+    references: dict[str, list[int]] = field(default_factory=dict)
+    imports: list[str] = field(default_factory=list)
+
+    def enclosing(self, line: int) -> Symbol | None:
+        best = None
+        for symbol in self.definitions:
+            if symbol.start <= line <= symbol.end:
+                if best is None or symbol.start >= best.start:
+                    best = symbol
+        return best
+
+
+class _Visitor(ast.NodeVisitor):
+    def __init__(self) -> None:
+        self.result = FileSymbols()
+        self.scope: list[tuple[str, str]] = []
+
+    def _define(self, node: ast.AST, kind: str) -> None:
+        name = ".".join([*(part for part, _ in self.scope), node.name])
+        decorators = getattr(node, "decorator_list", [])
+        start = min([node.lineno, *(item.lineno for item in decorators)])
+        end = getattr(node, "end_lineno", None) or node.lineno
+        self.result.definitions.append(Symbol(name, kind, start, end))
+        self.scope.append((node.name, kind))
+        self.generic_visit(node)
+        self.scope.pop()
+
+    def visit_ClassDef(self, node: ast.ClassDef) -> None:
+        self._define(node, "class")
+
+    def visit_FunctionDef(self, node: ast.FunctionDef) -> None:
+        in_class = bool(self.scope) and self.scope[-1][1] == "class"
+        self._define(node, "method" if in_class else "function")
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    def visit_Name(self, node: ast.Name) -> None:
+        if isinstance(node.ctx, ast.Load):
+            self._reference(node.id, node.lineno)
+
+    def visit_Attribute(self, node: ast.Attribute) -> None:
+        if isinstance(node.ctx, ast.Load):
+            self._reference(node.attr, node.lineno)
+        self.generic_visit(node)
+
+    def visit_Import(self, node: ast.Import) -> None:
+        self.result.imports.extend(alias.name for alias in node.names)
+
+    def visit_ImportFrom(self, node: ast.ImportFrom) -> None:
+        module = "." * node.level + (node.module or "")
+        self.result.imports.append(module)
+        for alias in node.names:
+            self._reference(alias.name, node.lineno)
+
+    def _reference(self, name: str, line: int) -> None:
+        lines = self.result.references.setdefault(name, [])
+        if not lines or lines[-1] != line:
+            lines.append(line)
+
+
+def parse_source(text: str) -> FileSymbols | None:
+    try:
+        tree = ast.parse(text)
+    except (SyntaxError, ValueError):
+        return None
+    visitor = _Visitor()
+    visitor.visit(tree)
+    return visitor.result
+
+
+def parse_many(sources: list[tuple[str, str]]) -> list[tuple[str, FileSymbols | None]]:
+    """Process-pool entry point: ``(sha, text)`` pairs to parsed symbols."""
+    return [(sha, parse_source(text)) for sha, text in sources]
+
+
+def module_name(path: str) -> str:
+    module = path.removesuffix(".py").replace("/", ".")
+    return module.removesuffix(".__init__")
+
+
+@dataclass(slots=True)
+class SymbolCache:
+    """Parsed files keyed by blob SHA, shared across runs on a worker."""
+
+    max_entries: int = 50_000
+    _items: OrderedDict[str, FileSymbols | None] = field(default_factory=OrderedDict)
+
+    def get(self, sha: str) -> tuple[bool, FileSymbols | None]:
+        if sha not in self._items:
+            return False, None
+        self._items.move_to_end(sha)
+        return True, self._items[sha]
+
+    def put(self, sha: str, symbols: FileSymbols | None) -> None:
+        self._items[sha] = symbols
+        self._items.move_to_end(sha)
+        while len(self._items) > self.max_entries:
+            self._items.popitem(last=False)
+
+
+@dataclass(slots=True)
+class SymbolIndex:
+    files: dict[str, FileSymbols] = field(default_factory=dict)
+    by_name: dict[str, list[tuple[str, Symbol]]] = field(default_factory=dict)
+    referenced_in: dict[str, set[str]] = field(default_factory=dict)
+
+    def add(self, path: str, symbols: FileSymbols) -> None:
+        self.files[path] = symbols
+        for symbol in symbols.definitions:
+            self.by_name.setdefault(symbol.short_name.lower(), []).append(
+                (path, symbol)
+            )
+        for name in symbols.references:
+            self.referenced_in.setdefault(name, set()).add(path)
+
+    def definitions(self, name: str) -> list[tuple[str, Symbol]]:
+        return self.by_name.get(name.lower(), [])
+
+    def importers(self, path: str) -> set[str]:
+        module = module_name(path)
+        leaf = module.rsplit(".", 1)[-1]
+        return {
+            other
+            for other, symbols in self.files.items()
+            if any(
+                item == module or item.endswith(f".{leaf}") or item == f".{leaf}"
+                for item in symbols.imports
+            )
+        }
+
+    def callers(
+        self, path: str, symbol: Symbol, limit: int = 3
+    ) -> list[tuple[str, Symbol]]:
+        """Definitions that reference ``symbol``, same file and importers first."""
+        name = symbol.short_name
+        preferred = {path} | self.importers(path)
+        paths = sorted(
+            self.referenced_in.get(name, ()),
+            key=lambda item: (item not in preferred, item),
+        )
+        found: list[tuple[str, Symbol]] = []
+        for other in paths:
+            symbols = self.files[other]
+            for line in symbols.references.get(name, []):
+                caller = symbols.enclosing(line)
+                if caller is None or (other == path and caller.name == symbol.name):
+                    continue
+                if other == path and symbol.start <= line <= symbol.end:
+                    continue
+                if (other, caller) not in found:
+                    found.append((other, caller))
+                if len(found) >= limit:
+                    return found
+        return found
+
+    def mentioned(
+        self, text: str, ranked_paths: list[str] | None = None, limit: int = 6
+    ) -> list[tuple[str, Symbol]]:
+        """Definitions whose names appear verbatim in ``text``."""
+        order = {path: index for index, path in enumerate(ranked_paths or [])}
+        hits: list[tuple[str, Symbol]] = []
+        for word in dict.fromkeys(_IDENT_RE.findall(text)):
+            hits.extend(self.definitions(word))
+        hits.sort(key=lambda item: (order.get(item[0], len(order)), item[0]))
+        return hits[:limit]
+
+
+async def build_symbol_index(
+    reader: BlobReader,
+    cache: SymbolCache,
+    executor: Executor | None = None,
+    batch: int = 128,
+) -> SymbolIndex:
+    """Parse every Python blob not already in ``cache`` and index the repo.
+
+    New blobs are parsed in ``executor`` (a process pool on workers), a batch
+    per task, so only files that changed since an earlier run cost anything.
+    """
+    loop = asyncio.get_running_loop()
+    index = SymbolIndex()
+    pending: list[tuple[str, str]] = []
+    for path, sha in reader.paths.items():
+        if not path.endswith(".py"):
+            continue
+        known, symbols = cache.get(sha)
+        if known:
+            if symbols is not None:
+                index.add(path, symbols)
+        else:
+            pending.append((path, sha))
+    sources: list[tuple[str, str]] = []
+    for path, sha in pending:
+        text = await reader.read_text(path)
+        sources.append((sha, text or ""))
+    chunks = [sources[start : start + batch] for start in range(0, len(sources), batch)]
+    parsed = await asyncio.gather(
+        *(loop.run_in_executor(executor, parse_many, chunk) for chunk in chunks)
+    )
+    by_sha = {sha: symbols for chunk in parsed for sha, symbols in chunk}
+    for path, sha in pending:
+        symbols = by_sha.get(sha)
+        cache.put(sha, symbols)
+        if symbols is not None:
+            index.add(path, symbols)
+    return index
+
+
+async def symbol_context(
+    index: SymbolIndex,
+    reader: BlobReader,
+    text: str,
+    ranked_paths: list[str] | None = None,
+    max_definitions: int = 6,
+    max_callers: int = 3,
+    budget_tokens: int | None = None,
+) -> str:
+    """Source of the definitions ``text`` mentions, followed by their callers.
+
+    With ``budget_tokens``, a definition that does not fit is skipped in
+    favour of smaller ones further down.
+    """
+    sections: list[str] = []
+    seen: set[tuple[str, str]] = set()
+    used = 0
+    for path, symbol in index.mentioned(text, ranked_paths, max_definitions):
+        if budget_tokens is not None and used >= budget_tokens:
+            break
+        related = [(path, symbol, "")]
+        related += [
+            (other, caller, f"calls {symbol.short_name}")
+            for other, caller in index.callers(path, symbol, max_callers)
+        ]
+        for other, item, note in related:
+            if (other, item.name) in seen:
+                continue
+            seen.add((other, item.name))
+            source = await reader.read_text(other)
+            if source is None:
+                continue
+            lines = source.splitlines()[item.start - 1 : item.end]
+            label = f"{item.kind} {item.name}" + (f", {note}" if note else "")
+            numbered = "\n".join(
+                f"{item.start + offset}: {line}" for offset, line in enumerate(lines)
+            )
+            section = f"## {other}:{item.start}-{item.end} ({label})\n{numbered}"
+            cost = estimate_tokens(section)
+            if budget_tokens is not None and used + cost > budget_tokens:
+                continue
+            sections.append(section)
+            used += cost
+    return "\n\n".join(sections)
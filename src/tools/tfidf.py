@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import math
+import os
+import shutil
+import tempfile
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from tools.bm25 import BM25Index, tokenize
+
+try:
+    import numpy as np
+    from scipy import sparse
+except ImportError:  # pragma: no cover - exercised only without the extra
+    np = None
+    sparse = None
+
+ARRAYS = ("data", "indices", "indptr", "idf", "vocab", "paths")
+
+
+def available() -> bool:
+    return np is not None and sparse is not None
+
+
+def _require() -> None:
+    if not available():
+        raise RuntimeError(
+            "TF-IDF retrieval needs numpy and scipy: pip install 'agent-hub[retrieval]'"
+        )
+
+
+@dataclass(slots=True)
+class TfidfIndex:
+    """L2-normalised TF-IDF rows (one per file) in a CSR matrix.
+
+    ``vocab`` and ``paths`` are sorted / ordered NumPy string arrays, so a
+    saved index is opened with ``np.load(mmap_mode="r")`` and used without
+    parsing anything.
+    """
+
+    matrix: Any
+    idf: Any
+    vocab: Any
+    paths: Any
+
+    @classmethod
+    def from_bm25(cls, index: BM25Index) -> TfidfIndex:
+        """Reuse the BM25 postings instead of tokenizing the repository again."""
+        _require()
+        paths = sorted(index.lengths)
+        rows = {path: number for number, path in enumerate(paths)}
+        vocab = sorted(index.postings)
+        count = len(paths)
+        idf = np.empty(len(vocab), dtype=np.float32)
+        row_ids: list[int] = []
+        col_ids: list[int] = []
+        values: list[float] = []
+        for column, term in enumerate(vocab):
+            docs = index.postings[term]
+            idf[column] = math.log((1 + count) / (1 + len(docs))) + 1
+            for path, tf in docs.items():
+                row_ids.append(rows[path])
+                col_ids.append(column)
+                values.append((1 + math.log(tf)) * idf[column])
+        matrix = sparse.csr_matrix(
+            (
+                np.asarray(values, dtype=np.float32),
+                (np.asarray(row_ids, dtype=np.int32), np.asarray(col_ids, np.int32)),
+            ),
+            shape=(count, len(vocab)),
+            dtype=np.float32,
+        )
+        norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1))).ravel()
+        norms[norms == 0] = 1.0
+        matrix = sparse.diags(1 / norms).dot(matrix).tocsr().astype(np.float32)
+        return cls(
+            matrix=matrix,
+            idf=idf,
+            vocab=np.asarray(vocab, dtype=str),
+            paths=np.asarray(paths, dtype=str),
+        )
+
+    def query_vector(self, text: str) -> Any:
+        vector = np.zeros(len(self.vocab), dtype=np.float32)
+        counts = Counter(tokenize(text))
+        if not counts or not len(self.vocab):
+            return vector
+        terms = np.asarray(list(counts), dtype=str)
+        positions = np.searchsorted(self.vocab, terms)
+        positions = np.minimum(positions, len(self.vocab) - 1)
+        found = self.vocab[positions] == terms
+        tf = np.asarray([1 + math.log(value) for value in counts.values()])
+        vector[positions[found]] = tf[found] * self.idf[positions[found]]
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def search(self, text: str, limit: int = 8) -> list[tuple[str, float]]:
+        """Cosine similarity of every file to ``text`` in one mat-vec product."""
+        if not len(self.paths):
+            return []
+        scores = self.matrix @ self.query_vector(text)
+        limit = min(limit, len(scores))
+        top = np.argpartition(-scores, limit - 1)[:limit]
+        top = top[np.argsort(-scores[top])]
+        return [
+            (str(self.paths[row]), float(scores[row])) for row in top if scores[row]
+        ]
+
+    def save(self, folder: Path) -> None:
+        """Write the arrays to a private temp folder and rename it into place.
+
+        Raises ``OSError`` if ``folder`` already exists.
+        """
+        folder.parent.mkdir(parents=True, exist_ok=True)
+        tmp = Path(tempfile.mkdtemp(dir=folder.parent, suffix=".tmp"))
+        arrays = {
+            "data": self.matrix.data,
+            "indices": self.matrix.indices,
+            "indptr": self.matrix.indptr,
+            "idf": self.idf,
+            "vocab": self.vocab,
+            "paths": self.paths,
+        }
+        try:
+            for name, array in arrays.items():
+                np.save(tmp / f"{name}.npy", np.asarray(array))
+            os.rename(tmp, folder)
+        except OSError:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+
+    @classmethod
+    def load(cls, folder: Path) -> TfidfIndex:
+        _require()
+        arrays = {
+            name: np.load(folder / f"{name}.npy", mmap_mode="r") for name in ARRAYS
+        }
+        matrix = sparse.csr_matrix(
+            (arrays["data"], arrays["indices"], arrays["indptr"]),
+            shape=(len(arrays["paths"]), len(arrays["vocab"])),
+            copy=False,
+        )
+        return cls(matrix, arrays["idf"], arrays["vocab"], arrays["paths"])
+
+
+def load_or_build(
+    root: Path, repo_key: str, index: BM25Index, keep: int = 3
+) -> TfidfIndex:
+    """Memory-map the matrix for ``index.commit``, building it on first use."""
+    folder = root / repo_key / f"{index.commit}.tfidf"
+    if (folder / "paths.npy").exists():
+        return TfidfIndex.load(folder)
+    tfidf = TfidfIndex.from_bm25(index)
+    try:
+        tfidf.save(folder)
+    except OSError:
+        # Another worker saved the same commit first.
+        return tfidf
+    stored: list[tuple[float, Path]] = []
+    for path in folder.parent.glob("*.tfidf"):
+        try:
+            stored.append((path.stat().st_mtime, path))
+        except FileNotFoundError:
+            continue
+    for _, old in sorted(stored)[:-keep]:
+        shutil.rmtree(old, ignore_errors=True)
+    return TfidfIndex.load(folder)
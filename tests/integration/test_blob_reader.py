@@ -0,0 +1,61 @@
+from pathlib import Path
+
+import pytest
+
+from services.jobs import find_relevant_files
+from tools.git_ops import BlobCache, BlobReader, commit_all, init_repo, run_git
+
+
+@pytest.fixture
+def repo(tmp_path: Path) -> Path:
+    init_repo(tmp_path)
+    run_git(tmp_path, ["config", "user.email", "bot@example.com"])
+    run_git(tmp_path, ["config", "user.name", "bot"])
+    (tmp_path / "app").mkdir()
+    (tmp_path / "app" / "health.py").write_text(
+        "def healthz():\n    return 'health ok'\n"
+    )
+    (tmp_path / "app" / "big.txt").write_text("x" * 100_000 + "\n")
+    (tmp_path / "logo.bin").write_bytes(b"\x89PNG\0\0health")
+    (tmp_path / "README.md").write_text("Health checks live in app/health.py\n")
+    commit_all(tmp_path, "init")
+    return tmp_path
+
+
+@pytest.mark.asyncio
+async def test_reads_blobs_from_the_object_store(repo: Path) -> None:
+    (repo / "app" / "health.py").write_text("uncommitted edit\n")
+    cache = BlobCache()
+
+    async with BlobReader(repo, max_bytes=1000, cache=cache) as reader:
+        assert await reader.read_text("app/health.py") == (
+            "def healthz():\n    return 'health ok'\n"
+        )
+        assert len(await reader.read("app/big.txt")) == 1000
+        assert await reader.read_text("README.md") is not None
+        assert await reader.read_text("logo.bin") is None
+        assert await reader.read("missing.py") is None
+        await reader.read_text("app/health.py")
+
+    assert cache.hits >= 1
+    assert cache.size <= cache.max_bytes
+
+
+@pytest.mark.asyncio
+async def test_shared_cache_respects_each_readers_cap(repo: Path) -> None:
+    cache = BlobCache()
+
+    async with BlobReader(repo, max_bytes=1000, cache=cache) as small:
+        assert len(await small.read("app/big.txt")) == 1000
+    async with BlobReader(repo, max_bytes=200_000, cache=cache) as large:
+        assert len(await large.read("app/big.txt")) == 100_001
+    async with BlobReader(repo, max_bytes=10, cache=cache) as tiny:
+        assert len(await tiny.read("app/big.txt")) == 10
+        assert await tiny.read("app/health.py") == b"def health"
+
+
+@pytest.mark.asyncio
+async def test_single_grep_ranks_files(repo: Path) -> None:
+    files = await find_relevant_files(repo, ["health", "healthz"])
+    assert files[0] == "app/health.py"
+    assert "logo.bin" not in files
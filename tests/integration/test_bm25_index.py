@@ -0,0 +1,59 @@
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+from tools.bm25 import BM25Index, IndexStore, load_index
+from tools.git_ops import BlobReader, commit_all, init_repo, run_git
+
+
+@pytest.mark.asyncio
+async def test_index_is_cached_per_commit_and_updated_incrementally(
+    tmp_path: Path,
+) -> None:
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    init_repo(repo)
+    run_git(repo, ["config", "user.email", "bot@example.com"])
+    run_git(repo, ["config", "user.name", "bot"])
+    (repo / "health.py").write_text("def healthz():\n    return 'ok'\n")
+    (repo / "cors.py").write_text("ALLOWED_ORIGINS = ['*']\n")
+    commit_all(repo, "init")
+    store = IndexStore(tmp_path / "index")
+
+    async with BlobReader(repo) as reader:
+        first = await load_index(store, "demo", repo, reader)
+    assert first.search("healthz")[0][0] == "health.py"
+    assert store.path("demo", first.commit).exists()
+
+    (repo / "version.py").write_text("def version():\n    return '1.0'\n")
+    (repo / "cors.py").unlink()
+    commit_all(repo, "add version")
+    run_git(repo, ["add", "-A"])
+    run_git(repo, ["commit", "-m", "drop cors"])
+
+    async with BlobReader(repo) as reader:
+        second = await load_index(store, "demo", repo, reader)
+    assert second.commit != first.commit
+    assert set(second.lengths) == {"health.py", "version.py"}
+    assert second.search("version")[0][0] == "version.py"
+
+    async with BlobReader(repo) as reader:
+        cached = await load_index(store, "demo", repo, reader)
+    assert cached.lengths == second.lengths
+
+
+def test_concurrent_saves_of_one_commit(tmp_path: Path) -> None:
+    store = IndexStore(tmp_path / "index", keep=2)
+    indexes = []
+    for number in range(6):
+        index = BM25Index(commit=f"c{number % 3}")
+        index.add(f"f{number}.py", ["token"])
+        indexes.append(index)
+
+    with ThreadPoolExecutor(max_workers=6) as pool:
+        for _ in range(20):
+            list(pool.map(lambda index: store.save("demo", index), indexes))
+            assert store.latest("demo") is not None
+
+    assert not list((tmp_path / "index" / "demo").glob("*.tmp"))
@@ -0,0 +1,88 @@
+import asyncio
+from pathlib import Path
+
+import pytest
+from sqlalchemy import event, select
+
+from config import settings
+from db.base import create_engine, create_sessionmaker, init_models
+from db.models import EventLog, Run
+from services.event_log import EventLogBuffer
+from services.jobs import _run_issue
+
+
+@pytest.fixture
+async def engine(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(
+        settings, "database_url", f"sqlite+aiosqlite:///{tmp_path}/test.db"
+    )
+    engine = create_engine()
+    await init_models(engine)
+    yield engine
+    await engine.dispose()
+
+
+async def logged(engine) -> list[EventLog]:
+    async with create_sessionmaker(engine)() as session:
+        result = await session.execute(
+            select(EventLog).order_by(EventLog.created_at, EventLog.id)
+        )
+        return list(result.scalars().all())
+
+
+@pytest.mark.asyncio
+async def test_batches_keep_event_order(engine) -> None:
+    inserts = []
+    event.listen(
+        engine.sync_engine,
+        "before_cursor_execute",
+        lambda *args: inserts.append(args[2]) if "event_logs" in args[2] else None,
+    )
+    sessionmaker = create_sessionmaker(engine)
+    async with EventLogBuffer(
+        sessionmaker, "run-1", max_events=4, interval=0
+    ) as events:
+        for number in range(10):
+            await events.add(f"event {number}", "event", {"n": number})
+        assert len(events.pending) == 2
+
+    assert events.flushes == 3
+    assert len(inserts) == 3
+    assert [log.payload["n"] for log in await logged(engine)] == list(range(10))
+
+
+@pytest.mark.asyncio
+async def test_timer_flushes_idle_buffer(engine) -> None:
+    events = EventLogBuffer(create_sessionmaker(engine), "run-1", interval=0.01)
+    await events.add("started", "event", {})
+    await asyncio.sleep(0.2)
+
+    assert events.pending == []
+    assert [log.message for log in await logged(engine)] == ["started"]
+
+
+@pytest.mark.asyncio
+async def test_failed_run_writes_buffered_events(
+    engine, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(settings, "openrouter_api_key", "")
+    monkeypatch.setattr(settings, "event_log_flush_interval", 0.0)
+    async with create_sessionmaker(engine)() as session:
+        session.add(
+            Run(
+                id="run-1",
+                repo_url="https://github.com/acme/app",
+                issue_number=1,
+                status="NEW",
+                model="",
+                max_iterations=3,
+            )
+        )
+        await session.commit()
+        await _run_issue(session, "run-1")
+
+    assert [log.kind for log in await logged(engine)] == [
+        "state_transition",
+        "state_transition",
+        "failed",
+    ]
@@ -0,0 +1,133 @@
+from datetime import UTC, datetime, timedelta
+
+import httpx
+import jwt
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from fastapi import FastAPI, Header, HTTPException
+
+from config import settings
+from db.base import create_engine, create_sessionmaker, init_models
+from db.repositories import get_installation_id, upsert_installation_repo
+from github.app_auth import InstallationTokenProvider
+from github.http import create_http_client
+from services.installations_service import InstallationsService
+
+
+def make_keys() -> tuple[str, str]:
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    private_pem = key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    ).decode("utf-8")
+    public_pem = (
+        key.public_key()
+        .public_bytes(
+            serialization.Encoding.PEM,
+            serialization.PublicFormat.SubjectPublicKeyInfo,
+        )
+        .decode("utf-8")
+    )
+    return private_pem, public_pem
+
+
+STALE_INSTALLATION = 3
+
+
+def fake_github(public_pem: str, minted: list[int], ttl: timedelta) -> FastAPI:
+    app = FastAPI()
+
+    def verify(authorization: str) -> None:
+        try:
+            claims = jwt.decode(
+                authorization.split()[1], public_pem, algorithms=["RS256"]
+            )
+        except jwt.PyJWTError as exc:
+            raise HTTPException(status_code=401) from exc
+        assert claims["iss"] == "42"
+
+    @app.get("/repos/{owner}/{repo}/installation")
+    async def installation(
+        owner: str, repo: str, authorization: str = Header()
+    ) -> dict:
+        verify(authorization)
+        return {"id": 7}
+
+    @app.post("/app/installations/{installation_id}/access_tokens")
+    async def access_token(installation_id: int, authorization: str = Header()) -> dict:
+        verify(authorization)
+        if installation_id == STALE_INSTALLATION:
+            raise HTTPException(status_code=404)
+        minted.append(installation_id)
+        expires = datetime.now(UTC) + ttl
+        return {
+            "token": f"ghs_{installation_id}_{len(minted)}",
+            "expires_at": expires.strftime("%Y-%m-%dT%H:%M:%SZ"),
+        }
+
+    return app
+
+
+@pytest.mark.asyncio
+async def test_installation_tokens_are_cached_and_registry_persisted(tmp_path) -> None:
+    private_pem, public_pem = make_keys()
+    minted: list[int] = []
+    transport = httpx.ASGITransport(
+        app=fake_github(public_pem, minted, timedelta(hours=1))
+    )
+    settings.database_url = f"sqlite+aiosqlite:///{tmp_path}/test.db"
+    engine = create_engine()
+    await init_models(engine)
+    async with create_http_client(transport=transport) as http:
+        provider = InstallationTokenProvider(
+            app_id="42", private_key=private_pem, http=http
+        )
+        service = InstallationsService(provider=provider, fallback_token="static")
+        async with create_sessionmaker(engine)() as session:
+            first = await service.token_for_repo(session, "octo", "demo")
+            second = await service.token_for_repo(session, "octo", "demo")
+            assert await get_installation_id(session, "octo", "demo") == 7
+    await engine.dispose()
+    assert first == second == "ghs_7_1"
+    assert minted == [7]
+
+
+@pytest.mark.asyncio
+async def test_stale_installation_is_looked_up_again(tmp_path) -> None:
+    private_pem, public_pem = make_keys()
+    minted: list[int] = []
+    transport = httpx.ASGITransport(
+        app=fake_github(public_pem, minted, timedelta(hours=1))
+    )
+    settings.database_url = f"sqlite+aiosqlite:///{tmp_path}/test.db"
+    engine = create_engine()
+    await init_models(engine)
+    async with create_http_client(transport=transport) as http:
+        provider = InstallationTokenProvider(
+            app_id="42", private_key=private_pem, http=http
+        )
+        service = InstallationsService(provider=provider, fallback_token="static")
+        async with create_sessionmaker(engine)() as session:
+            await upsert_installation_repo(session, STALE_INSTALLATION, "octo", "demo")
+            token = await service.token_for_repo(session, "octo", "demo")
+            assert await get_installation_id(session, "octo", "demo") == 7
+    await engine.dispose()
+    assert token == "ghs_7_1"
+    assert minted == [7]
+
+
+@pytest.mark.asyncio
+async def test_installation_token_is_refreshed_before_expiry() -> None:
+    private_pem, public_pem = make_keys()
+    minted: list[int] = []
+    app = fake_github(public_pem, minted, timedelta(minutes=2))
+    async with create_http_client(transport=httpx.ASGITransport(app=app)) as http:
+        provider = InstallationTokenProvider(
+            app_id="42", private_key=private_pem, http=http, refresh_margin=300
+        )
+        first = await provider.token_for_installation(9)
+        second = await provider.token_for_installation(9)
+    assert first != second
+    assert minted == [9, 9]
@@ -0,0 +1,88 @@
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import pytest
+from sqlalchemy import select
+
+from config import settings
+from db.base import create_engine, create_sessionmaker, init_models
+from db.models import EventLog
+from llm.base import LLMResponse
+from services.jobs import check_candidate, retry_failed_hunks
+from tools.git_ops import commit_all, init_repo, run_git
+from tools.patch_model import Patch, apply_patch, write_changes
+
+SOURCE = "".join(f"line {number}\n" for number in range(1, 61))
+FIRST = (
+    "--- a/app.txt\n+++ b/app.txt\n"
+    "@@ -2,3 +2,3 @@\n line 2\n-line 3\n+line three\n line 4\n"
+    "@@ -40,3 +40,3 @@\n line 40\n-line 41 as remembered\n+line forty-one\n"
+    " line 42\n"
+)
+FOLLOW_UP = (
+    "--- a/app.txt\n+++ b/app.txt\n"
+    "@@ -40,3 +40,3 @@\n line 40\n-line 41\n+line forty-one\n line 42\n"
+)
+
+
+@dataclass
+class FakeClient:
+    content: str
+    model: str = "fake"
+    params: dict = field(default_factory=dict)
+    prompts: list[str] = field(default_factory=list)
+
+    async def complete(self, prompt: str, correlation_id: str | None = None):
+        self.prompts.append(prompt)
+        return LLMResponse(content=self.content, model=self.model)
+
+    complete_stream = complete
+
+
+@pytest.mark.asyncio
+async def test_only_failed_hunks_are_prompted_again(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    init_repo(repo)
+    run_git(repo, ["config", "user.email", "bot@example.com"])
+    run_git(repo, ["config", "user.name", "bot"])
+    (repo / "app.txt").write_text(SOURCE)
+    commit_all(repo, "init")
+    monkeypatch.setattr(
+        settings, "database_url", f"sqlite+aiosqlite:///{tmp_path}/test.db"
+    )
+    engine = create_engine()
+    await init_models(engine)
+
+    diff, error, details = await check_candidate(FIRST, repo, None, partial=True)
+    assert error == ""
+    changes = apply_patch(Patch.parse(diff), repo)
+    write_changes(repo, changes)
+
+    client = FakeClient(FOLLOW_UP)
+    async with create_sessionmaker(engine)() as session:
+        remaining = await retry_failed_hunks(
+            session,
+            "run-1",
+            client,
+            {"title": "Rename lines"},
+            details["failed_hunks"],
+            repo,
+            ["app.txt"],
+            "diff",
+            changes,
+        )
+        kinds = (await session.execute(select(EventLog.kind))).scalars().all()
+    await engine.dispose()
+
+    assert remaining == []
+    assert kinds == ["hunk_retry_prompt", "hunk_retry"]
+    [prompt] = client.prompts
+    assert "line 41 as remembered" in prompt
+    assert "41: line 41\n" in prompt
+    assert "line three" not in prompt
+    text = (repo / "app.txt").read_text()
+    assert "line three\n" in text and "line forty-one\n" in text
+    assert changes["app.txt"] == text
@@ -0,0 +1,107 @@
+from pathlib import Path
+
+import pytest
+
+from tools.git_ops import commit_all, init_repo, run_git
+from tools.repo_cache import RepoCache
+
+
+def make_remote(tmp_path: Path, name: str, content: str) -> tuple[Path, Path]:
+    work = tmp_path / f"{name}-work"
+    work.mkdir()
+    init_repo(work)
+    run_git(work, ["config", "user.email", "bot@example.com"])
+    run_git(work, ["config", "user.name", "bot"])
+    (work / "README.md").write_text(content)
+    commit_all(work, "init")
+    remote = tmp_path / f"{name}.git"
+    run_git(tmp_path, ["clone", "--bare", str(work), str(remote)])
+    return work, remote
+
+
+@pytest.mark.asyncio
+async def test_worktree_tracks_remote_and_is_removed(tmp_path: Path) -> None:
+    work, remote = make_remote(tmp_path, "demo", "v1\n")
+    cache = RepoCache(root=tmp_path / "cache")
+
+    async with cache.worktree(str(remote), "run-1") as path:
+        assert (path / "README.md").read_text() == "v1\n"
+    assert not path.exists()
+
+    (work / "README.md").write_text("v2\n")
+    commit_all(work, "update")
+    run_git(work, ["push", str(remote), "HEAD"])
+
+    async with cache.worktree(str(remote), "run-2") as path:
+        assert (path / "README.md").read_text() == "v2\n"
+        worktrees = run_git(cache.mirror_path(str(remote)), ["worktree", "list"])
+        assert str(path) in worktrees.stdout.decode("utf-8")
+    assert list(cache.mirrors_dir.iterdir()) == [cache.mirror_path(str(remote))]
+
+
+@pytest.mark.asyncio
+async def test_worktree_is_removed_when_the_job_crashes(tmp_path: Path) -> None:
+    _, remote = make_remote(tmp_path, "demo", "v1\n")
+    cache = RepoCache(root=tmp_path / "cache")
+
+    with pytest.raises(RuntimeError):
+        async with cache.worktree(str(remote), "run-1") as path:
+            raise RuntimeError("job failed")
+
+    assert not path.exists()
+
+
+@pytest.mark.asyncio
+async def test_quota_evicts_least_recently_used_idle_mirror(tmp_path: Path) -> None:
+    _, first = make_remote(tmp_path, "first", "a\n")
+    _, second = make_remote(tmp_path, "second", "b\n")
+    cache = RepoCache(root=tmp_path / "cache")
+    await cache.sync(str(first))
+    await cache.sync(str(second))
+
+    cache.max_bytes = 1
+    async with cache.worktree(str(second), "run-1"):
+        evicted = await cache.enforce_quota()
+        assert cache.mirror_path(str(second)).exists()
+
+    assert evicted == [cache.mirror_path(str(first)).name]
+
+
+@pytest.mark.asyncio
+async def test_sync_keeps_run_branches_of_other_worktrees(tmp_path: Path) -> None:
+    work, remote = make_remote(tmp_path, "demo", "v1\n")
+    cache = RepoCache(root=tmp_path / "cache")
+    mirror = cache.mirror_path(str(remote))
+
+    async with cache.worktree(str(remote), "run-1") as first:
+        run_git(first, ["checkout", "-b", "agent/run-1"])
+        (work / "README.md").write_text("v2\n")
+        commit_all(work, "update")
+        run_git(work, ["push", str(remote), "HEAD"])
+
+        async with cache.worktree(str(remote), "run-2") as second:
+            assert (second / "README.md").read_text() == "v2\n"
+            branches = run_git(mirror, ["branch", "--list", "agent/*"])
+            assert "agent/run-1" in branches.stdout.decode("utf-8")
+        parents = run_git(first, ["rev-list", "--count", "HEAD"])
+        assert parents.stdout.decode("utf-8").strip() == "1"
+
+    branches = run_git(mirror, ["branch", "--list", "agent/*"])
+    assert branches.stdout.decode("utf-8").strip() == ""
+
+
+@pytest.mark.asyncio
+async def test_quota_skips_mirrors_in_use_by_another_worker(tmp_path: Path) -> None:
+    _, first = make_remote(tmp_path, "first", "a\n")
+    _, second = make_remote(tmp_path, "second", "b\n")
+    worker = RepoCache(root=tmp_path / "cache")
+    other = RepoCache(root=tmp_path / "cache", max_bytes=1)
+    await worker.sync(str(first))
+
+    async with worker.worktree(str(second), "run-1") as path:
+        evicted = await other.enforce_quota()
+        assert (path / "README.md").read_text() == "b\n"
+        assert worker.mirror_path(str(second)).exists()
+
+    assert evicted == [worker.mirror_path(str(first)).name]
+    assert await other.enforce_quota() == [worker.mirror_path(str(second)).name]
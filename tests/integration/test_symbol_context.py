@@ -0,0 +1,61 @@
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pytest
+
+from llm.packing import estimate_tokens
+from tools.git_ops import BlobReader, commit_all, init_repo, run_git
+from tools.symbols import SymbolCache, build_symbol_index, symbol_context
+
+
+@pytest.mark.asyncio
+async def test_symbol_context_uses_process_pool_and_blob_cache(tmp_path: Path) -> None:
+    init_repo(tmp_path)
+    run_git(tmp_path, ["config", "user.email", "bot@example.com"])
+    run_git(tmp_path, ["config", "user.name", "bot"])
+    (tmp_path / "service.py").write_text(
+        "def healthz():\n    return 'ok'\n\n\ndef other():\n    return 2\n"
+    )
+    (tmp_path / "routes.py").write_text(
+        "from service import healthz\n\n\ndef route():\n    return healthz()\n"
+    )
+    commit_all(tmp_path, "init")
+    cache = SymbolCache()
+
+    with ProcessPoolExecutor(max_workers=2) as pool:
+        async with BlobReader(tmp_path) as reader:
+            index = await build_symbol_index(reader, cache, pool, batch=1)
+            context = await symbol_context(index, reader, "healthz is broken")
+
+    assert "## service.py:1-2 (function healthz)\n1: def healthz():" in context
+    assert "## routes.py:4-5 (function route, calls healthz)" in context
+    assert "def other" not in context
+
+    async with BlobReader(tmp_path) as reader:
+        reader.paths.update({"copy.py": reader.paths["service.py"]})
+        again = await build_symbol_index(reader, cache)
+    assert set(again.files) == {"service.py", "routes.py", "copy.py"}
+
+
+@pytest.mark.asyncio
+async def test_symbol_context_stays_within_budget(tmp_path: Path) -> None:
+    init_repo(tmp_path)
+    run_git(tmp_path, ["config", "user.email", "bot@example.com"])
+    run_git(tmp_path, ["config", "user.name", "bot"])
+    body = "".join(
+        f"    def method_{number}(self):\n        pass\n" for number in range(300)
+    )
+    (tmp_path / "models.py").write_text(
+        f"class Registry:\n{body}\n\ndef lookup():\n    return Registry()\n"
+    )
+    commit_all(tmp_path, "init")
+
+    async with BlobReader(tmp_path) as reader:
+        index = await build_symbol_index(reader, SymbolCache())
+        context = await symbol_context(
+            index, reader, "Registry lookup fails", budget_tokens=200
+        )
+
+    assert "604: def lookup():" in context
+    assert "class Registry" not in context
+    assert estimate_tokens(context) <= 200
@@ -0,0 +1,40 @@
+import time
+
+from tools.bm25 import BM25Index, tokenize
+
+
+def test_tokenize_splits_identifiers() -> None:
+    tokens = tokenize("def getUserName(user_id): return HTTPServer")
+    assert {"get", "user", "name", "getusername", "id", "user_id"} <= set(tokens)
+    assert {"http", "server", "httpserver"} <= set(tokens)
+    assert "def" not in tokens and "return" not in tokens
+
+
+def test_ranks_matching_files_first_and_round_trips() -> None:
+    index = BM25Index(commit="abc")
+    index.add("app/health.py", tokenize("def healthz(): return {'status': 'ok'}"))
+    index.add("app/cors.py", tokenize("CORSMiddleware allow_origins"))
+    index.add("README.md", tokenize("Service docs. Health checks are documented."))
+
+    ranked = index.search("Add a /healthz endpoint for health checks")
+    assert [path for path, _ in ranked][:2] == ["app/health.py", "README.md"]
+    assert "app/cors.py" not in dict(ranked)
+
+    restored = BM25Index.from_bytes(index.to_bytes())
+    assert restored.commit == "abc"
+    assert restored.search("healthz") == index.search("healthz")
+
+    index.remove_many({"app/health.py"})
+    assert [path for path, _ in index.search("healthz")] == []
+    assert index.total_length == sum(index.lengths.values())
+
+
+def test_search_is_fast_on_large_index() -> None:
+    index = BM25Index()
+    for number in range(20_000):
+        index.add(f"pkg/module_{number}.py", [f"symbol{number}", "common", "value"])
+    started = time.perf_counter()
+    ranked = index.search("symbol123 value lookup")
+    elapsed = time.perf_counter() - started
+    assert ranked[0][0] == "pkg/module_123.py"
+    assert elapsed < 0.25
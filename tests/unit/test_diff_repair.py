@@ -0,0 +1,108 @@
+from pathlib import Path
+
+import pytest
+
+from tools.diff_ops import apply_check
+from tools.diff_repair import fix_path, repair_patch
+from tools.git_ops import commit_all, init_repo, run_git
+from tools.patch_model import Patch
+
+SOURCE = "".join(f"line {number}\n" for number in range(1, 41))
+
+
+@pytest.fixture
+def repo(tmp_path: Path) -> Path:
+    init_repo(tmp_path)
+    run_git(tmp_path, ["config", "user.email", "bot@example.com"])
+    run_git(tmp_path, ["config", "user.name", "bot"])
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / "app.py").write_text(SOURCE)
+    commit_all(tmp_path, "init")
+    return tmp_path
+
+
+def test_wrong_counts_and_bare_headers_are_recomputed(repo: Path) -> None:
+    diff = (
+        "diff --git a/src/app.py b/src/app.py\n--- a/src/app.py\n+++ b/src/app.py\n"
+        "@@ -3,9 +3,9 @@\n line 10\n-line 11\n+line eleven\n line 12\n"
+        "@@\n line 30\n+line 30.5\n line 31\n"
+    )
+    assert not apply_check(repo, diff)
+
+    result = repair_patch(Patch.parse(diff), repo)
+
+    assert result.ok and result.saved_retry
+    assert result.kinds == {"header"}
+    assert "@@ -10,3 +10,3 @@\n line 10\n-line 11" in result.diff
+    assert "@@ -30,2 +30,3 @@\n line 30\n+line 30.5\n line 31\n" in result.diff
+    assert apply_check(repo, result.diff)
+
+
+def test_paths_whitespace_and_context_are_fixed(repo: Path) -> None:
+    diff = (
+        "--- a/app.py\n+++ b/app.py\n"
+        "@@ -5,5 +5,5 @@\n line 5\n line 6   \n-line 7\n+line seven\n line 8\n"
+        " stale context\n"
+    )
+
+    result = repair_patch(Patch.parse(diff), repo, files=["src/app.py"])
+
+    assert result.kinds == {"path", "fuzz", "whitespace", "header"}
+    assert result.diff.startswith(
+        "diff --git a/src/app.py b/src/app.py\n--- a/src/app.py\n+++ b/src/app.py\n"
+        "@@ -6,3 +6,3 @@\n line 6\n-line 7\n+line seven\n line 8\n"
+    )
+    assert apply_check(repo, result.diff)
+
+
+def test_canonical_diffs_pass_through_unchanged(repo: Path) -> None:
+    diff = (
+        "diff --git a/src/app.py b/src/app.py\n--- a/src/app.py\n+++ b/src/app.py\n"
+        "@@ -1,2 +1,2 @@\n-line 1\n+line one\n line 2\n"
+        "diff --git a/NEW.md b/NEW.md\nnew file mode 100644\n"
+        "--- /dev/null\n+++ b/NEW.md\n@@ -0,0 +1 @@\n+hello\n"
+    )
+
+    result = repair_patch(Patch.parse(diff), repo)
+
+    assert result.fixes == [] and not result.saved_retry
+    assert result.diff == diff
+
+
+def test_unmatched_hunks_are_reported(repo: Path) -> None:
+    diff = "--- a/src/app.py\n+++ b/src/app.py\n@@\n-line 99\n+line 100\n"
+
+    result = repair_patch(Patch.parse(diff), repo)
+
+    assert result.error == "src/app.py: hunk #1 does not match"
+    assert not result.saved_retry
+
+
+def test_fix_path_prefers_existing_and_unique_matches(tmp_path: Path) -> None:
+    known = {"src/app.py", "src/util.py", "tests/util.py"}
+
+    assert fix_path("src/app.py", tmp_path, known) == "src/app.py"
+    assert fix_path("repo/src/app.py", tmp_path, known) == "src/app.py"
+    assert fix_path("app.py", tmp_path, known) == "src/app.py"
+    assert fix_path("util.py", tmp_path, known) is None
+
+
+def test_partial_repair_keeps_applicable_hunks(repo: Path) -> None:
+    diff = (
+        "--- a/src/app.py\n+++ b/src/app.py\n"
+        "@@ -2,3 +2,3 @@\n line 2\n-line 3\n+line three\n line 4\n"
+        "@@ -20,3 +20,3 @@\n line 20\n-line 21 (old wording)\n+line twenty-one\n"
+        " line 22\n"
+    )
+
+    strict = repair_patch(Patch.parse(diff), repo)
+    result = repair_patch(Patch.parse(diff), repo, partial=True)
+
+    assert strict.error == "src/app.py: hunk #2 does not match"
+    assert result.ok
+    assert "+line three" in result.diff and "twenty-one" not in result.diff
+    assert apply_check(repo, result.diff)
+    [failed] = result.as_dict()["failed_hunks"]
+    assert failed["path"] == "src/app.py" and failed["number"] == 2
+    assert "-line 21 (old wording)" in failed["hunk"]
+    assert "21: line 21\n" in failed["context"]
@@ -0,0 +1,123 @@
+from pathlib import Path
+
+import pytest
+
+from config import settings
+from services.jobs import build_patch_prompt, check_candidate
+from tools.diff_ops import apply_check
+from tools.edit_formats import (
+    SEARCH_REPLACE,
+    EditError,
+    apply_edit_blocks,
+    edit_format_for,
+    parse_edit_blocks,
+)
+from tools.git_ops import commit_all, init_repo, run_git
+
+REPLY = """Here is the fix.
+
+```python
+src/app.py
+<<<<<<< SEARCH
+def handler():
+    return 1
+=======
+def handler():
+    return 2
+>>>>>>> REPLACE
+```
+
+<<<<<<< SEARCH
+VALUE = "old"
+=======
+>>>>>>> REPLACE
+
+docs/NOTES.md
+<<<<<<< SEARCH
+=======
+Handler returns 2.
+>>>>>>> REPLACE
+"""
+
+
+@pytest.fixture
+def repo(tmp_path: Path) -> Path:
+    init_repo(tmp_path)
+    run_git(tmp_path, ["config", "user.email", "bot@example.com"])
+    run_git(tmp_path, ["config", "user.name", "bot"])
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / "app.py").write_text(
+        'VALUE = "old"   \n\n\ndef handler():\n    return 1\n'
+    )
+    commit_all(tmp_path, "init")
+    return tmp_path
+
+
+def test_parse_blocks_with_fences_and_inherited_paths() -> None:
+    blocks = parse_edit_blocks(REPLY)
+
+    assert [block.path for block in blocks] == [
+        "src/app.py",
+        "src/app.py",
+        "docs/NOTES.md",
+    ]
+    assert blocks[0].search == "def handler():\n    return 1\n"
+    assert blocks[1].replace == ""
+    assert blocks[2].search == ""
+    with pytest.raises(EditError, match="unterminated"):
+        parse_edit_blocks("a.py\n<<<<<<< SEARCH\nx\n=======\n")
+
+
+def test_blocks_apply_in_memory(repo: Path) -> None:
+    changes = apply_edit_blocks(parse_edit_blocks(REPLY), repo)
+
+    assert changes == {
+        "src/app.py": "\n\ndef handler():\n    return 2\n",
+        "docs/NOTES.md": "Handler returns 2.\n",
+    }
+    assert (repo / "src" / "app.py").read_text().endswith("return 1\n")
+    stale = "app.py\n<<<<<<< SEARCH\nmissing\n=======\nx\n>>>>>>> REPLACE\n"
+    with pytest.raises(EditError, match="src/app.py: SEARCH block #1"):
+        apply_edit_blocks(parse_edit_blocks(stale), repo, files=["src/app.py"])
+
+
+@pytest.mark.asyncio
+async def test_candidate_becomes_a_git_diff(repo: Path) -> None:
+    diff, error, _ = await check_candidate(
+        REPLY, repo, None, edit_format=SEARCH_REPLACE
+    )
+
+    assert error == ""
+    assert "diff --git a/docs/NOTES.md b/docs/NOTES.md\nnew file mode 100644" in diff
+    assert "-    return 1\n+    return 2\n" in diff
+    assert apply_check(repo, diff)
+    assert run_git(repo, ["status", "--porcelain"]).stdout == b""
+
+
+def test_format_is_selected_per_model(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, "edit_format", "diff")
+    monkeypatch.setattr(settings, "edit_formats", ["qwen/coder=search_replace"])
+
+    assert edit_format_for("qwen/coder") == SEARCH_REPLACE
+    assert edit_format_for("other/model") == "diff"
+    prompt = build_patch_prompt(
+        {"title": "t", "body": "b"}, "plan", [], "", "", edit_format=SEARCH_REPLACE
+    )
+    assert "<<<<<<< SEARCH" in prompt
+    assert "unified git diff" not in prompt
+
+
+def test_new_files_are_not_redirected_or_appended(repo: Path) -> None:
+    (repo / "tests").mkdir()
+    (repo / "tests" / "conftest.py").write_text("import pytest\n")
+    new = "{path}\n<<<<<<< SEARCH\n=======\nx = 1\n>>>>>>> REPLACE\n"
+
+    changes = apply_edit_blocks(parse_edit_blocks(new.format(path="conftest.py")), repo)
+    assert changes == {"conftest.py": "x = 1\n"}
+    changes = apply_edit_blocks(
+        parse_edit_blocks(new.format(path="docs/new/app.py")), repo
+    )
+    assert changes == {"docs/new/app.py": "x = 1\n"}
+
+    with pytest.raises(EditError, match="src/app.py: exists"):
+        apply_edit_blocks(parse_edit_blocks(new.format(path="src/app.py")), repo)
@@ -0,0 +1,72 @@
+import httpx
+import pytest
+
+from github.cache import ResponseCache
+from github.client import GitHubClient
+from github.http import create_http_client
+from github.permissions_policy import CODE_POLICY
+
+
+@pytest.mark.asyncio
+async def test_github_client_uses_shared_http_client() -> None:
+    seen: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request.url.path)
+        assert request.headers["Authorization"] == "Bearer t"
+        return httpx.Response(200, json={"default_branch": "main", "title": "x"})
+
+    async with create_http_client(transport=httpx.MockTransport(handler)) as http:
+        github = GitHubClient(token="t", policy=CODE_POLICY, http=http)
+        repo = await github.get_repo("octo", "demo")
+        issue = await github.get_issue("octo", "demo", 7)
+        assert not http.is_closed
+    assert repo["default_branch"] == "main"
+    assert issue["title"] == "x"
+    assert seen == ["/repos/octo/demo", "/repos/octo/demo/issues/7"]
+
+
+@pytest.mark.asyncio
+async def test_github_client_replays_etag_and_serves_304_from_cache() -> None:
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.headers.get("If-None-Match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, json={"title": "cached"}, headers={"ETag": '"v1"'})
+
+    cache = ResponseCache(max_entries=4)
+    async with create_http_client(transport=httpx.MockTransport(handler)) as http:
+        github = GitHubClient(token="t", policy=CODE_POLICY, http=http, cache=cache)
+        first = await github.get_issue("octo", "demo", 1)
+        second = await github.get_issue("octo", "demo", 1)
+    assert first == second == {"title": "cached"}
+    assert cache.stats.hits == 1
+    assert cache.stats.misses == 1
+
+
+@pytest.mark.asyncio
+async def test_iter_pull_files_follows_links_and_stops_early() -> None:
+    pages: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        page = int(request.url.params.get("page", "1"))
+        pages.append(str(page))
+        headers = {}
+        if page < 5:
+            next_url = f"https://api.github.com/repos/o/r/pulls/1/files?page={page + 1}"
+            headers["Link"] = f'<{next_url}>; rel="next"'
+        files = [{"filename": f"f{page}_{i}.py", "patch": "@@"} for i in range(2)]
+        return httpx.Response(200, json=files, headers=headers)
+
+    async with create_http_client(transport=httpx.MockTransport(handler)) as http:
+        github = GitHubClient(token="t", policy=CODE_POLICY, http=http)
+        seen = []
+        stream = github.iter_pull_files("o", "r", 1)
+        async for file in stream:
+            seen.append(file["filename"])
+            if len(seen) == 3:
+                break
+        await stream.aclose()
+        everything = await github.list_pull_files("o", "r", 1)
+    assert seen == ["f1_0.py", "f1_1.py", "f2_0.py"]
+    assert len(everything) == 10
+    assert len(pages) <= 3 + 5
@@ -0,0 +1,122 @@
+import json
+
+import httpx
+import pytest
+
+from github.client import GitHubClient
+from github.http import create_http_client
+from github.permissions_policy import CODE_POLICY, REVIEW_POLICY
+
+ISSUE_DATA = {
+    "data": {
+        "repository": {
+            "defaultBranchRef": {"name": "trunk", "target": {"oid": "abc123"}},
+            "issue": {
+                "number": 3,
+                "title": "Add health endpoint",
+                "body": "Need /healthz",
+                "labels": {"nodes": [{"name": "agent"}]},
+                "comments": {"nodes": [{"body": "please"}]},
+            },
+        }
+    }
+}
+
+
+@pytest.mark.asyncio
+async def test_issue_context_is_fetched_in_one_graphql_request() -> None:
+    seen: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request.url.path)
+        return httpx.Response(200, json=ISSUE_DATA)
+
+    async with create_http_client(transport=httpx.MockTransport(handler)) as http:
+        github = GitHubClient(token="t", policy=CODE_POLICY, http=http)
+        context = await github.fetch_issue_context("o", "r", 3)
+    assert seen == ["/graphql"]
+    assert context.default_branch == "trunk"
+    assert context.head_sha == "abc123"
+    assert context.labels == ["agent"]
+    assert context.as_issue()["title"] == "Add health endpoint"
+    assert context.as_issue()["comments"] == ["please"]
+
+
+@pytest.mark.asyncio
+async def test_review_context_falls_back_to_rest() -> None:
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/graphql":
+            return httpx.Response(200, json={"errors": [{"message": "forbidden"}]})
+        if request.url.path.endswith("/files"):
+            return httpx.Response(200, json=[{"filename": "a.py", "patch": "@@"}])
+        return httpx.Response(200, json={"title": "PR", "url": "u", "body": ""})
+
+    async with create_http_client(transport=httpx.MockTransport(handler)) as http:
+        github = GitHubClient(token="t", policy=REVIEW_POLICY, http=http)
+        context = await github.fetch_review_context("o", "r", 5)
+    assert context.title == "PR"
+    assert context.files == [{"filename": "a.py", "patch": "@@"}]
+    assert context.linked_issue is None
+
+
+def review_page(paths: list[str], cursor: str | None) -> dict:
+    return {
+        "pageInfo": {"hasNextPage": cursor is not None, "endCursor": cursor},
+        "nodes": [{"path": path, "changeType": "MODIFIED"} for path in paths],
+    }
+
+
+@pytest.mark.asyncio
+async def test_review_files_are_paginated_on_enterprise_endpoint() -> None:
+    seen: list[str] = []
+    diff = "".join(
+        f"diff --git a/f{number}.py b/f{number}.py\n@@ -1 +1 @@\n-a\n+{'b' * 40}\n"
+        for number in range(3)
+    )
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request.url.path)
+        if request.url.path.endswith("/pulls/5"):
+            return httpx.Response(200, text=diff)
+        body = json.loads(request.content)
+        if body["variables"].get("after") is None:
+            pull = {
+                "number": 5,
+                "title": "PR",
+                "files": review_page(["f0.py", "f1.py"], "c1"),
+                "closingIssuesReferences": {"nodes": []},
+            }
+        else:
+            pull = {"files": review_page(["f2.py"], None)}
+        return httpx.Response(200, json={"data": {"repository": {"pullRequest": pull}}})
+
+    transport = httpx.MockTransport(handler)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="https://ghe.example.com/api/v3"
+    ) as http:
+        github = GitHubClient(
+            token="t", policy=REVIEW_POLICY, http=http, max_diff_bytes=len(diff) - 10
+        )
+        context = await github.fetch_review_context("o", "r", 5)
+
+    assert seen[:2] == ["/api/graphql", "/api/graphql"]
+    assert [file["filename"] for file in context.files] == ["f0.py", "f1.py", "f2.py"]
+    assert [bool(file["patch"]) for file in context.files] == [True, True, False]
+
+
+@pytest.mark.asyncio
+async def test_review_context_without_patches_skips_files() -> None:
+    requests: list[dict] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(json.loads(request.content))
+        pull = {"number": 5, "title": "PR", "closingIssuesReferences": {"nodes": []}}
+        return httpx.Response(200, json={"data": {"repository": {"pullRequest": pull}}})
+
+    async with create_http_client(transport=httpx.MockTransport(handler)) as http:
+        github = GitHubClient(token="t", policy=REVIEW_POLICY, http=http)
+        context = await github.fetch_review_context("o", "r", 5, with_patches=False)
+
+    assert [request["variables"]["files"] for request in requests] == [False]
+    assert context.title == "PR"
+    assert context.files == []
@@ -0,0 +1,39 @@
+import time
+
+import httpx
+import pytest
+
+from github.client import GitHubClient
+from github.http import create_http_client
+from github.permissions_policy import CODE_POLICY
+from github.rate_limit import RateLimitExceeded, RateLimitRegistry, RateLimitScheduler
+
+
+@pytest.mark.asyncio
+async def test_scheduler_rejects_requests_past_deadline_when_quota_is_spent() -> None:
+    scheduler = RateLimitScheduler(scope="t", reserve=0)
+    reset = str(int(time.time()) + 600)
+    response = httpx.Response(
+        200, headers={"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": reset}
+    )
+    await scheduler.update(response)
+    with pytest.raises(RateLimitExceeded):
+        await scheduler.acquire(deadline=time.time() + 1)
+
+
+@pytest.mark.asyncio
+async def test_client_retries_after_secondary_rate_limit() -> None:
+    calls = {"count": 0}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls["count"] += 1
+        if calls["count"] == 1:
+            return httpx.Response(403, headers={"Retry-After": "0"})
+        return httpx.Response(201, json={"html_url": "https://github.com/o/r/pull/1"})
+
+    limits = RateLimitRegistry(mutation_interval=0)
+    async with create_http_client(transport=httpx.MockTransport(handler)) as http:
+        github = GitHubClient(token="t", policy=CODE_POLICY, http=http, limits=limits)
+        pr = await github.create_pull_request("o", "r", "t", "head", "main", "body")
+    assert pr["html_url"].endswith("/pull/1")
+    assert calls["count"] == 2
@@ -0,0 +1,84 @@
+from pathlib import Path
+
+import pytest
+
+from llm.base import LLMClient, LLMResponse
+from llm.cache import CachedLLMClient, LLMResponseCache
+from llm.hedging import HedgedLLMClient
+
+
+class CountingClient(LLMClient):
+    def __init__(self, model: str = "m") -> None:
+        self.model = model
+        self.params: dict = {}
+        self.calls = 0
+
+    async def complete(self, prompt: str, correlation_id: str | None = None):
+        self.calls += 1
+        return LLMResponse(
+            content=f"plan {self.calls}", model=self.model, usage={"total_tokens": 40}
+        )
+
+
+@pytest.mark.asyncio
+async def test_cached_client_hits_sqlite_tier_across_instances(tmp_path: Path) -> None:
+    path = str(tmp_path / "cache" / "llm.db")
+    inner = CountingClient()
+    first = await CachedLLMClient(inner, LLMResponseCache(path=path)).complete(
+        "plan it "
+    )
+
+    cache = LLMResponseCache(path=path)
+    second = await CachedLLMClient(inner, cache).complete("plan it")
+    fresh = await CachedLLMClient(inner, cache).complete("plan it", cache=False)
+
+    assert first.content == second.content == "plan 1"
+    assert second.cached is True
+    assert fresh.content == "plan 2"
+    assert cache.stats.hits == 1
+    assert cache.stats.saved_tokens == 40
+
+
+@pytest.mark.asyncio
+async def test_cache_key_includes_generation_params() -> None:
+    inner = CountingClient()
+    client = CachedLLMClient(inner, LLMResponseCache())
+    await client.complete("p")
+    inner.params = {"temperature": 0.7}
+    await client.complete("p")
+    assert inner.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_wrapper_stats_count_only_its_own_calls() -> None:
+    cache = LLMResponseCache()
+    inner = CountingClient()
+    await CachedLLMClient(inner, cache).complete("earlier run")
+
+    run = CachedLLMClient(inner, cache)
+    await run.complete("plan it")
+    await run.complete("plan it")
+
+    assert run.stats.as_dict() == {"hits": 1, "misses": 1, "saved_tokens": 40}
+    assert cache.stats.misses == 2
+
+
+class FailingClient(LLMClient):
+    model = "primary"
+
+    async def complete(self, prompt: str, correlation_id: str | None = None):
+        raise RuntimeError("primary down")
+
+
+@pytest.mark.asyncio
+async def test_backup_model_response_is_not_cached_under_primary_key() -> None:
+    cache = LLMResponseCache()
+    backup = CountingClient("backup")
+    client = CachedLLMClient(HedgedLLMClient([FailingClient(), backup]), cache)
+
+    first = await client.complete("plan it")
+    second = await client.complete("plan it")
+
+    assert first.model == second.model == "backup"
+    assert second.cached is False
+    assert backup.calls == 2
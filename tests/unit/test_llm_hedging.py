@@ -0,0 +1,90 @@
+import asyncio
+import json
+from dataclasses import dataclass
+
+import httpx
+import pytest
+
+from llm.base import LLMResponse
+from llm.hedging import HedgedLLMClient, ModelHealthRegistry
+from llm.openrouter import OpenRouterClient
+
+
+class FakeOpenRouter:
+    """Answers per model: ``slow`` stalls, anything else replies immediately."""
+
+    def __init__(self) -> None:
+        self.cancelled: list[str] = []
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        model = json.loads(request.content)["model"]
+        if model == "slow":
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                self.cancelled.append(model)
+                raise
+        payload = {"choices": [{"message": {"content": f"from {model}"}}]}
+        return httpx.Response(200, content=json.dumps(payload))
+
+
+@dataclass
+class FailingClient:
+    model: str
+    calls: int = 0
+
+    async def complete(self, prompt: str, correlation_id: str | None = None):
+        self.calls += 1
+        raise httpx.HTTPStatusError(
+            "bad gateway",
+            request=httpx.Request("POST", "https://example.test"),
+            response=httpx.Response(502),
+        )
+
+
+@dataclass
+class EchoClient:
+    model: str
+    calls: int = 0
+
+    async def complete(self, prompt: str, correlation_id: str | None = None):
+        self.calls += 1
+        return LLMResponse(content=prompt, model=self.model)
+
+
+@pytest.mark.asyncio
+async def test_backup_wins_when_primary_is_slow() -> None:
+    server = FakeOpenRouter()
+    transport = httpx.MockTransport(server)
+    client = HedgedLLMClient(
+        clients=[
+            OpenRouterClient(api_key="x", model="slow", transport=transport),
+            OpenRouterClient(api_key="x", model="fast", transport=transport),
+        ],
+        default_delay=0.05,
+    )
+
+    response = await client.complete("plan")
+
+    assert response.content == "from fast"
+    assert response.metadata["winner"] == "fast"
+    assert response.metadata["hedged"] is True
+    assert response.metadata["attempted"] == ["slow", "fast"]
+    assert server.cancelled == ["slow"]
+
+
+@pytest.mark.asyncio
+async def test_breaker_routes_around_failing_model() -> None:
+    primary = FailingClient(model="broken")
+    backup = EchoClient(model="healthy")
+    health = ModelHealthRegistry(failure_threshold=2, cooldown=60)
+    client = HedgedLLMClient(clients=[primary, backup], health=health)
+
+    for _ in range(2):
+        response = await client.complete("hi")
+        assert response.metadata["winner"] == "healthy"
+    assert primary.calls == 2
+
+    response = await client.complete("hi")
+    assert response.metadata["attempted"] == ["healthy"]
+    assert primary.calls == 2
@@ -0,0 +1,122 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from llm.limiter import AdaptiveLimiter
+from llm.openrouter import OpenRouterClient
+
+
+class FakeOpenRouter:
+    """Local stand-in for OpenRouter that throttles the first requests."""
+
+    def __init__(self, throttled: int) -> None:
+        self.throttled = throttled
+        self.active = 0
+        self.peak = 0
+        self.calls = 0
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.calls += 1
+        if self.calls <= self.throttled:
+            await asyncio.sleep(0.01)
+            return httpx.Response(429, headers={"Retry-After": "0"})
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(0.01)
+        self.active -= 1
+        payload = {"choices": [{"message": {"content": "ok"}}]}
+        return httpx.Response(200, content=json.dumps(payload))
+
+
+@pytest.mark.asyncio
+async def test_limiter_shrinks_on_429_and_bounds_concurrency() -> None:
+    server = FakeOpenRouter(throttled=1)
+    limiter = AdaptiveLimiter(model="m", limit=4.0, increase=0.1)
+    client = OpenRouterClient(
+        api_key="x", model="m", transport=httpx.MockTransport(server), limiter=limiter
+    )
+    await client.complete("warm up")
+    assert limiter.limit < 4.0
+
+    responses = await asyncio.gather(*(client.complete(str(i)) for i in range(8)))
+    assert all(response.content == "ok" for response in responses)
+    assert server.peak <= 2
+    snapshot = limiter.snapshot()
+    assert snapshot.in_flight == 0
+    assert snapshot.queued == 0
+
+
+@pytest.mark.asyncio
+async def test_concurrent_429s_shrink_the_limit_once() -> None:
+    server = FakeOpenRouter(throttled=4)
+    limiter = AdaptiveLimiter(model="m", limit=4.0, increase=0.0)
+    client = OpenRouterClient(
+        api_key="x", model="m", transport=httpx.MockTransport(server), limiter=limiter
+    )
+    await asyncio.gather(*(client.complete(str(i)) for i in range(4)))
+    assert limiter.limit == 2.0
+
+    await limiter.on_throttle()
+    assert limiter.limit == 1.0
+
+
+class FakeRedis:
+    """The sorted-set and hash commands the limiter uses, in memory."""
+
+    def __init__(self) -> None:
+        self.zsets: dict[str, dict[str, float]] = {}
+        self.ttls: dict[str, int] = {}
+        self.fail_writes = False
+
+    async def zremrangebyscore(self, key: str, low: str, high: float) -> None:
+        members = self.zsets.get(key, {})
+        for member in [item for item, score in members.items() if score <= high]:
+            del members[member]
+
+    async def zadd(self, key: str, mapping: dict[str, float]) -> None:
+        if self.fail_writes:
+            raise ConnectionError("redis down")
+        self.zsets.setdefault(key, {}).update(mapping)
+
+    async def zcard(self, key: str) -> int:
+        return len(self.zsets.get(key, {}))
+
+    async def zrem(self, key: str, member: str) -> None:
+        self.zsets.get(key, {}).pop(member, None)
+
+    async def pexpire(self, key: str, milliseconds: int) -> None:
+        self.ttls[key] = milliseconds
+
+    async def hgetall(self, key: str) -> dict:
+        return {}
+
+
+@pytest.mark.asyncio
+async def test_shared_slots_of_crashed_holders_expire() -> None:
+    redis = FakeRedis()
+    crashed = AdaptiveLimiter(model="m", limit=1.0, redis=redis, slot_ttl=0.05)
+    await crashed.acquire()
+
+    limiter = AdaptiveLimiter(
+        model="m", limit=1.0, redis=redis, slot_ttl=0.05, poll_interval=0.01
+    )
+    async with limiter.slot():
+        assert await redis.zcard(limiter.holders_key) == 1
+        assert redis.ttls[limiter.holders_key] == 50
+    assert await redis.zcard(limiter.holders_key) == 0
+
+
+@pytest.mark.asyncio
+async def test_release_without_shared_slot_leaves_counter_alone() -> None:
+    redis = FakeRedis()
+    other = AdaptiveLimiter(model="m", redis=redis)
+    holder = await other.acquire()
+
+    redis.fail_writes = True
+    limiter = AdaptiveLimiter(model="m", redis=redis)
+    async with limiter.slot():
+        pass
+
+    assert list(redis.zsets[limiter.holders_key]) == [holder]
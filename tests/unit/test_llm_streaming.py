@@ -0,0 +1,76 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from llm.openrouter import OpenRouterClient, StreamMetrics, create_llm_http_client
+
+
+def sse(*chunks: str) -> bytes:
+    events = [
+        "data: " + json.dumps({"choices": [{"delta": {"content": chunk}}]})
+        for chunk in chunks
+    ]
+    events.append(": OPENROUTER PROCESSING")
+    events.append("data: [DONE]")
+    return ("\n\n".join(events) + "\n\n").encode("utf-8")
+
+
+@pytest.mark.asyncio
+async def test_stream_yields_chunks_and_records_ttft() -> None:
+    def handler(request: httpx.Request) -> httpx.Response:
+        assert json.loads(request.content)["stream"] is True
+        return httpx.Response(200, content=sse("diff ", "--git"))
+
+    async with create_llm_http_client(httpx.MockTransport(handler)) as http:
+        client = OpenRouterClient(api_key="x", model="y", http=http)
+        metrics = StreamMetrics()
+        chunks = [chunk async for chunk in client.stream("hi", metrics=metrics)]
+        response = await client.complete_stream("hi")
+    assert chunks == ["diff ", "--git"]
+    assert metrics.chunks == 2
+    assert metrics.ttft_ms is not None
+    assert response.content == "diff --git"
+
+
+class StalledStream(httpx.AsyncByteStream):
+    async def __aiter__(self):
+        await asyncio.sleep(5)
+        yield b""
+
+
+@pytest.mark.asyncio
+async def test_stream_enforces_first_token_budget() -> None:
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, stream=StalledStream())
+
+    client = OpenRouterClient(
+        api_key="x",
+        model="y",
+        transport=httpx.MockTransport(handler),
+        first_token_timeout=0.05,
+    )
+    with pytest.raises(TimeoutError):
+        async for _ in client.stream("hi"):
+            pass
+
+
+@pytest.mark.asyncio
+async def test_first_token_budget_covers_headers_and_is_not_retried() -> None:
+    calls = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        await asyncio.sleep(0.5)
+        return httpx.Response(200, content=sse("late"))
+
+    client = OpenRouterClient(
+        api_key="x",
+        model="y",
+        transport=httpx.MockTransport(handler),
+        first_token_timeout=0.05,
+    )
+    with pytest.raises(TimeoutError):
+        await client.complete_stream("hi")
+    assert len(calls) == 1
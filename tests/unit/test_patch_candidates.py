@@ -0,0 +1,108 @@
+import asyncio
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import pytest
+
+from llm.base import LLMResponse
+from services.jobs import check_candidate
+from services.patch_candidates import first_valid_patch
+from tools.git_ops import commit_all, init_repo, run_git
+
+GOOD_DIFF = """diff --git a/a.txt b/a.txt
+--- a/a.txt
++++ b/a.txt
+@@ -1 +1 @@
+-old
++new
+"""
+STALE_DIFF = GOOD_DIFF.replace("-old", "-missing")
+
+
+@dataclass
+class FakeClient:
+    model: str
+    content: str
+    delay: float
+    params: dict = field(default_factory=dict)
+    cancelled: bool = False
+
+    async def complete(self, prompt: str, correlation_id: str | None = None):
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        return LLMResponse(content=self.content, model=self.model)
+
+
+@pytest.fixture
+def repo(tmp_path: Path) -> Path:
+    init_repo(tmp_path)
+    run_git(tmp_path, ["config", "user.email", "bot@example.com"])
+    run_git(tmp_path, ["config", "user.name", "bot"])
+    (tmp_path / "a.txt").write_text("old\n")
+    commit_all(tmp_path, "init")
+    return tmp_path
+
+
+@pytest.mark.asyncio
+async def test_first_candidate_that_applies_wins(repo: Path) -> None:
+    invalid = FakeClient("fast", "no diff here", delay=0)
+    stale = FakeClient("stale", STALE_DIFF, delay=0.01)
+    good = FakeClient("good", GOOD_DIFF, delay=0.05)
+    slow = FakeClient("slow", GOOD_DIFF, delay=5)
+
+    outcome = await first_valid_patch(
+        [invalid, stale, good, slow],
+        "prompt",
+        lambda content: check_candidate(content, repo, None),
+    )
+
+    assert outcome.winner is not None
+    assert outcome.winner.model == "good"
+    assert outcome.winner.diff == GOOD_DIFF
+    errors = [item.error for item in outcome.rejected]
+    assert errors[0] == "missing diff --git headers"
+    assert errors[1] == "patch does not apply: a.txt: hunk #1 does not match"
+    assert outcome.cancelled == 1
+    assert slow.cancelled
+
+
+@pytest.mark.asyncio
+async def test_no_winner_when_every_candidate_fails(repo: Path) -> None:
+    outcome = await first_valid_patch(
+        [FakeClient("a", STALE_DIFF, delay=0), FakeClient("b", "", delay=0)],
+        "prompt",
+        lambda content: check_candidate(content, repo, None),
+    )
+
+    assert outcome.winner is None
+    assert len(outcome.rejected) == 2
+
+
+@pytest.mark.asyncio
+async def test_complete_candidate_beats_earlier_partial_one(repo: Path) -> None:
+    (repo / "b.txt").write_text("keep\n")
+    commit_all(repo, "second file")
+    partial_diff = GOOD_DIFF + STALE_DIFF.replace("a.txt", "b.txt")
+    partial = FakeClient("partial", partial_diff, delay=0)
+    complete = FakeClient("complete", GOOD_DIFF, delay=0.05)
+
+    outcome = await first_valid_patch(
+        [partial, complete],
+        "prompt",
+        lambda content: check_candidate(content, repo, None, partial=True),
+    )
+
+    assert outcome.winner is not None
+    assert outcome.winner.model == "complete"
+
+    outcome = await first_valid_patch(
+        [partial],
+        "prompt",
+        lambda content: check_candidate(content, repo, None, partial=True),
+    )
+
+    assert outcome.winner is not None
+    assert outcome.winner.partial
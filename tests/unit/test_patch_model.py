@@ -0,0 +1,95 @@
+from pathlib import Path
+
+import pytest
+
+from tools.diff_ops import diff_stats, hash_diff
+from tools.patch_model import Patch, PatchApplyError, apply_patch, write_changes
+
+DIFF = """diff --git a/app.py b/app.py
+index 83db48f..bf269f4 100644
+--- a/app.py
++++ b/app.py
+@@ -1,4 +1,4 @@ def main():
+ def main():
+-    return 1
++    return 2
+ 
+ 
+diff --git a/new.py b/new.py
+new file mode 100644
+--- /dev/null
++++ b/new.py
+@@ -0,0 +1,2 @@
++VALUE = 1
++-- not a header
+"""
+
+
+def test_parse_builds_files_and_hunks_in_one_pass() -> None:
+    patch = Patch.parse(DIFF)
+
+    assert [item.path for item in patch.files] == ["app.py", "new.py"]
+    assert patch.files[1].is_new
+    assert patch.hunk_count == 2
+    assert patch.files[0].hunks[0].section == "def main():"
+    assert patch.files[0].hunks[0].old_lines() == [
+        "def main():",
+        "    return 1",
+        "",
+        "",
+    ]
+    assert patch.files[1].hunks[0].new_lines() == ["VALUE = 1", "-- not a header"]
+    assert patch.stats() == (2, 4)
+    assert patch.stats()[0] == diff_stats(DIFF)[0]
+    assert patch.hash() == hash_diff(DIFF)
+
+
+def test_applies_in_memory_with_offset_and_whitespace_fuzz(tmp_path: Path) -> None:
+    header = "".join(f"# line {number}\n" for number in range(30))
+    (tmp_path / "app.py").write_text(header + "def main():  \n    return 1\n\n\n")
+
+    changes = apply_patch(Patch.parse(DIFF), tmp_path)
+
+    assert changes["app.py"] == header + "def main():  \n    return 2\n\n\n"
+    assert changes["new.py"] == "VALUE = 1\n-- not a header\n"
+    assert not (tmp_path / "new.py").exists()
+    write_changes(tmp_path, changes)
+    assert (tmp_path / "new.py").read_text() == "VALUE = 1\n-- not a header\n"
+
+
+def test_bare_hunk_headers_and_dropped_context(tmp_path: Path) -> None:
+    (tmp_path / "a.txt").write_text("one\ntwo\nthree\nfour\nfive\n")
+    diff = (
+        "diff --git a/a.txt b/a.txt\n--- a/a.txt\n+++ b/a.txt\n"
+        "@@\n two\n-three\n+THREE\n four\n changed by someone else\n"
+    )
+
+    changes = apply_patch(Patch.parse(diff), tmp_path)
+
+    assert changes == {"a.txt": "one\ntwo\nTHREE\nfour\nfive\n"}
+
+
+def test_mismatch_and_escaping_paths_are_rejected(tmp_path: Path) -> None:
+    (tmp_path / "a.txt").write_text("one\ntwo\n")
+    stale = "--- a/a.txt\n+++ b/a.txt\n@@ -1,2 +1,2 @@\n-zero\n+ZERO\n one\n"
+    escape = "--- /dev/null\n+++ b/../evil.txt\n@@ -0,0 +1 @@\n+x\n"
+
+    with pytest.raises(PatchApplyError, match="a.txt: hunk #1 does not match"):
+        apply_patch(Patch.parse(stale), tmp_path)
+    with pytest.raises(PatchApplyError, match="outside of the repository"):
+        apply_patch(Patch.parse(escape), tmp_path)
+
+
+def test_crlf_deletions_and_missing_newline(tmp_path: Path) -> None:
+    (tmp_path / "win.txt").write_bytes(b"a\r\nb\r\n")
+    (tmp_path / "gone.txt").write_text("bye\n")
+    diff = (
+        "--- a/win.txt\n+++ b/win.txt\n@@ -1,2 +1,2 @@\n a\n-b\n+c\n"
+        "\\ No newline at end of file\n"
+        "diff --git a/gone.txt b/gone.txt\ndeleted file mode 100644\n"
+        "--- a/gone.txt\n+++ /dev/null\n@@ -1 +0,0 @@\n-bye\n"
+    )
+
+    changes = apply_patch(Patch.parse(diff), tmp_path)
+
+    assert changes == {"win.txt": "a\r\nc", "gone.txt": None}
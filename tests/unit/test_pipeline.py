@@ -0,0 +1,66 @@
+import asyncio
+import time
+
+import pytest
+
+from services.pipeline import Pipeline, Stage, StageError
+
+
+def sleeper(value: str, delay: float):
+    async def run(results: dict) -> str:
+        await asyncio.sleep(delay)
+        return value
+
+    return run
+
+
+@pytest.mark.asyncio
+async def test_independent_stages_overlap() -> None:
+    async def join(results: dict) -> str:
+        return results["plan"] + results["clone"]
+
+    pipeline = Pipeline(
+        [
+            Stage("fetch", sleeper("issue", 0.05)),
+            Stage("clone", sleeper("repo", 0.2)),
+            Stage("plan", sleeper("plan", 0.15), deps=("fetch",)),
+            Stage("index", join, deps=("plan", "clone")),
+        ]
+    )
+
+    started = time.monotonic()
+    results = await pipeline.run()
+    elapsed = time.monotonic() - started
+
+    assert results["index"] == "planrepo"
+    assert elapsed < 0.35
+    report = pipeline.timing_report()
+    assert [item["stage"] for item in report["stages"]] == [
+        "fetch",
+        "clone",
+        "plan",
+        "index",
+    ]
+    assert all(item["status"] == "ok" for item in report["stages"])
+    index = report["stages"][-1]
+    assert index["start_ms"] >= 190
+
+
+@pytest.mark.asyncio
+async def test_failed_stage_cancels_the_rest() -> None:
+    async def broken(results: dict) -> None:
+        raise StageError("Failed to clone repo")
+
+    pipeline = Pipeline(
+        [
+            Stage("plan", sleeper("plan", 5)),
+            Stage("clone", broken),
+            Stage("index", sleeper("index", 0), deps=("clone",)),
+        ]
+    )
+
+    with pytest.raises(StageError, match="Failed to clone repo"):
+        await pipeline.run()
+
+    statuses = {name: timing.status for name, timing in pipeline.timings.items()}
+    assert statuses == {"plan": "cancelled", "clone": "failed"}
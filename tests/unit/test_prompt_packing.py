@@ -0,0 +1,59 @@
+import pytest
+
+from internal.reviewer_runner import build_prompt, collect_files
+from llm.packing import Section, estimate_tokens, pack, prompt_budget
+from services.jobs import build_patch_prompt, build_planner_prompt
+
+
+def test_pack_trims_lowest_priority_first_and_keeps_order() -> None:
+    sections = [
+        Section("head", "HEAD\n", trim="keep"),
+        Section("plan", "plan " * 50, priority=5),
+        Section("files", "\n".join(f"src/f{i}.py" for i in range(500)), trim="lines"),
+    ]
+    packed = pack(sections, budget=300)
+    assert packed.tokens <= 300
+    assert packed.text.startswith("HEAD\nplan plan")
+    assert "more line(s) omitted" in packed.text
+    assert list(packed.trimmed) == ["files"]
+
+
+def test_patch_prompt_fits_budget() -> None:
+    issue = {"title": "Fix it", "body": "details " * 2000}
+    snippets = "\n\n".join(f"## f{i}.py\n" + "x = 1\n" * 200 for i in range(8))
+    files = [f"pkg/module_{i}.py" for i in range(200)]
+    prompt = build_patch_prompt(issue, "- step", files, snippets, "", budget=2000)
+    assert estimate_tokens(prompt) <= 2000
+    assert "Output ONLY the diff" in prompt
+    assert "- step" in prompt
+
+
+def test_review_prompt_keeps_head_of_every_file() -> None:
+    files = [{"filename": f"f{i}.py", "patch": "+line\n" * 2000} for i in range(5)]
+    prompt = build_prompt({"title": "PR"}, files, "ok", budget=3000)
+    assert estimate_tokens(prompt) <= 3000
+    assert all(f"File: f{i}.py" in prompt for i in range(5))
+
+
+def test_prompt_budget_is_capped() -> None:
+    assert prompt_budget("unknown/model") <= 32_768 - 4_096
+
+
+@pytest.mark.asyncio
+async def test_large_first_file_does_not_crowd_out_the_rest() -> None:
+    async def files():
+        yield {"filename": "generated.py", "patch": "+x\n" * 50_000}
+        for number in range(3):
+            yield {"filename": f"src/f{number}.py", "patch": "+y\n"}
+
+    collected = await collect_files(
+        files(), max_files=10, max_chars=120_000, max_file_chars=20_000
+    )
+
+    assert [len(file["patch"]) for file in collected] == [20_000, 3, 3, 3]
+
+
+def test_planner_prompt_includes_issue_comments() -> None:
+    issue = {"title": "Fix it", "body": "details", "comments": ["use v2 API", " "]}
+    prompt = build_planner_prompt(issue)
+    assert "Issue comments:\nuse v2 API\n" in prompt
@@ -0,0 +1,61 @@
+from pathlib import Path
+
+from tools.snippets import build_snippets, find_windows, term_pattern
+
+
+def write_lines(path: Path, count: int, marks: dict[int, str]) -> Path:
+    lines = [marks.get(number, f"filler {number}") for number in range(1, count + 1)]
+    path.write_text("\n".join(lines) + "\n")
+    return path
+
+
+def test_window_around_a_deep_match_has_line_numbers(tmp_path: Path) -> None:
+    write_lines(tmp_path / "big.py", 3000, {1500: "def parse_token(value):"})
+
+    snippets = build_snippets(tmp_path, ["big.py"], ["parse_token"], 2000)
+
+    assert snippets.startswith("## big.py:1494-1510\n")
+    assert "1500: def parse_token(value):" in snippets
+    assert "filler 1493" not in snippets
+    assert "filler 1511" not in snippets
+
+
+def test_overlapping_windows_are_merged(tmp_path: Path) -> None:
+    path = write_lines(tmp_path / "mod.py", 200, {50: "needle", 55: "needle"})
+
+    windows = find_windows(path, "mod.py", term_pattern(["needle"]))
+
+    assert len(windows) == 1
+    assert windows[0].first_line == 44
+    assert windows[0].hits == 2
+
+
+def test_explicit_line_positions_are_used(tmp_path: Path) -> None:
+    path = write_lines(tmp_path / "mod.py", 100, {})
+
+    windows = find_windows(path, "mod.py", None, lines=[80], before=1, after=1)
+
+    assert [window.first_line for window in windows] == [79]
+    assert "80: filler 80" in windows[0].render(path.read_bytes())
+
+
+def test_budget_stops_extraction(tmp_path: Path) -> None:
+    for name in ("a.py", "b.py", "c.py"):
+        write_lines(tmp_path / name, 100, {10: "needle here", 70: "needle again"})
+
+    snippets = build_snippets(tmp_path, ["a.py", "b.py", "c.py"], ["needle"], 150)
+
+    assert "## a.py:" in snippets
+    assert "## c.py:" not in snippets
+
+
+def test_binary_files_are_skipped_and_unmatched_files_show_their_head(
+    tmp_path: Path,
+) -> None:
+    (tmp_path / "logo.png").write_bytes(b"\x89PNG\0\0needle")
+    write_lines(tmp_path / "notes.md", 50, {})
+
+    snippets = build_snippets(tmp_path, ["logo.png", "notes.md"], ["needle"], 1000)
+
+    assert "logo.png" not in snippets
+    assert snippets.startswith("## notes.md:1-17\n")
@@ -0,0 +1,56 @@
+from tools.symbols import SymbolIndex, parse_source
+
+SERVICE = """import os
+
+
+class HealthService:
+    @staticmethod
+    def healthz() -> dict:
+        return {"status": "ok"}
+
+
+def build_status() -> str:
+    return os.getenv("STATUS", "ok")
+"""
+
+ROUTES = """from app.service import HealthService
+
+
+def health_route():
+    return HealthService.healthz()
+
+
+def unrelated():
+    return 1
+"""
+
+
+def test_parse_source_finds_definitions_references_and_imports() -> None:
+    symbols = parse_source(SERVICE)
+    assert symbols is not None
+    names = {(item.name, item.kind) for item in symbols.definitions}
+    assert ("HealthService", "class") in names
+    assert ("HealthService.healthz", "method") in names
+    assert ("build_status", "function") in names
+    healthz = next(item for item in symbols.definitions if item.short_name == "healthz")
+    assert (healthz.start, healthz.end) == (5, 7)
+    assert symbols.imports == ["os"]
+    assert "getenv" in symbols.references
+    assert parse_source("def broken(:\n") is None
+
+
+def test_callers_and_mentions() -> None:
+    index = SymbolIndex()
+    index.add("app/service.py", parse_source(SERVICE))
+    index.add("app/routes.py", parse_source(ROUTES))
+
+    mentioned = index.mentioned("The healthz endpoint returns 500")
+    assert [(path, item.name) for path, item in mentioned] == [
+        ("app/service.py", "HealthService.healthz")
+    ]
+    path, healthz = mentioned[0]
+    callers = index.callers(path, healthz)
+    assert [(other, item.name) for other, item in callers] == [
+        ("app/routes.py", "health_route")
+    ]
+    assert index.importers("app/service.py") == {"app/routes.py"}
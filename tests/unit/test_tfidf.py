@@ -0,0 +1,68 @@
+import mmap
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+from tools.bm25 import MAX_TOKEN_LENGTH, BM25Index, tokenize
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("scipy")
+
+from tools.tfidf import TfidfIndex, load_or_build  # noqa: E402
+
+
+def file_backed(array: object) -> bool:
+    while isinstance(array, np.ndarray):
+        if isinstance(array, np.memmap):
+            return True
+        array = array.base
+    return isinstance(array, mmap.mmap)
+
+
+def sample_index() -> BM25Index:
+    index = BM25Index(commit="abc123")
+    index.add("app/health.py", tokenize("def healthz(): return {'status': 'ok'}"))
+    index.add("app/cors.py", tokenize("CORSMiddleware allow_origins allow_headers"))
+    index.add("docs/ops.md", tokenize("Health checks and readiness probes"))
+    return index
+
+
+def test_cosine_ranking_matches_issue_terms() -> None:
+    matrix = TfidfIndex.from_bm25(sample_index())
+
+    ranked = matrix.search("healthz endpoint returns wrong status", limit=2)
+
+    assert ranked[0][0] == "app/health.py"
+    assert 0 < ranked[0][1] <= 1.0
+    assert matrix.search("nothing matches zzz") == []
+
+
+def test_saved_matrix_is_memory_mapped(tmp_path: Path) -> None:
+    index = sample_index()
+    built = load_or_build(tmp_path, "demo", index)
+    loaded = load_or_build(tmp_path, "demo", index)
+
+    for array in (loaded.matrix.data, loaded.matrix.indices, loaded.vocab):
+        assert file_backed(array)
+    assert loaded.search("cors headers") == built.search("cors headers")
+
+
+def test_blob_tokens_do_not_widen_the_vocab() -> None:
+    index = sample_index()
+    index.add("assets/logo.py", tokenize("LOGO = 'aGVsbG8" + "x" * 5000 + "'"))
+
+    matrix = TfidfIndex.from_bm25(index)
+
+    assert matrix.vocab.dtype.itemsize <= 4 * MAX_TOKEN_LENGTH
+
+
+def test_concurrent_builds_of_one_commit(tmp_path: Path) -> None:
+    index = sample_index()
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        built = list(
+            pool.map(lambda _: load_or_build(tmp_path, "demo", index), range(8))
+        )
+
+    assert all(item.search("cors headers") for item in built)
+    assert [path.name for path in (tmp_path / "demo").iterdir()] == ["abc123.tfidf"]